@@ -0,0 +1,213 @@
+"""
+Pluggable inference backends for the handwriting CNN and the tabular MLP.
+
+A backend turns a model artifact into predictors - callables that map numpy
+inputs to a numpy output (see inference.py). The server picks one backend per
+model at startup (NEURO_CNN_BACKEND / NEURO_MLP_BACKEND):
+
+    keras   TensorFlow/Keras model (.keras / .h5), direct or model.predict path
+    onnx    ONNX Runtime CPU session over a model from convert_to_onnx.py
+    tflite  INT8 / dynamic-range TFLite model from quantize_cnn.py (CNN only)
+    lite   pure-NumPy MLP from mlp_lite.py (MLP only)
+
+Every CNN backend also provides the fused TTA predictor, which takes uint8
+images plus one divisor per image.
+"""
+
+import os
+import logging
+import threading
+
+import numpy as np
+
+from inference import make_predictor
+
+logger = logging.getLogger(__name__)
+
+CNN_BACKENDS = ("keras", "onnx", "tflite")
+MLP_BACKENDS = ("keras", "lite", "onnx")
+
+# ONNX Runtime intra-op threads per session (0 = let ORT decide)
+ORT_THREADS = int(os.getenv("NEURO_ORT_THREADS", "0"))
+# TFLite interpreter threads (0 = TFLite default)
+TFLITE_THREADS = int(os.getenv("NEURO_TFLITE_THREADS", "0"))
+
+_ONNX_DTYPES = {
+    "tensor(float)": np.float32,
+    "tensor(double)": np.float64,
+    "tensor(float16)": np.float16,
+    "tensor(uint8)": np.uint8,
+    "tensor(int64)": np.int64,
+    "tensor(int32)": np.int32,
+}
+
+
+def build_tta_model(model):
+    """Wrap a Keras CNN so it takes uint8 images plus one divisor per image.
+
+    The cast and normalization run inside the TF graph, so TTA batches stay
+    uint8 (4x smaller) until they reach the model.
+    """
+    import tensorflow as tf
+
+    height, width, channels = model.inputs[0].shape[1:]
+    images = tf.keras.Input(shape=(height, width, channels), dtype="uint8", name="images")
+    divisors = tf.keras.Input(shape=(1,), dtype="float32", name="divisors")
+    normalized = tf.keras.layers.Lambda(
+        lambda t: tf.cast(t[0], tf.float32) / tf.reshape(t[1], (-1, 1, 1, 1)),
+        name="tta_normalize",
+    )([images, divisors])
+    return tf.keras.Model([images, divisors], model(normalized), name="cnn_tta")
+
+
+class ScaledInputPredictor:
+    """Fused-TTA adapter for backends without in-graph normalization.
+
+    Divides in float32 exactly like the Keras graph does, then runs the
+    wrapped float predictor.
+    """
+
+    def __init__(self, predictor, name=None):
+        self.predictor = predictor
+        self.name = name or f"{predictor.name}_tta"
+        self.path = predictor.path
+
+    def __call__(self, images, divisors):
+        x = np.asarray(images, dtype=np.float32) / np.asarray(divisors, dtype=np.float32).reshape(-1, 1, 1, 1)
+        return self.predictor(x)
+
+
+class OnnxPredictor:
+    """ONNX Runtime CPU session with the same call interface as inference.DirectPredictor"""
+
+    path = "onnx"
+
+    def __init__(self, model_path, name=None, threads=ORT_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.name = name or os.path.basename(model_path)
+        self._inputs = [(i.name, _ONNX_DTYPES.get(i.type, np.float32)) for i in self.session.get_inputs()]
+        self._output = self.session.get_outputs()[0].name
+        logger.info(f"⚡ {self.name}: ONNX Runtime session over {model_path}")
+
+    def __call__(self, *inputs):
+        feed = {name: np.asarray(x, dtype=dtype) for (name, dtype), x in zip(self._inputs, inputs)}
+        return self.session.run([self._output], feed)[0]
+
+
+class TFLitePredictor:
+    """TFLite interpreter with the same call interface as inference.DirectPredictor.
+
+    Inputs and outputs stay float32 even for full-integer models - quantized
+    tensors are (de)quantized here with the tensor's scale and zero point.
+    An interpreter is not thread-safe and has one input shape at a time, so
+    calls are serialized and the input is only resized when the batch size
+    changes.
+    """
+
+    path = "tflite"
+
+    def __init__(self, model_path, name=None, threads=TFLITE_THREADS):
+        # Standalone interpreters first - they avoid loading TensorFlow
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                import tensorflow as tf
+
+                Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=threads or None)
+        self.interpreter.allocate_tensors()
+        self.name = name or os.path.basename(model_path)
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+        logger.info(f"⚡ {self.name}: TFLite interpreter over {model_path} (input {self._input['dtype'].__name__})")
+
+    def _resize(self, batch_size):
+        shape = [batch_size] + list(self._input["shape"][1:])
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        scale, zero_point = self._input["quantization"]
+        if scale:
+            info = np.iinfo(self._input["dtype"])
+            x = np.clip(np.round(x / scale + zero_point), info.min, info.max)
+        x = x.astype(self._input["dtype"])
+
+        with self._lock:
+            if len(x) != self._batch_size:
+                self._resize(len(x))
+            self.interpreter.set_tensor(self._input["index"], x)
+            self.interpreter.invoke()
+            y = self.interpreter.get_tensor(self._output["index"])
+
+        scale, zero_point = self._output["quantization"]
+        if scale:
+            return (y.astype(np.float32) - zero_point) * scale
+        return y
+
+
+def _load_keras_cnn(model_path, inference_path):
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path)
+    predictor = make_predictor(model, inference_path, name="cnn")
+    tta_predictor = make_predictor(build_tta_model(model), inference_path, name="cnn_tta")
+    return model, predictor, tta_predictor
+
+
+def _load_onnx_cnn(model_path, inference_path):
+    predictor = OnnxPredictor(model_path, name="cnn")
+    return None, predictor, ScaledInputPredictor(predictor, name="cnn_tta")
+
+
+def _load_tflite_cnn(model_path, inference_path):
+    predictor = TFLitePredictor(model_path, name="cnn")
+    return None, predictor, ScaledInputPredictor(predictor, name="cnn_tta")
+
+
+def _load_keras_mlp(model_path, inference_path):
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path, compile=False)
+    return model, make_predictor(model, inference_path, name="mlp")
+
+
+def _load_lite_mlp(model_path, inference_path):
+    from mlp_lite import NumpyMLP
+
+    return None, NumpyMLP.load(model_path, name="mlp")
+
+
+def _load_onnx_mlp(model_path, inference_path):
+    return None, OnnxPredictor(model_path, name="mlp")
+
+
+_CNN_LOADERS = {"keras": _load_keras_cnn, "onnx": _load_onnx_cnn, "tflite": _load_tflite_cnn}
+_MLP_LOADERS = {"keras": _load_keras_mlp, "lite": _load_lite_mlp, "onnx": _load_onnx_mlp}
+
+
+def load_cnn(backend, model_path, inference_path="direct"):
+    """Load the handwriting CNN -> (keras model or None, predictor, fused TTA predictor)"""
+    if backend not in _CNN_LOADERS:
+        raise ValueError(f"Unknown CNN backend {backend!r} - expected one of {CNN_BACKENDS}")
+    return _CNN_LOADERS[backend](model_path, inference_path)
+
+
+def load_mlp(backend, model_path, inference_path="direct"):
+    """Load the tabular MLP -> (keras model or None, predictor)"""
+    if backend not in _MLP_LOADERS:
+        raise ValueError(f"Unknown MLP backend {backend!r} - expected one of {MLP_BACKENDS}")
+    return _MLP_LOADERS[backend](model_path, inference_path)
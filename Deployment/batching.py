@@ -0,0 +1,188 @@
+"""
+Dynamic micro-batching for model inference.
+
+Concurrent requests submit their input rows to a MicroBatcher. A background
+task collects rows for up to ``max_wait_ms`` (or until ``max_batch_size`` rows
+are queued), runs ONE model call on the stacked matrix and hands every caller
+back its own rows of the output.
+
+Multi-input models submit a tuple of arrays that share the leading (row)
+dimension; each member is stacked separately and batch_fn receives them as
+positional arguments.
+"""
+
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _num_rows(payload):
+    return len(payload[0]) if isinstance(payload, tuple) else len(payload)
+
+
+def _stack(payloads):
+    if isinstance(payloads[0], tuple):
+        return tuple(np.concatenate(parts, axis=0) for parts in zip(*payloads))
+    return np.concatenate(payloads, axis=0)
+
+
+class MicroBatcher:
+    """Collects concurrent inference requests into batched model calls.
+
+    batch_fn receives the stacked input matrix (or matrices, for tuple
+    payloads) and must return an array whose first dimension matches it. It
+    runs in ``executor`` (the loop's default executor when None) so the event
+    loop stays free while the model computes.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait_ms=5.0, name="batcher", executor=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.batch_fn = batch_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+        self.name = name
+        self.executor = executor
+
+        self._queue = None
+        self._worker = None
+        self._carry = None
+
+        # Fill statistics for tuning max_batch_size / max_wait_ms
+        self._batches = 0
+        self._rows = 0
+        self._last_batch_size = 0
+        self._size_histogram = {}
+        self._total_queue_wait = 0.0
+        self._total_compute = 0.0
+
+    async def submit(self, rows):
+        """Queue rows (shape (n, ...), or a tuple of such arrays) and wait for their n output rows."""
+        if isinstance(rows, tuple):
+            rows = tuple(np.asarray(part) for part in rows)
+            if len({len(part) for part in rows}) != 1:
+                raise ValueError(f"{self.name}: tuple members must share the row dimension")
+        else:
+            rows = np.asarray(rows)
+            if rows.ndim == 0:
+                raise ValueError(f"{self.name}: expected a batch of rows, got a scalar")
+        if _num_rows(rows) == 0:
+            raise ValueError(f"{self.name}: expected a non-empty batch of rows")
+
+        loop = asyncio.get_running_loop()
+        self._ensure_worker(loop)
+        future = loop.create_future()
+        await self._queue.put((rows, future, time.perf_counter()))
+        return await future
+
+    def _ensure_worker(self, loop):
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._carry = None
+            self._worker = loop.create_task(self._run())
+
+    async def _next_item(self, timeout=None):
+        if self._carry is not None:
+            item, self._carry = self._carry, None
+            return item
+        if timeout is None:
+            return await self._queue.get()
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._next_item()]
+            size = _num_rows(pending[0][0])
+            deadline = loop.time() + self.max_wait
+
+            while size < self.max_batch_size:
+                remaining = deadline - loop.time()
+                try:
+                    if remaining <= 0:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = await self._next_item(remaining)
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if size + _num_rows(item[0]) > self.max_batch_size:
+                    # Would overflow this batch - it opens the next one instead
+                    self._carry = item
+                    break
+                pending.append(item)
+                size += _num_rows(item[0])
+
+            await self._dispatch(loop, pending)
+
+    async def _dispatch(self, loop, pending):
+        # Callers that gave up (client disconnected) don't take part in the batch
+        live = [item for item in pending if not item[1].done()]
+        if not live:
+            return
+        size = sum(_num_rows(rows) for rows, _, _ in live)
+
+        started = time.perf_counter()
+        try:
+            batch = _stack([rows for rows, _, _ in live])
+            args = batch if isinstance(batch, tuple) else (batch,)
+            outputs = await loop.run_in_executor(self.executor, self.batch_fn, *args)
+            outputs = np.asarray(outputs)
+            if len(outputs) != size:
+                raise RuntimeError(f"{self.name}: batch_fn returned {len(outputs)} rows for {size} inputs")
+        except Exception as e:
+            logger.error(f"❌ {self.name} batch of {size} rows failed: {e}")
+            for _, future, _ in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._record(live, size, started, time.perf_counter())
+
+        offset = 0
+        for rows, future, _ in live:
+            n = _num_rows(rows)
+            if not future.done():
+                future.set_result(outputs[offset:offset + n])
+            offset += n
+
+    def _record(self, items, batch_size, started, finished):
+        self._batches += 1
+        self._rows += batch_size
+        self._last_batch_size = batch_size
+        self._size_histogram[batch_size] = self._size_histogram.get(batch_size, 0) + 1
+        self._total_queue_wait += sum(started - queued_at for _, _, queued_at in items)
+        self._total_compute += finished - started
+        logger.debug(
+            f"🧺 {self.name}: {batch_size}/{self.max_batch_size} rows "
+            f"({batch_size / self.max_batch_size:.0%} full) in {(finished - started) * 1000:.1f} ms"
+        )
+
+    def stats(self):
+        """Batch fill report for the /metrics endpoint."""
+        batches = self._batches
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "batches": batches,
+            "rows": self._rows,
+            "last_batch_size": self._last_batch_size,
+            "mean_batch_size": round(self._rows / batches, 3) if batches else 0.0,
+            "mean_fill_ratio": round(self._rows / (batches * self.max_batch_size), 4) if batches else 0.0,
+            "mean_queue_wait_ms": round(self._total_queue_wait / self._rows * 1000, 3) if self._rows else 0.0,
+            "mean_batch_compute_ms": round(self._total_compute / batches * 1000, 3) if batches else 0.0,
+            "batch_size_histogram": {str(k): v for k, v in sorted(self._size_histogram.items())},
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def close(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Batch Scoring Benchmark
+Records/sec of /predict/batch against looping over /predict/json for a clinic roster
+
+Start the server first (python main.py), then run:
+    python benchmark_batch.py --records 500 --batch-sizes 10 100 500
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+import requests
+
+BASE_URL = "http://localhost:9000"
+
+def make_roster(base_url, count, seed=0):
+    """``count`` patients jittered around the API's positive and negative samples"""
+    samples = requests.get(f"{base_url}/sample-data/all", timeout=10).json()["samples"]
+    templates = [sample["features"] for sample in samples.values()]
+    rng = np.random.default_rng(seed)
+    roster = []
+    for i in range(count):
+        record = dict(templates[i % len(templates)])
+        for key, value in record.items():
+            if isinstance(value, float):
+                record[key] = round(value * float(rng.uniform(0.9, 1.1)), 3)
+        roster.append(record)
+    return roster
+
+def loop_json(session, base_url, roster):
+    results = []
+    for record in roster:
+        response = session.post(f"{base_url}/predict/json", json=record, timeout=30)
+        response.raise_for_status()
+        results.append(response.json())
+    return results
+
+def batched(session, base_url, roster, batch_size):
+    results = []
+    for start in range(0, len(roster), batch_size):
+        response = session.post(f"{base_url}/predict/batch", json=roster[start:start + batch_size], timeout=120)
+        response.raise_for_status()
+        results.extend(response.json()["results"])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="/predict/batch vs a /predict/json loop")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 500])
+    args = parser.parse_args()
+
+    print("📋 Batch scoring benchmark")
+    print("=" * 60)
+    try:
+        requests.get(f"{args.url}/health", timeout=5).raise_for_status()
+    except Exception as e:
+        print(f"❌ API not reachable at {args.url}: {e}")
+        print("   Please start the API with: python main.py")
+        return 1
+
+    roster = make_roster(args.url, args.records)
+    session = requests.Session()
+
+    start = time.perf_counter()
+    reference = loop_json(session, args.url, roster)
+    loop_rate = len(roster) / (time.perf_counter() - start)
+    print(f"{'/predict/json loop':<28}{loop_rate:>10.0f} records/sec")
+
+    mismatches = 0
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results = batched(session, args.url, roster, batch_size)
+        rate = len(roster) / (time.perf_counter() - start)
+        mismatches += sum(
+            r["status"] != "success" or r["probs"] != ref["probs"] for r, ref in zip(results, reference)
+        )
+        print(f"{f'/predict/batch (size {batch_size})':<28}{rate:>10.0f} records/sec  ({rate / loop_rate:.1f}x)")
+
+    print("=" * 60)
+    if mismatches:
+        print(f"❌ {mismatches} batch results differ from /predict/json")
+        return 1
+    print("✅ Batch results match /predict/json record for record")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Cold Start Benchmark
+Wall time from launching `python main.py` to the first successful /health and
+the first successful /predict/json, averaged over several fresh processes
+
+Each NAME=ENV1=a,ENV2=b argument is one configuration to compare, e.g.
+    python benchmark_cold_start.py --runs 3 default= lazy=NEURO_PRELOAD_MODELS=none \
+        lite=NEURO_MLP_BACKEND=lite,NEURO_TABULAR_ONLY=1
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+import requests
+
+BASE_URL = "http://localhost:9000"
+SAMPLE_PATIENT = None
+
+def parse_config(text):
+    """'name=K1=v1,K2=v2' -> (name, {K1: v1, K2: v2})"""
+    name, _, assignments = text.partition("=")
+    env = {}
+    for assignment in filter(None, assignments.split(",")):
+        key, _, value = assignment.partition("=")
+        env[key] = value
+    return name, env
+
+def poll(fn, deadline, interval=0.02):
+    """Call fn until it returns True -> seconds it took, or None at the deadline"""
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        try:
+            if fn():
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(interval)
+    return None
+
+def cold_start(base_url, env, timeout):
+    """Launch a fresh server -> (seconds to first /health, seconds to first /predict/json)"""
+    launched = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, **env), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = launched + timeout
+        health = poll(lambda: requests.get(f"{base_url}/health", timeout=2).ok, deadline)
+        if health is None:
+            return None, None
+        health = time.perf_counter() - launched
+        predict = poll(
+            lambda: requests.post(f"{base_url}/predict/json", json=SAMPLE_PATIENT, timeout=timeout).json()
+            .get("status") == "success",
+            deadline,
+        )
+        return health, (time.perf_counter() - launched if predict is not None else None)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main():
+    global SAMPLE_PATIENT
+    parser = argparse.ArgumentParser(description="Process launch → first /health and first /predict/json")
+    parser.add_argument("configs", nargs="*", default=["default="], help="name=ENV=value,ENV=value ...")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    # The sample patient is defined in main.py; importing it is cheap now that models load lazily
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from main import SAMPLE_POSITIVE_PATIENT
+    SAMPLE_PATIENT = SAMPLE_POSITIVE_PATIENT
+
+    try:
+        requests.get(f"{args.url}/health", timeout=2)
+        print(f"❌ Something is already serving {args.url} - stop it first")
+        return 1
+    except requests.RequestException:
+        pass
+
+    print("🧊 Cold start benchmark")
+    print("=" * 60)
+    print(f"{'config':<16}{'first /health':>16}{'first /predict/json':>24}")
+    failed = False
+    for text in args.configs:
+        name, env = parse_config(text)
+        healths, predicts = [], []
+        for _ in range(args.runs):
+            health, predict = cold_start(args.url, env, args.timeout)
+            if health is None or predict is None:
+                failed = True
+                break
+            healths.append(health)
+            predicts.append(predict)
+        if len(healths) < args.runs:
+            print(f"{name:<16}{'failed to start or predict':>40}")
+            continue
+        print(f"{name:<16}{sum(healths) / len(healths):>15.2f}s{sum(predicts) / len(predicts):>23.2f}s"
+              f"   (min {min(predicts):.2f}s over {args.runs} runs)")
+    print("=" * 60)
+    if failed:
+        print("❌ Some configurations never served a successful prediction")
+        return 1
+    print("✅ Done")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Ensemble Latency Benchmark
+End-to-end /predict/ensemble latency (handwriting upload + clinical features)
+with the MLP and CNN branches run one after the other (NEURO_ENSEMBLE_CONCURRENT=0)
+and concurrently, at several client concurrency levels. Also reports the mean
+per-branch time from the response's individual_results.
+
+The benchmark starts one server per mode with the prediction caches off, so
+every request runs both models.
+    python benchmark_ensemble.py [--concurrency 1 4 16] [--requests 48]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import subprocess
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from PIL import Image
+
+from check_stream_memory import wait_for_server
+
+BASE_URL = "http://localhost:9000"
+MODES = {"sequential": "0", "concurrent": "1"}
+
+def handwriting_jpeg(seed):
+    """A small phone-scan-like JPEG - every seed is a different upload"""
+    rng = np.random.default_rng(seed)
+    pixels = np.full((900, 1200, 3), 235, dtype=np.uint8)
+    for _ in range(150):
+        y, x = rng.integers(0, 895), rng.integers(0, 1100)
+        pixels[y:y + 4, x:x + rng.integers(20, 100)] = rng.integers(0, 80)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def ensemble_request(base_url, image, features):
+    start = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/predict/ensemble",
+        files={"file": ("scan.jpg", image, "image/jpeg")},
+        data={"features_json": json.dumps(features)},
+        timeout=300,
+    ).json()
+    return time.perf_counter() - start, response
+
+def run_level(base_url, images, features, concurrency, total):
+    """``total`` requests from ``concurrency`` clients -> (latencies, mlp times, cnn times, wall seconds)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(
+            lambda i: ensemble_request(base_url, images[i % len(images)], dict(features, Age=60 + i % 30)),
+            range(total),
+        ))
+    wall = time.perf_counter() - start
+    failed = [response for _, response in results if response.get("status") != "success"]
+    if failed:
+        raise RuntimeError(f"{len(failed)} ensemble requests failed: {failed[0]}")
+    latencies = [latency for latency, _ in results]
+    mlp = [response["individual_results"]["mlp"]["processing_time"] for _, response in results]
+    cnn = [response["individual_results"]["cnn"]["processing_time"] for _, response in results]
+    return latencies, mlp, cnn, wall
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs concurrent ensemble branches")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=48, help="Requests per concurrency level")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from main import SAMPLE_POSITIVE_PATIENT
+
+    images = [handwriting_jpeg(seed) for seed in range(args.requests)]
+    print("🔀 Ensemble branch benchmark (/predict/ensemble, caches off)")
+    print("=" * 84)
+    print(f"{'mode':<12}{'clients':>8}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>8}{'mlp ms':>10}{'cnn ms':>10}"
+          f"{'sum/p50':>10}")
+    for mode, flag in MODES.items():
+        env = dict(os.environ, NEURO_ENSEMBLE_CONCURRENT=flag, NEURO_MLP_CACHE="0", NEURO_CNN_CACHE="0")
+        server = subprocess.Popen(
+            [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            if not wait_for_server(args.url):
+                print(f"❌ API not reachable at {args.url}")
+                return 1
+            # Warm both models and every shape bucket the levels below will hit
+            run_level(args.url, images, SAMPLE_POSITIVE_PATIENT, max(args.concurrency), max(args.concurrency))
+            for concurrency in args.concurrency:
+                latencies, mlp, cnn, wall = run_level(args.url, images, SAMPLE_POSITIVE_PATIENT, concurrency, args.requests)
+                p50 = np.percentile(latencies, 50) * 1000
+                # Branch times added up vs what the request took: ~1x sequential, >1x when they overlap
+                overlap = (np.mean(mlp) + np.mean(cnn)) * 1000 / p50
+                print(f"{mode:<12}{concurrency:>8}{p50:>10.1f}{np.percentile(latencies, 95) * 1000:>10.1f}"
+                      f"{len(latencies) / wall:>8.1f}{np.mean(mlp) * 1000:>10.1f}{np.mean(cnn) * 1000:>10.1f}"
+                      f"{overlap:>10.2f}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    print("=" * 84)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
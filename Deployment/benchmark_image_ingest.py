@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Image Ingestion Benchmark
+Decode + resize time per megapixel for the fused TTA inputs, comparing full
+decoding against reduced-resolution JPEG decoding (Image.draft) and the PIL
+against the OpenCV resize backend. Pixel (and, with --model, CNN probability)
+deviation is measured against the exact full-resolution PIL pipeline.
+
+Usage:
+    python benchmark_image_ingest.py                       # synthetic 1/4/12/24MP handwriting JPEGs
+    python benchmark_image_ingest.py path/to/scans --model # your uploads, plus CNN probability parity
+"""
+
+import os
+import sys
+import time
+import argparse
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from image_ingest import open_upload, decode_rgb, tta_pixels
+
+SIZE = (224, 224)
+# name -> (draft, resize backend); the first one is the exact reference
+CONFIGS = {
+    "full + pil": (False, "pil"),
+    "draft + pil": (True, "pil"),
+    "full + opencv": (False, "opencv"),
+    "draft + opencv": (True, "opencv"),
+}
+# Documented tolerance for averaged class probabilities against the exact pipeline
+DEFAULT_PROB_TOLERANCE = 0.02
+
+def synthetic_upload(megapixels, seed=0):
+    """A phone-photo sized handwriting-like JPEG (4:3) of about ``megapixels``"""
+    rng = np.random.default_rng(seed)
+    width = int(np.sqrt(megapixels * 1e6 * 4 / 3))
+    height = int(width * 3 / 4)
+    pixels = np.full((height, width, 3), 235, dtype=np.uint8)
+    stroke = max(2, height // 300)
+    for _ in range(400):
+        y, x = rng.integers(0, height - stroke), rng.integers(0, width - width // 20)
+        pixels[y:y + stroke, x:x + rng.integers(width // 100, width // 20)] = rng.integers(0, 80)
+    pixels = np.clip(pixels.astype(np.int16) + rng.integers(-12, 12, pixels.shape), 0, 255).astype(np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=92)
+    return buffer.getvalue()
+
+def folder_uploads(folder):
+    for filename in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, filename), "rb") as f:
+            yield filename, f.read()
+
+def ingest(data, draft, backend):
+    """Upload bytes -> uint8 (3, H, W, 3) TTA batch"""
+    rgb = decode_rgb(open_upload(BytesIO(data)), SIZE, draft=draft)
+    return np.stack(tta_pixels(rgb, SIZE, backend))
+
+def median_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Decode + resize time per megapixel and parity")
+    parser.add_argument("folder", nargs="?", help="Folder of uploads (default: synthetic JPEGs)")
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[1, 4, 12, 24])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", action="store_true", help="Also compare CNN probabilities (loads the CNN)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_PROB_TOLERANCE)
+    args = parser.parse_args()
+
+    classify = None
+    if args.model:
+        import main
+
+        main.load_models_if_needed(["cnn"])
+        divisors = np.array([[d] for _, _, d in main.GRADIO_METHODS], dtype=np.float32)
+
+        def classify(images):
+            results = [main.gradio_probs_to_result(row) for row in main.cnn_tta_predictor(images, divisors)]
+            return np.array(main.combine_gradio_results(results)[2])
+
+    if args.folder:
+        uploads = list(folder_uploads(args.folder))
+    else:
+        uploads = [(f"synthetic {mp:g}MP jpeg", synthetic_upload(mp)) for mp in args.megapixels]
+
+    print("🖼️ Image ingestion benchmark (decode + resize to the 3 TTA variants)")
+    print("=" * 78)
+    worst_prob = 0.0
+    for name, data in uploads:
+        with Image.open(BytesIO(data)) as img:
+            megapixels = img.size[0] * img.size[1] / 1e6
+            print(f"{name}: {img.size[0]}x{img.size[1]} {img.format} ({megapixels:.1f}MP, {len(data) / 1e6:.1f}MB)")
+        reference = ingest(data, *CONFIGS["full + pil"])
+        reference_probs = classify(reference) if classify else None
+        baseline_ms = None
+        for config, (draft, backend) in CONFIGS.items():
+            ms = median_ms(lambda: ingest(data, draft, backend), args.repeat)
+            baseline_ms = baseline_ms or ms
+            images = ingest(data, draft, backend)
+            delta = np.abs(images.astype(np.int16) - reference.astype(np.int16))
+            line = (f"   {config:<16}{ms:>9.1f}ms {ms / megapixels:>8.1f}ms/MP {baseline_ms / ms:>6.1f}x"
+                    f"   max|Δpixel| {int(delta.max()):>3}  mean {delta.mean():.2f}")
+            if classify:
+                prob_delta = float(np.max(np.abs(classify(images) - reference_probs)))
+                worst_prob = max(worst_prob, prob_delta)
+                line += f"  max|Δprob| {prob_delta:.1e}"
+            print(line)
+
+    print("=" * 78)
+    if classify:
+        if worst_prob > args.tolerance:
+            print(f"❌ Worst probability deviation {worst_prob:.2e} exceeds the tolerance {args.tolerance:.0e}")
+            return 1
+        print(f"✅ Worst probability deviation {worst_prob:.2e} (tolerance {args.tolerance:.0e})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Inference Path Micro-Benchmark
+Compares Keras model.predict against the pre-traced direct-call path
+for the input shapes the API actually serves
+
+Usage:
+    python benchmark_inference.py --iterations 200
+"""
+
+import sys
+import time
+import argparse
+
+import numpy as np
+
+import main
+from inference import make_predictor
+from backends import build_tta_model
+
+def time_calls(fn, args, iterations, warmup=5):
+    for _ in range(warmup):
+        fn(*args)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="model.predict vs direct tf.function call latency")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--cnn-iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    print("⚡ Inference Path Benchmark")
+    print("=" * 78)
+    if main.CNN_BACKEND != "keras" or main.MLP_BACKEND != "keras":
+        print("❌ Both models must use the keras backend (unset NEURO_CNN_BACKEND / NEURO_MLP_BACKEND)")
+        return 1
+    main.load_models_if_needed()
+
+    rng = np.random.default_rng(0)
+    cases = [
+        ("MLP 1x36", main.mlp_model,
+         (rng.random((1, len(main.FEATURE_ORDER)), dtype=np.float32),), args.iterations),
+        ("MLP 32x36", main.mlp_model,
+         (rng.random((32, len(main.FEATURE_ORDER)), dtype=np.float32),), args.iterations),
+        ("CNN 1x224x224x3", main.cnn_model,
+         (rng.random((1, 224, 224, 3), dtype=np.float32),), args.cnn_iterations),
+        ("CNN fused TTA 3x224x224x3 uint8", build_tta_model(main.cnn_model),
+         (rng.integers(0, 256, (3, 224, 224, 3), dtype=np.uint8),
+          np.array([[255.0], [255.0], [1.0]], dtype=np.float32)), args.cnn_iterations),
+    ]
+
+    print(f"{'Case':<34}{'keras p50':>11}{'direct p50':>12}{'keras p95':>11}{'direct p95':>12}{'speedup':>9}")
+    print("-" * 78)
+    for label, model, inputs, iterations in cases:
+        keras_path = make_predictor(model, "keras")
+        direct_path = make_predictor(model, "direct")
+
+        # Same math, different call overhead
+        np.testing.assert_allclose(keras_path(*inputs), direct_path(*inputs), rtol=1e-4, atol=1e-5)
+
+        keras_ms = time_calls(keras_path, inputs, iterations)
+        direct_ms = time_calls(direct_path, inputs, iterations)
+        speedup = np.median(keras_ms) / np.median(direct_ms)
+        print(f"{label:<34}{np.median(keras_ms):>9.2f}ms{np.median(direct_ms):>10.2f}ms"
+              f"{np.percentile(keras_ms, 95):>9.2f}ms{np.percentile(direct_ms, 95):>10.2f}ms{speedup:>8.1f}x")
+
+    print("=" * 78)
+    print("✅ Outputs match; the API uses the direct path unless NEURO_INFERENCE_PATH=keras")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Handwriting Tier Benchmark
+Compares the two handwriting tiers served with the ``tier`` form field: "accurate"
+(convnext_handwriting_best.keras) and "fast" (the student from distill_cnn.py).
+Reports fused-TTA latency per image, peak resident memory of a fresh process that
+serves the tier, model size, agreement of the fast tier's predictions with the
+accurate tier (the teacher), and accuracy when the folder is labelled.
+
+The folder may hold one subfolder per class ("0"/"1" or "Non-Dementia"/"Dementia").
+    python benchmark_tiers.py samples/heldout [--iterations 20]
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+import main
+from backends import load_cnn
+from quantize_cnn import labelled_images, fused_tta_probs, median_ms, peak_rss_mb
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Latency, memory and agreement of the fast and accurate tiers")
+    parser.add_argument("folder", help="Held-out handwriting images, optionally in class subfolders")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed fused-TTA passes per tier")
+    args = parser.parse_args()
+
+    samples = labelled_images(args.folder)
+    if not samples:
+        print(f"❌ No images in {args.folder}")
+        return 1
+    if not os.path.exists(main.CNN_FAST_PATH):
+        print(f"❌ {main.CNN_FAST_PATH} not found - train it with python distill_cnn.py <images>")
+        return 1
+    tiers = {
+        "accurate": (main.CNN_BACKEND, main.CNN_MODEL_PATHS[main.CNN_BACKEND]),
+        "fast": (main.CNN_FAST_BACKEND, main.CNN_FAST_PATH),
+    }
+    labels = np.array([label if label is not None else -1 for _, label in samples])
+    labelled = bool(np.all(labels >= 0))
+    images, divisors = main.build_tta_batch(Image.open(samples[0][0]))
+
+    print(f"⚖️ Handwriting tiers: {len(samples)} images")
+    print("=" * 92)
+    print(f"{'tier':<10}{'backend':<9}{'params':>12}{'file MB':>9}{'TTA ms':>9}{'peak RSS MB':>13}"
+          f"{'agree':>8}{'mean|ΔP|':>10}{'accuracy':>10}")
+    probs = {}
+    for tier, (backend, path) in tiers.items():
+        model, _, tta_predictor = load_cnn(backend, path, main.INFERENCE_PATH)
+        probs[tier] = np.array([fused_tta_probs(tta_predictor, image_path) for image_path, _ in samples])
+        latency = median_ms(tta_predictor, (images, divisors), args.iterations)
+        params = f"{model.count_params():,}" if model is not None else "-"
+        line = (f"{tier:<10}{backend:<9}{params:>12}{os.path.getsize(path) / 1e6:>9.1f}{latency:>9.1f}"
+                f"{peak_rss_mb(backend, path):>13.0f}")
+        pred = probs[tier].argmax(axis=1)
+        agreement = np.mean(pred == probs["accurate"].argmax(axis=1))
+        delta = np.mean(np.abs(probs[tier][:, 1] - probs["accurate"][:, 1]))
+        line += f"{agreement:>8.1%}{delta:>10.3f}"
+        line += f"{np.mean(pred == labels):>10.1%}" if labelled else f"{'-':>10}"
+        print(line)
+
+    print("=" * 92)
+    print("TTA ms = median fused-TTA forward pass (3 variants, one image); peak RSS = fresh process that loads "
+          "the tier and runs one TTA batch; agree / mean|ΔP| = predictions and P(Dementia) vs the accurate tier")
+    print("Per request: tier=fast or tier=accurate on /predict/file and /predict/ensemble "
+          f"(default NEURO_DEFAULT_TIER={main.DEFAULT_TIER})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
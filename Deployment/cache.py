@@ -0,0 +1,222 @@
+"""
+In-process prediction caches.
+
+Retries, page reloads and the sample-data demos resubmit identical feature
+sets. PredictionCache keeps recent MLP results keyed by a hash of the 36
+ordered feature values. It has bounded size with LRU eviction and an optional
+TTL. It is cleared automatically when its version changes, where the version
+covers the model/preprocessor file signatures and the loaded model objects.
+
+Handwriting results use the same memory tier behind content-addressed keys
+(a hash of the uploaded bytes, optionally of the decoded pixels), plus an
+optional DiskResultCache tier that survives restarts.
+
+Lookups come from the event loop and from inference threads, so every
+operation takes a lock.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def feature_key(features_dict, feature_order):
+    """Canonical key: the ordered feature values as float64 (missing -> 0.0, -0.0 -> 0.0)"""
+    values = np.array([float(features_dict.get(name, 0.0)) for name in feature_order], dtype=np.float64)
+    return hashlib.blake2b((values + 0.0).tobytes(), digest_size=16).digest()
+
+
+def file_signature(path):
+    """(path, mtime_ns, size) - changes whenever the file is replaced or rewritten"""
+    try:
+        stat = os.stat(path)
+        return path, stat.st_mtime_ns, stat.st_size
+    except OSError:
+        return path, None, None
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with optional TTL and version-based invalidation"""
+
+    def __init__(self, max_entries=4096, ttl_seconds=0.0, version_fn=None, check_interval_s=1.0, name="cache"):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+        self.check_interval_s = check_interval_s
+        self.name = name
+
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._lock = threading.Lock()
+        self._version = None
+        self._next_check = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, now):
+        # Caller holds the lock; stat()s the model files at most once per check interval
+        if self.version_fn is None or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval_s
+        version = self.version_fn()
+        if version != self._version:
+            if self._entries:
+                logger.info(f"🧹 {self.name}: models changed, dropping {len(self._entries)} cached predictions")
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key):
+        """Cached value or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(now)
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def content_key(data, prefix="sha256"):
+    """Content address of raw bytes, e.g. an uploaded image"""
+    return f"{prefix}:{hashlib.sha256(data).hexdigest()}"
+
+
+class DiskResultCache:
+    """One small JSON file per key under ``directory`` - survives restarts.
+
+    Each entry records the version string it was computed under
+    (``version_fn()``: model file signature, backend, ...); entries from
+    another version are misses.
+    """
+
+    def __init__(self, directory, version_fn):
+        self.directory = directory
+        self.version_fn = version_fn
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+            hit = entry.get("version") == self.version_fn() and entry.get("key") == key
+        except FileNotFoundError:
+            entry, hit = None, False
+        except (OSError, ValueError):
+            entry, hit = None, False
+            with self._lock:
+                self.errors += 1
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry["value"] if hit else None
+
+    def put(self, key, value):
+        # Write to a temp file and rename, so readers never see a partial entry
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"key": key, "version": self.version_fn(), "value": value}, f)
+            os.replace(tmp_path, self._path(key))
+            with self._lock:
+                self.writes += 1
+        except OSError as e:
+            logger.warning(f"⚠️ Disk cache write failed: {e}")
+            with self._lock:
+                self.errors += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "errors": self.errors,
+            }
+
+
+class TieredCache:
+    """Memory PredictionCache in front of an optional DiskResultCache"""
+
+    def __init__(self, memory, disk=None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.memory.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, value)
+
+    def stats(self):
+        stats = self.memory.stats()
+        stats["disk"] = self.disk.stats() if self.disk is not None else None
+        return stats
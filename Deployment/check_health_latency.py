@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Health Latency Under Load Checker
+Shows /health stays responsive while handwriting (CNN) requests saturate the API
+
+The checker starts its own server with the prediction caches off, so every
+load request runs the CNN (with the cache on, every upload after the first
+would be a hit):
+    python check_health_latency.py --concurrency 16 --duration 20
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+from io import BytesIO
+
+import numpy as np
+import requests
+from PIL import Image
+
+from check_stream_memory import wait_for_server
+
+BASE_URL = "http://localhost:9000"
+
+def make_handwriting_jpeg(width=1600, height=1200):
+    """A phone-photo sized handwriting-like JPEG"""
+    rng = np.random.default_rng(7)
+    pixels = np.full((height, width, 3), 230, dtype=np.uint8)
+    for _ in range(200):
+        y, x = rng.integers(0, height - 6), rng.integers(0, width - 80)
+        pixels[y:y + 4, x:x + rng.integers(20, 80)] = rng.integers(0, 60)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else float("nan")
+
+def probe_health(base_url, duration, interval=0.05):
+    """Poll /health and return the latencies in milliseconds"""
+    latencies = []
+    session = requests.Session()
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        start = time.perf_counter()
+        response = session.get(f"{base_url}/health", timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            print(f"❌ /health returned {response.status_code}")
+        time.sleep(interval)
+    return latencies
+
+def cnn_load_worker(base_url, image_bytes, stop_event, counters, lock):
+    session = requests.Session()
+    while not stop_event.is_set():
+        try:
+            response = session.post(
+                f"{base_url}/predict/file",
+                files={"file": ("handwriting.jpg", image_bytes, "image/jpeg")},
+                timeout=120,
+            )
+            key = "ok" if response.status_code == 200 else "failed"
+        except Exception:
+            key = "failed"
+        with lock:
+            counters[key] += 1
+
+def summarize(label, latencies):
+    print(f"   {label}: n={len(latencies)} p50={percentile(latencies, 50):.1f}ms "
+          f"p95={percentile(latencies, 95):.1f}ms max={max(latencies):.1f}ms")
+
+def check(args):
+    """Phase 1 idle, phase 2 under CNN load -> exit code"""
+    if not wait_for_server(args.url):
+        print(f"❌ API not reachable at {args.url}")
+        return 1
+
+    print(f"⏱️  Phase 1: idle server ({args.duration:.0f}s)")
+    idle = probe_health(args.url, args.duration)
+    summarize("idle", idle)
+
+    print(f"🔥 Phase 2: {args.concurrency} clients hammering /predict/file ({args.duration:.0f}s)")
+    image_bytes = make_handwriting_jpeg()
+    stop_event = threading.Event()
+    counters = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    workers = [
+        threading.Thread(target=cnn_load_worker, args=(args.url, image_bytes, stop_event, counters, lock), daemon=True)
+        for _ in range(args.concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    time.sleep(2.0)  # let the inference pool fill up
+    loaded = probe_health(args.url, args.duration)
+    stop_event.set()
+    for worker in workers:
+        worker.join(timeout=120)
+
+    summarize("loaded", loaded)
+    print(f"   CNN requests completed: {counters['ok']} ok, {counters['failed']} failed")
+
+    print("=" * 50)
+    loaded_p95 = percentile(loaded, 95)
+    if counters["ok"] == 0:
+        print("❌ No CNN request completed - the server was not actually loaded")
+        return 1
+    if loaded_p95 > args.max_p95_ms:
+        print(f"❌ /health p95 {loaded_p95:.1f}ms under load exceeds {args.max_p95_ms:.0f}ms - event loop is blocked")
+        return 1
+    print(f"✅ /health stayed flat: p95 {percentile(idle, 95):.1f}ms idle vs {loaded_p95:.1f}ms under load")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="/health latency while CNN requests saturate the server")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent /predict/file clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--max-p95-ms", type=float, default=100.0,
+                        help="Fail if /health p95 under load exceeds this")
+    args = parser.parse_args()
+
+    print("🩺 /health latency under CNN load (caches off)")
+    print("=" * 50)
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, NEURO_CNN_CACHE="0", NEURO_MLP_CACHE="0"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        return check(args)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Malformed Features Checker
+Sends malformed clinical features (non-numeric and null values, a JSON array
+instead of an object) to /predict/ensemble and checks that each still gets a
+200 through the preprocessing fallback, with the tabular prediction cache on
+(the default) - a malformed request must never fail in the cache key.
+
+The checker starts its own server:
+    python check_malformed_features.py
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+import requests
+
+from check_stream_memory import wait_for_server
+
+BASE_URL = "http://localhost:9000"
+
+MALFORMED_FEATURES = {
+    "non-numeric value": '{"Age": "abc"}',
+    "null value": '{"Age": null}',
+    "array instead of object": "[1, 2]",
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Malformed features_json still gets the fallback prediction")
+    parser.add_argument("--url", default=BASE_URL)
+    args = parser.parse_args()
+
+    print("🧪 Malformed features check (/predict/ensemble, caches on)")
+    print("=" * 60)
+    server = subprocess.Popen(
+        [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, NEURO_MLP_CACHE="1"),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        if not wait_for_server(args.url):
+            print(f"❌ API not reachable at {args.url}")
+            return 1
+        failed = 0
+        for name, features_json in MALFORMED_FEATURES.items():
+            # Twice: the second request would be served from the cache if the first had been cached
+            for attempt in (1, 2):
+                response = requests.post(f"{args.url}/predict/ensemble", data={"features_json": features_json},
+                                         timeout=60)
+                body = response.json()
+                ok = response.status_code == 200 and body.get("status") == "success"
+                failed += not ok
+                detail = body.get("ensemble_method") if ok else body.get("message", body)
+                print(f"{'✅' if ok else '❌'} {name} #{attempt}: HTTP {response.status_code} ({detail})")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print("=" * 60)
+    if failed:
+        print(f"❌ {failed} malformed requests did not get the fallback prediction")
+        return 1
+    print("✅ Every malformed request got a 200 through the fallback")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
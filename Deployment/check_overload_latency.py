@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Overload Latency Checker
+Open-loop load test of /predict/ensemble (handwriting scan + clinical features)
+at a multiple of the server's measured full-quality capacity, once with the
+load-aware quality controller off and once with it on (NEURO_QUALITY_CONTROL).
+Latency is measured from each request's scheduled send time, so client-side
+queueing under overload counts too. Reports p50/p95/p99, throughput and the
+quality modes the responses used, and fails if p99 with the controller
+exceeds --max-p99-ms.
+
+The checker starts its own servers with the prediction caches off, so every
+request does real work.
+    python check_overload_latency.py [--overload 3] [--duration 30] [--slo-ms 500]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import threading
+import subprocess
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from check_stream_memory import wait_for_server
+from benchmark_ensemble import handwriting_jpeg
+
+BASE_URL = "http://localhost:9000"
+
+def ensemble_request(base_url, image, features):
+    response = requests.post(
+        f"{base_url}/predict/ensemble",
+        files={"file": ("scan.jpg", image, "image/jpeg")},
+        data={"features_json": json.dumps(features)},
+        timeout=600,
+    ).json()
+    if response.get("status") != "success":
+        raise RuntimeError(f"Ensemble request failed: {response}")
+    return response
+
+def service_time(base_url, images, features, requests_count=20):
+    """Mean seconds per request with one client - 1 / full-quality capacity"""
+    for image in images[:3]:
+        ensemble_request(base_url, image, features)
+    start = time.perf_counter()
+    for i in range(requests_count):
+        ensemble_request(base_url, images[i % len(images)], dict(features, Age=60 + i % 30))
+    return (time.perf_counter() - start) / requests_count
+
+def open_loop(base_url, images, features, rate, duration, clients):
+    """Send ``rate`` requests/s for ``duration`` s -> (latencies from scheduled send, modes, errors, wall seconds)"""
+    latencies, modes, errors = [], Counter(), []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def fire(i, scheduled):
+        try:
+            response = ensemble_request(base_url, images[i % len(images)], dict(features, Age=60 + i % 30))
+            with lock:
+                latencies.append(time.perf_counter() - scheduled)
+                modes[response.get("quality_mode", "n/a")] += 1
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+
+    with ThreadPoolExecutor(clients) as pool:
+        for i in range(int(rate * duration)):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, i, scheduled)
+    return latencies, modes, errors, time.perf_counter() - start
+
+def start_server(env):
+    return subprocess.Popen(
+        [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=dict(os.environ, NEURO_MLP_CACHE="0", NEURO_CNN_CACHE="0", **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="p99 of /predict/ensemble under overload, quality control off vs on")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--overload", type=float, default=3.0, help="Offered load as a multiple of measured capacity")
+    parser.add_argument("--rate", type=float, help="Offered load in requests/s (overrides --overload)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--clients", type=int, default=128, help="Most requests open at once")
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="NEURO_SLO_P95_MS of the controlled server")
+    parser.add_argument("--max-in-flight", type=int, default=8, help="NEURO_QUALITY_MAX_IN_FLIGHT of the controlled server")
+    parser.add_argument("--max-p99-ms", type=float, help="Fail above this p99 with the controller (default 4x the SLO)")
+    args = parser.parse_args()
+    max_p99_ms = args.max_p99_ms or 4 * args.slo_ms
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from main import SAMPLE_POSITIVE_PATIENT
+
+    images = [handwriting_jpeg(seed) for seed in range(64)]
+    print("🎚️ Overload latency check (/predict/ensemble, caches off)")
+    print("=" * 80)
+    configs = {
+        "controller off": {"NEURO_QUALITY_CONTROL": "0"},
+        "controller on": {"NEURO_QUALITY_CONTROL": "1", "NEURO_SLO_P95_MS": str(args.slo_ms),
+                          "NEURO_QUALITY_MAX_IN_FLIGHT": str(args.max_in_flight)},
+    }
+    rate, results = args.rate, {}
+    for name, env in configs.items():
+        server = start_server(env)
+        try:
+            if not wait_for_server(args.url):
+                print(f"❌ API not reachable at {args.url}")
+                return 1
+            seconds = service_time(args.url, images, SAMPLE_POSITIVE_PATIENT)
+            if rate is None:
+                rate = args.overload / seconds
+                print(f"   full-quality service time {seconds * 1000:.1f}ms → capacity {1 / seconds:.1f} req/s, "
+                      f"offering {rate:.1f} req/s for {args.duration:.0f}s")
+            latencies, modes, errors, wall = open_loop(
+                args.url, images, SAMPLE_POSITIVE_PATIENT, rate, args.duration, args.clients)
+            quality = requests.get(f"{args.url}/metrics", timeout=10).json()["quality"]
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        if not latencies:
+            print(f"❌ {name}: every request failed ({errors[:1]})")
+            return 1
+        p50, p95, p99 = (np.percentile(latencies, q) * 1000 for q in (50, 95, 99))
+        results[name] = p99
+        mix = ", ".join(f"{mode} {count / sum(modes.values()):.0%}" for mode, count in modes.most_common())
+        print(f"{name:<16} p50 {p50:>8.0f}ms  p95 {p95:>8.0f}ms  p99 {p99:>8.0f}ms  "
+              f"{len(latencies) / wall:>6.1f} req/s  errors {len(errors)}")
+        print(f"{'':<16} modes: {mix}; {quality['mode_changes']} mode changes")
+
+    print("=" * 80)
+    p99 = results["controller on"]
+    if p99 > max_p99_ms:
+        print(f"❌ p99 with the controller is {p99:.0f}ms (limit {max_p99_ms:.0f}ms)")
+        return 1
+    print(f"✅ p99 bounded at {p99:.0f}ms with the controller (limit {max_p99_ms:.0f}ms), "
+          f"{results['controller off']:.0f}ms without")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
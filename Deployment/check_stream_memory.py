@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Streaming Bulk Scoring Memory Checker
+Feeds a generated multi-million-row NDJSON (or CSV) stream through /predict/stream
+and asserts the server's peak RSS stays bounded, i.e. neither the request nor
+the result set is ever held in memory
+
+By default the checker starts its own server (python main.py) so it can read
+the server's peak RSS (VmHWM) from /proc. Linux only.
+    python check_stream_memory.py --rows 2000000 [--format csv] [--max-growth-mb 64]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlparse
+
+import requests
+
+BASE_URL = "http://localhost:9000"
+
+def peak_rss_mb(pid):
+    """Peak resident set size (VmHWM) of a process in MB"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not available")
+
+def generated_rows(base_url, rows, fmt, variants=1000):
+    """Yield the body in ~1MB pieces without ever materializing it"""
+    samples = requests.get(f"{base_url}/sample-data/all", timeout=10).json()["samples"]
+    templates = [sample["features"] for sample in samples.values()]
+    columns = list(templates[0])
+    lines = []
+    for i in range(variants):
+        record = dict(templates[i % len(templates)], Age=60 + i % 30)
+        if fmt == "csv":
+            lines.append(",".join(str(record[c]) for c in columns) + "\n")
+        else:
+            lines.append(json.dumps(record) + "\n")
+
+    if fmt == "csv":
+        yield (",".join(columns) + "\n").encode()
+    sent = 0
+    while sent < rows:
+        count = min(rows - sent, variants)
+        yield "".join(lines[:count]).encode()
+        sent += count
+
+def stream_rows(base_url, rows, fmt):
+    """POST a chunked body while reading the NDJSON response concurrently -> (result lines, summary)"""
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=600)
+    conn.putrequest("POST", f"/predict/stream?format={fmt}")
+    conn.putheader("Content-Type", "text/csv" if fmt == "csv" else "application/x-ndjson")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.endheaders()
+
+    def send_body():
+        try:
+            for piece in generated_rows(base_url, rows, fmt):
+                conn.send(f"{len(piece):X}\r\n".encode() + piece + b"\r\n")
+            conn.send(b"0\r\n\r\n")
+        except OSError as e:
+            print(f"❌ Upload stopped: {e}")
+
+    # The server answers while it is still reading, so upload and download must overlap
+    sender = threading.Thread(target=send_body, daemon=True)
+    sender.start()
+    response = conn.getresponse()
+    results, summary = 0, None
+    for line in response:
+        message = json.loads(line)
+        if "index" in message:
+            results += 1
+        else:
+            summary = message
+    sender.join()
+    conn.close()
+    return results, summary
+
+def wait_for_server(base_url, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/health", timeout=2).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak server RSS while streaming millions of rows")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--pid", type=int, help="PID of an already running server (default: start one)")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--warmup-rows", type=int, default=20_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--max-growth-mb", type=float, default=64.0,
+                        help="Fail if peak RSS grows more than this between the warmup and the full stream")
+    args = parser.parse_args()
+
+    print("🌊 Streaming bulk scoring memory check")
+    print("=" * 60)
+    server = None
+    pid = args.pid
+    if pid is None:
+        env = dict(os.environ, NEURO_TABULAR_ONLY=os.getenv("NEURO_TABULAR_ONLY", "1"))
+        server = subprocess.Popen(
+            [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        pid = server.pid
+    try:
+        if not wait_for_server(args.url):
+            print(f"❌ API not reachable at {args.url}")
+            return 1
+        requests.post(f"{args.url}/predict/json", json=requests.get(
+            f"{args.url}/sample-data/positive", timeout=10).json()["features"], timeout=60)
+
+        results, _ = stream_rows(args.url, args.warmup_rows, args.format)
+        baseline = peak_rss_mb(pid)
+        print(f"   warmup: {results:,} rows, peak RSS {baseline:.0f}MB")
+
+        start = time.perf_counter()
+        results, summary = stream_rows(args.url, args.rows, args.format)
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_mb(pid)
+        print(f"   full:   {results:,} rows in {elapsed:.0f}s ({results / elapsed:,.0f} rows/sec), peak RSS {peak:.0f}MB")
+        print(f"   summary line: {summary}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print("=" * 60)
+    if results != args.rows or not summary or summary.get("rows") != args.rows:
+        print(f"❌ Expected {args.rows:,} results, got {results:,}")
+        return 1
+    if peak - baseline > args.max_growth_mb:
+        print(f"❌ Peak RSS grew {peak - baseline:.0f}MB (limit {args.max_growth_mb:.0f}MB) - the stream is being buffered")
+        return 1
+    print(f"✅ Memory stayed flat: +{peak - baseline:.0f}MB peak RSS for {args.rows:,} rows")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
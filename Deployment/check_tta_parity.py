@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+TTA Parity Checker
+Verifies the fused single-pass handwriting TTA matches the original
+three sequential Gradio methods on fully decoded images, and that JPEG
+uploads decoded at reduced resolution (NEURO_IMAGE_DRAFT, through
+main.load_image_input) stay within the documented 0.02 probability
+tolerance of that full-resolution reference
+
+Usage:
+    python check_tta_parity.py                   # synthetic images
+    python check_tta_parity.py path/to/images    # your handwriting scans
+"""
+
+import os
+import sys
+import argparse
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+import main
+
+# Averaged class probabilities may differ by at most this much
+DEFAULT_TOLERANCE = 5e-3
+# ... and with draft (reduced-resolution) JPEG decoding, as in benchmark_image_ingest.py
+DEFAULT_DRAFT_TOLERANCE = 0.02
+
+def synthetic_images():
+    """Handwriting-like test images in the formats uploads arrive in"""
+    rng = np.random.default_rng(42)
+    cases = [
+        ("rgb_jpeg_small", (180, 240), "RGB", "JPEG"),
+        ("rgb_jpeg_phone", (3024, 4032), "RGB", "JPEG"),
+        ("rgba_png", (500, 700), "RGBA", "PNG"),
+        ("grayscale_png", (800, 600), "L", "PNG"),
+        ("palette_png", (400, 400), "P", "PNG"),
+    ]
+    for name, (h, w), mode, fmt in cases:
+        # White paper with dark strokes
+        pixels = np.full((h, w, 3), 235, dtype=np.uint8)
+        for _ in range(40):
+            y, x = rng.integers(0, h - 10), rng.integers(0, w - 60)
+            pixels[y:y + max(2, h // 200), x:x + rng.integers(10, 60)] = rng.integers(0, 80)
+        pixels = np.clip(pixels.astype(np.int16) + rng.integers(-12, 12, pixels.shape), 0, 255).astype(np.uint8)
+
+        img = Image.fromarray(pixels, "RGB")
+        img = img.quantize(64) if mode == "P" else img.convert(mode)
+        buffer = BytesIO()
+        img.save(buffer, fmt)
+        yield name, buffer.getvalue()
+
+def folder_images(folder):
+    for filename in sorted(os.listdir(folder)):
+        path = os.path.join(folder, filename)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            Image.open(BytesIO(data)).verify()
+            yield filename, data
+        except Exception:
+            print(f"⏭️  Skipping {filename} (not an image)")
+
+def sequential_probs(img):
+    results = [
+        main.predict_gradio_method1(img),
+        main.predict_gradio_method2(img),
+        main.predict_gradio_method3(img),
+    ]
+    return np.array(main.combine_gradio_results(results)[2])
+
+def fused_probs(img):
+    return np.array(main.combine_gradio_results(main.predict_gradio_fused(img))[2])
+
+def max_pixel_delta(img):
+    """Largest per-pixel difference between the fused and sequential inputs"""
+    fused, _ = main.build_tta_batch(img)
+    sequential, _ = main.build_tta_batch_sequential(img)
+    return int(np.max(np.abs(fused.astype(np.int16) - sequential.astype(np.int16))))
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Fused vs sequential TTA parity check")
+    parser.add_argument("folder", nargs="?", help="Folder of handwriting images (default: synthetic images)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--draft-tolerance", type=float, default=DEFAULT_DRAFT_TOLERANCE)
+    args = parser.parse_args()
+
+    print("🧪 Fused TTA Parity Check")
+    print("=" * 50)
+    main.load_models_if_needed()
+
+    images = folder_images(args.folder) if args.folder else synthetic_images()
+    worst = worst_draft = 0.0
+    checked = failed = 0
+    for name, data in images:
+        img = Image.open(BytesIO(data))
+        img.load()
+        expected = sequential_probs(img)
+        actual = fused_probs(img)
+        delta = float(np.max(np.abs(expected - actual)))
+        worst = max(worst, delta)
+        checked += 1
+        ok = delta <= args.tolerance
+        line = (f"{name}: mode={img.mode} size={img.size} "
+                f"max|Δprob|={delta:.2e} max|Δpixel|={max_pixel_delta(img)} "
+                f"sequential={np.round(expected, 4).tolist()} fused={np.round(actual, 4).tolist()}")
+        if img.format == "JPEG":
+            # The serving path: raw upload bytes, drafted while decoding
+            drafted = main.load_image_input(BytesIO(data), draft=True)
+            draft_delta = float(np.max(np.abs(expected - fused_probs(drafted))))
+            worst_draft = max(worst_draft, draft_delta)
+            ok = ok and draft_delta <= args.draft_tolerance
+            line += f" draft={drafted.size} max|Δprob|={draft_delta:.2e}"
+        failed += not ok
+        print(f"{'✅' if ok else '❌'} {line}")
+
+    print("=" * 50)
+    if checked == 0:
+        print("❌ No images checked")
+        return 1
+    if failed:
+        print(f"❌ Parity FAILED on {failed}/{checked} images - worst deviation {worst:.2e} "
+              f"(tolerance {args.tolerance:.0e}), with draft decoding {worst_draft:.2e} "
+              f"(tolerance {args.draft_tolerance:.0e})")
+        return 1
+    print(f"✅ Parity OK on {checked} images - worst deviation {worst:.2e} (tolerance {args.tolerance:.0e}), "
+          f"with draft decoding {worst_draft:.2e} (tolerance {args.draft_tolerance:.0e})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Upload Memory Checker
+Fires many concurrent large handwriting uploads at /predict/file and reports
+the server's peak RSS growth (VmHWM) per in-flight upload, next to the upload
+buffer stats from /metrics. Also checks both 413 paths: an oversize
+Content-Length (rejected before the body is read) and an oversize chunked body
+(rejected once the limit is crossed), both sent with a browser Origin header: the
+413 must carry Access-Control-Allow-Origin, or the frontend sees a CORS failure
+instead of "file too large".
+
+By default the checker starts its own server (python main.py) with
+NEURO_UPLOAD_MAX_BYTES / NEURO_UPLOAD_BUFFERS from the flags. Linux only.
+    python check_upload_memory.py --size-mb 8 --concurrency 16 [--buffers 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import http.client
+from io import BytesIO
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from PIL import Image
+
+from check_stream_memory import peak_rss_mb, wait_for_server
+
+BASE_URL = "http://localhost:9000"
+FRONTEND_ORIGIN = "http://localhost:3000"
+
+def noise_png(size_mb, seed=0):
+    """A PNG of about ``size_mb`` that does not compress - the worst case for upload memory"""
+    side = int(np.sqrt(size_mb * 1e6 / 3))
+    pixels = np.random.default_rng(seed).integers(0, 256, (side, side, 3), dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+def upload(base_url, data, name="scan.png"):
+    response = requests.post(f"{base_url}/predict/file", files={"file": (name, data, "image/png")}, timeout=600)
+    return response.status_code
+
+def post_chunked(base_url, total_bytes, piece_bytes=256 * 1024):
+    """Multipart upload of ``total_bytes`` without a Content-Length -> (status code, Access-Control-Allow-Origin)"""
+    url = urlparse(base_url)
+    boundary = "neurotraceboundary"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\n").encode()
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+    conn.putrequest("POST", "/predict/file")
+    conn.putheader("Content-Type", f"multipart/form-data; boundary={boundary}")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.putheader("Origin", FRONTEND_ORIGIN)
+    conn.endheaders()
+    try:
+        pieces = [head] + [b"\0" * piece_bytes] * (total_bytes // piece_bytes) + [f"\r\n--{boundary}--\r\n".encode()]
+        for piece in pieces:
+            conn.send(f"{len(piece):X}\r\n".encode() + piece + b"\r\n")
+        conn.send(b"0\r\n\r\n")
+    except OSError:
+        pass  # The server may close the connection as soon as it has answered 413
+    response = conn.getresponse()
+    conn.close()
+    return response.status, response.getheader("Access-Control-Allow-Origin")
+
+def post_declared(base_url, declared_bytes):
+    """Headers only, with an oversize Content-Length -> (status code, seconds to the answer, Access-Control-Allow-Origin)"""
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+    start = time.perf_counter()
+    conn.putrequest("POST", "/predict/file")
+    conn.putheader("Content-Type", "multipart/form-data; boundary=x")
+    conn.putheader("Content-Length", str(declared_bytes))
+    conn.putheader("Origin", FRONTEND_ORIGIN)
+    conn.endheaders()
+    response = conn.getresponse()
+    conn.close()
+    return response.status, time.perf_counter() - start, response.getheader("Access-Control-Allow-Origin")
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak server RSS per in-flight upload, and the 413 paths")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--pid", type=int, help="PID of an already running server (default: start one)")
+    parser.add_argument("--size-mb", type=float, default=8.0, help="Size of each upload")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--max-upload-mb", type=float, default=20.0, help="NEURO_UPLOAD_MAX_BYTES of the started server")
+    parser.add_argument("--buffers", type=int, default=8, help="NEURO_UPLOAD_BUFFERS of the started server")
+    args = parser.parse_args()
+
+    print("📤 Upload memory check")
+    print("=" * 60)
+    max_bytes = int(args.max_upload_mb * 1024 * 1024)
+    server = None
+    pid = args.pid
+    if pid is None:
+        env = dict(os.environ, NEURO_UPLOAD_MAX_BYTES=str(max_bytes), NEURO_UPLOAD_BUFFERS=str(args.buffers))
+        server = subprocess.Popen(
+            [sys.executable, "main.py"], cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        pid = server.pid
+    failures = []
+    try:
+        if not wait_for_server(args.url):
+            print(f"❌ API not reachable at {args.url}")
+            return 1
+        images = [noise_png(args.size_mb, seed) for seed in range(args.concurrency)]
+        size_mb = len(images[0]) / 1e6
+
+        # Warm the CNN, the decoder and one upload buffer so the baseline includes them
+        if upload(args.url, images[0], "warmup.png") != 200:
+            failures.append("warmup upload failed")
+        baseline = peak_rss_mb(pid)
+        print(f"   warmup: peak RSS {baseline:.0f}MB, upload size {size_mb:.1f}MB")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            statuses = list(pool.map(lambda i: upload(args.url, images[i % len(images)], f"scan{i}.png"),
+                                     range(args.uploads)))
+        elapsed = time.perf_counter() - start
+        peak = peak_rss_mb(pid)
+        stats = requests.get(f"{args.url}/metrics", timeout=10).json()["uploads"]
+        in_flight = max(stats["peak_in_flight"], 1)
+        growth = peak - baseline
+        print(f"   {args.uploads} uploads, {args.concurrency} concurrent: {elapsed:.1f}s, "
+              f"status {sorted(set(statuses))}, peak RSS {peak:.0f}MB (+{growth:.0f}MB)")
+        print(f"   peak in flight {stats['peak_in_flight']} of {stats['buffers']} buffers, "
+              f"{stats['waited_for_buffer']} waited for a buffer, {stats['reallocations']} buffer reallocations")
+        print(f"   peak RSS growth per in-flight upload: {growth / in_flight:.1f}MB "
+              f"({growth / in_flight / size_mb:.1f}x the {size_mb:.1f}MB upload, decode included)")
+        if any(status != 200 for status in statuses):
+            failures.append(f"uploads failed: {statuses}")
+        if stats["peak_in_flight"] > stats["buffers"]:
+            failures.append("more uploads in flight than buffers")
+
+        status, seconds, allow_origin = post_declared(args.url, max_bytes * 4)
+        print(f"   Content-Length {max_bytes * 4 / 1e6:.0f}MB: {status} after {seconds * 1000:.0f}ms (no body sent), "
+              f"Access-Control-Allow-Origin {allow_origin}")
+        if status != 413:
+            failures.append(f"oversize Content-Length answered {status}")
+        if allow_origin is None:
+            failures.append("oversize Content-Length 413 has no CORS headers")
+        status, allow_origin = post_chunked(args.url, max_bytes * 2)
+        print(f"   chunked {max_bytes * 2 / 1e6:.0f}MB: {status}, Access-Control-Allow-Origin {allow_origin}")
+        if status != 413:
+            failures.append(f"oversize chunked upload answered {status}")
+        if allow_origin is None:
+            failures.append("oversize chunked upload 413 has no CORS headers")
+        print(f"   rejected_too_large: {requests.get(f'{args.url}/metrics', timeout=10).json()['uploads']['rejected_too_large']}")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    print("=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print(f"✅ Uploads bounded to {args.buffers} buffers; oversize uploads rejected with 413")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+ONNX Conversion Tool
+Converts the handwriting CNN and the tabular MLP to ONNX for the onnx backend
+(NEURO_CNN_BACKEND=onnx / NEURO_MLP_BACKEND=onnx) and checks each converted
+model against Keras for parity and latency
+
+Usage:
+    python convert_to_onnx.py [--only cnn|mlp] [--opset 17] [--tolerance 1e-4]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+import main
+from backends import OnnxPredictor
+from inference import make_predictor
+
+MODELS = {
+    "cnn": (main.CNN_MODEL_PATH, main.CNN_ONNX_PATH),
+    "mlp": (main.MLP_MODEL_PATH, main.MLP_ONNX_PATH),
+}
+
+def convert(keras_path, onnx_path, opset):
+    """Trace the Keras model in inference mode and write it as ONNX"""
+    import tensorflow as tf
+    import tf2onnx
+    from tensorflow.keras.models import load_model
+
+    model = load_model(keras_path, compile=False)
+    spec = (tf.TensorSpec((None,) + tuple(model.inputs[0].shape[1:]), tf.float32, name="input"),)
+
+    @tf.function(input_signature=spec)
+    def forward(x):
+        return model(x, training=False)
+
+    tf2onnx.convert.from_function(forward, input_signature=spec, opset=opset, output_path=onnx_path)
+    return model
+
+def median_ms(fn, x, iterations, warmup=3):
+    for _ in range(warmup):
+        fn(x)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(x)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Convert the Keras models to ONNX and verify them")
+    parser.add_argument("--only", choices=sorted(MODELS), help="Convert just one model")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--tolerance", type=float, default=1e-4, help="Max |Keras - ONNX| allowed")
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    print("🔄 Keras → ONNX conversion")
+    print("=" * 60)
+    failed = False
+    rng = np.random.default_rng(0)
+    for key in ([args.only] if args.only else sorted(MODELS)):
+        keras_path, onnx_path = MODELS[key]
+        print(f"📦 {key}: {keras_path} → {onnx_path}")
+        try:
+            model = convert(keras_path, onnx_path, args.opset)
+        except Exception as e:
+            print(f"   ❌ Conversion failed: {e}")
+            failed = True
+            continue
+
+        keras_predictor = make_predictor(model, "direct", name=key)
+        onnx_predictor = OnnxPredictor(onnx_path, name=key)
+        probe = rng.random((8,) + tuple(model.inputs[0].shape[1:]), dtype=np.float32)
+        max_error = float(np.max(np.abs(keras_predictor(probe) - onnx_predictor(probe))))
+
+        single = probe[:1]
+        keras_ms = median_ms(keras_predictor, single, args.iterations)
+        onnx_ms = median_ms(onnx_predictor, single, args.iterations)
+        print(f"   size: {os.path.getsize(keras_path) / 1e6:.2f}MB keras, {os.path.getsize(onnx_path) / 1e6:.2f}MB onnx")
+        print(f"   p50 batch=1: {keras_ms:.2f}ms keras direct, {onnx_ms:.2f}ms onnx ({keras_ms / onnx_ms:.1f}x)")
+        if max_error > args.tolerance:
+            print(f"   ❌ max |Keras - ONNX| = {max_error:.2e} exceeds {args.tolerance:.0e}")
+            failed = True
+        else:
+            print(f"   ✅ max |Keras - ONNX| = {max_error:.2e}")
+
+    print("=" * 60)
+    if failed:
+        return 1
+    print("✅ Done - enable with NEURO_CNN_BACKEND=onnx and/or NEURO_MLP_BACKEND=onnx")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Handwriting CNN Distillation
+Trains a small CPU-friendly student CNN (224x224x3 in, Non-Dementia/Dementia
+out) to imitate convnext_handwriting_best.keras, for the "fast" tier
+(tier=fast on /predict/file and /predict/ensemble).
+
+The student is trained on exactly what the API feeds the teacher: the three
+Gradio preprocessing variants of every image (0-1 method 1 and 2, raw 0-255
+method 3). Its loss is the KL divergence to the teacher's temperature-softened
+probabilities. When the folder has class subfolders ("0"/"1" or
+"Non-Dementia"/"Dementia"), --alpha blends in cross-entropy on the true labels.
+
+Usage:
+    python distill_cnn.py samples/handwriting [--epochs 30] [--temperature 4] [--width 16]
+    python benchmark_tiers.py samples/heldout    # latency, memory and agreement of both tiers
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+import main
+from backends import load_cnn
+from quantize_cnn import labelled_images
+
+def tta_variants(path):
+    """The three uint8 variants and their divisors the API feeds the CNN for one image"""
+    return main.build_tta_batch(Image.open(path))
+
+def build_student(width=16, dropout=0.2):
+    """Depthwise-separable CNN - logits output; the saved model appends the softmax"""
+    import tensorflow as tf
+    from tensorflow.keras import layers
+
+    inputs = layers.Input((main.img_height, main.img_width, 3))
+    x = layers.Conv2D(width, 3, strides=2, padding="same", use_bias=False)(inputs)
+    x = layers.BatchNormalization()(x)
+    x = layers.ReLU()(x)
+    for multiplier in (2, 4, 8, 8):
+        x = layers.SeparableConv2D(width * multiplier, 3, strides=2, padding="same", use_bias=False)(x)
+        x = layers.BatchNormalization()(x)
+        x = layers.ReLU()(x)
+    x = layers.GlobalAveragePooling2D()(x)
+    x = layers.Dropout(dropout)(x)
+    logits = layers.Dense(len(main.class_labels))(x)
+    return tf.keras.Model(inputs, logits, name="handwriting_student")
+
+def distillation_loss(temperature, alpha):
+    """y_true = [teacher soft targets (2), one-hot label (2), has label (1)]"""
+    import tensorflow as tf
+
+    def loss(y_true, logits):
+        soft, hard, labelled = y_true[:, :2], y_true[:, 2:4], y_true[:, 4]
+        kl = tf.reduce_sum(soft * (tf.math.log(soft) - tf.nn.log_softmax(logits / temperature)), axis=-1)
+        kd = kl * temperature ** 2
+        ce = tf.nn.softmax_cross_entropy_with_logits(hard, logits)
+        # Unlabelled images learn from the teacher alone
+        return tf.where(labelled > 0, alpha * kd + (1 - alpha) * ce, kd)
+
+    return loss
+
+def soften(probs, temperature):
+    logits = np.log(np.clip(probs, 1e-7, 1.0)) / temperature
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def tta_agreement(teacher_probs, student_probs):
+    """Per-image fused-TTA predictions (rows grouped by 3 variants) -> (agreement, mean |ΔP(Dementia)|)"""
+    teacher = teacher_probs.reshape(-1, 3, 2).mean(axis=1)
+    student = student_probs.reshape(-1, 3, 2).mean(axis=1)
+    agreement = float(np.mean(teacher.argmax(axis=1) == student.argmax(axis=1)))
+    return agreement, float(np.mean(np.abs(teacher[:, 1] - student[:, 1])))
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Distill the handwriting ConvNeXt into a small student CNN")
+    parser.add_argument("folder", help="Training handwriting images, optionally in class subfolders")
+    parser.add_argument("--out", default=main.CNN_FAST_PATH)
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--temperature", type=float, default=4.0)
+    parser.add_argument("--alpha", type=float, default=0.7, help="Weight of the teacher term when labels exist")
+    parser.add_argument("--width", type=int, default=16, help="Channels of the first student layer")
+    parser.add_argument("--val-split", type=float, default=0.15, help="Images held out for the agreement check")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    samples = labelled_images(args.folder)
+    if len(samples) < 2:
+        print(f"❌ Need at least 2 images in {args.folder}")
+        return 1
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(samples))
+    val_count = max(1, int(len(samples) * args.val_split))
+    splits = {"val": [samples[i] for i in order[:val_count]], "train": [samples[i] for i in order[val_count:]]}
+
+    print(f"🎓 Distilling {main.CNN_MODEL_PATH} → {args.out}")
+    print("=" * 60)
+    _, _, teacher = load_cnn("keras", main.CNN_MODEL_PATH, main.INFERENCE_PATH)
+
+    data = {}
+    for split, split_samples in splits.items():
+        images, divisors, labels = [], [], []
+        for path, label in split_samples:
+            variant_images, variant_divisors = tta_variants(path)
+            images.append(variant_images)
+            divisors.append(variant_divisors)
+            labels.extend([-1 if label is None else label] * len(variant_images))
+        images, divisors = np.concatenate(images), np.concatenate(divisors)
+        # The teacher runs once per variant; training reuses its probabilities every epoch
+        teacher_probs = np.concatenate([
+            teacher(images[i:i + 12], divisors[i:i + 12]) for i in range(0, len(images), 12)
+        ])
+        data[split] = (images, divisors, np.array(labels), teacher_probs)
+        print(f"   {split}: {len(split_samples)} images, {len(images)} variants")
+
+    def dataset(split, shuffle):
+        images, divisors, labels, teacher_probs = data[split]
+        hard = np.eye(2, dtype=np.float32)[np.maximum(labels, 0)]
+        targets = np.concatenate(
+            [soften(teacher_probs, args.temperature), hard, (labels >= 0)[:, None]], axis=1
+        ).astype(np.float32)
+        ds = tf.data.Dataset.from_tensor_slices((images, divisors, targets))
+        if shuffle:
+            ds = ds.shuffle(len(images), seed=args.seed)
+        ds = ds.map(lambda image, divisor, target: (tf.cast(image, tf.float32) / divisor[0], target))
+        return ds.batch(args.batch_size).prefetch(tf.data.AUTOTUNE)
+
+    tf.keras.utils.set_random_seed(args.seed)
+    student = build_student(args.width)
+    student.compile(optimizer=tf.keras.optimizers.Adam(args.learning_rate),
+                    loss=distillation_loss(args.temperature, args.alpha))
+    print(f"   student: {student.count_params():,} parameters")
+    student.fit(
+        dataset("train", shuffle=True), validation_data=dataset("val", shuffle=False), epochs=args.epochs,
+        callbacks=[tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True)], verbose=2,
+    )
+
+    serving = tf.keras.Model(student.input, tf.keras.layers.Softmax()(student.output), name="handwriting_student")
+    serving.save(args.out)
+    print(f"💾 Saved {args.out} ({os.path.getsize(args.out) / 1e6:.2f}MB)")
+
+    images, divisors, _, teacher_probs = data["val"]
+    student_probs = serving.predict(images.astype(np.float32) / divisors.reshape(-1, 1, 1, 1), verbose=0)
+    agreement, delta = tta_agreement(teacher_probs, student_probs)
+    print(f"🎯 Held-out agreement with the teacher: {agreement:.1%} (mean |Δ P(Dementia)| {delta:.4f})")
+    print("=" * 60)
+    print("✅ Serve it with tier=fast; compare the tiers with python benchmark_tiers.py <folder>")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
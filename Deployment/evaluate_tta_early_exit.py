@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+TTA Early-Exit Evaluation
+Replays the NEURO_CNN_EARLY_EXIT policy (main.tta_confident) over a labeled
+handwriting folder at several confidence thresholds: method 1 first, methods
+2 and 3 only while the variants so far disagree or are below the threshold.
+Reports the average TTA variants (single-image forward passes) evaluated and
+saved per request, how many requests exit after method 1, and the change in
+accuracy and predictions against always running all three variants.
+
+The folder holds one subfolder per class ("0"/"1" or "Non-Dementia"/"Dementia");
+without subfolders only agreement with full TTA is reported.
+    python evaluate_tta_early_exit.py samples/heldout [--thresholds 0.8 0.9 0.95 0.99]
+"""
+
+import sys
+import argparse
+
+import numpy as np
+
+import main
+from quantize_cnn import labelled_images
+
+def variant_results(path):
+    """The per-variant CNN results for one image, exactly as the fused serving path builds its inputs"""
+    images, divisors = main.build_tta_batch(main.load_image_input(path))
+    return [main.gradio_probs_to_result(row) for row in main.cnn_tta_predictor(images, divisors)]
+
+def early_exit(results, threshold):
+    """The variants the serving policy would evaluate -> (combined result, variants evaluated)"""
+    evaluated = []
+    for result in results:
+        evaluated.append(result)
+        if main.tta_confident(evaluated, threshold):
+            break
+    return main.combine_gradio_results(evaluated), len(evaluated)
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Forward passes saved and accuracy change of the TTA early exit")
+    parser.add_argument("folder", help="Handwriting images, optionally in class subfolders")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9, 0.95, 0.99])
+    args = parser.parse_args()
+
+    samples = labelled_images(args.folder)
+    if not samples:
+        print(f"❌ No images in {args.folder}")
+        return 1
+    main.load_models_if_needed(["cnn"])
+    print(f"🪜 TTA early-exit evaluation: {len(samples)} images, {main.CNN_BACKEND} backend")
+    print("=" * 88)
+
+    per_image = [variant_results(path) for path, _ in samples]
+    labels = np.array([label if label is not None else -1 for _, label in samples])
+    labelled = bool(np.all(labels >= 0))
+    variants_total = len(main.GRADIO_METHODS)
+
+    full = [main.combine_gradio_results(results) for results in per_image]
+    full_pred = np.array([pred for pred, _, _ in full])
+    full_dementia = np.array([probs[1] for _, _, probs in full])
+    if labelled:
+        print(f"   full TTA ({variants_total} variants): accuracy {np.mean(full_pred == labels):.1%}")
+
+    print(f"{'threshold':>10}{'variants':>10}{'saved':>8}{'exit@1':>9}{'accuracy':>10}{'Δacc':>8}"
+          f"{'changed':>9}{'max|ΔP|':>9}")
+    for threshold in args.thresholds:
+        outcomes = [early_exit(results, threshold) for results in per_image]
+        pred = np.array([combined[0] for combined, _ in outcomes])
+        dementia = np.array([combined[2][1] for combined, _ in outcomes])
+        variants = np.array([count for _, count in outcomes])
+        line = (f"{threshold:>10.2f}{variants.mean():>10.2f}{variants_total - variants.mean():>8.2f}"
+                f"{np.mean(variants == 1):>9.0%}")
+        if labelled:
+            accuracy = np.mean(pred == labels)
+            line += f"{accuracy:>10.1%}{accuracy - np.mean(full_pred == labels):>+8.1%}"
+        else:
+            line += f"{'-':>10}{'-':>8}"
+        line += f"{int(np.sum(pred != full_pred)):>9}{np.max(np.abs(dementia - full_dementia)):>9.3f}"
+        print(line)
+
+    print("=" * 88)
+    print("variants = mean single-image forward passes per request (full TTA runs all "
+          f"{variants_total}); changed = predictions that differ from full TTA")
+    print("Serve a threshold with NEURO_CNN_EARLY_EXIT=<threshold>")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
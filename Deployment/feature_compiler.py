@@ -0,0 +1,340 @@
+"""
+Compiled feature preprocessor.
+
+``preprocessor.transform`` on a one-row DataFrame spends most of its time in
+pandas construction and sklearn's column/feature-name checks, not in the math.
+``compile_preprocessor`` reads the fitted scalers once and turns them into
+plain vectors over FEATURE_ORDER:
+
+    numeric columns  gather index + per-column (subtract, divide, multiply, add, clip)
+                     stages - one stage per scaler in a Pipeline
+    one-hot columns  category index maps
+
+The stages keep sklearn's own operation order in float64, so the output is
+bit-identical to ``preprocessor.transform`` (checked on random rows at
+compile time). Transformers it cannot compile keep running through their
+original sklearn object; if the top-level object is not understood at all,
+the whole preprocessor falls back to the DataFrame path.
+
+Usage:
+    python feature_compiler.py [--pkl ../Models/preprocessor.pkl] [--rows 10000]
+"""
+
+import sys
+import time
+import logging
+import argparse
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREPROCESSOR_PATH = "../Models/preprocessor.pkl"
+
+
+class UnsupportedTransformer(ValueError):
+    """Raised for a fitted transformer the compiler does not know how to vectorize"""
+
+
+def _identity_stage(width):
+    return {
+        "sub": np.zeros(width), "div": np.ones(width), "mul": np.ones(width), "add": np.zeros(width),
+        "low": np.full(width, -np.inf), "high": np.full(width, np.inf),
+    }
+
+
+def _scaler_stage(transformer, width):
+    """One scaler -> stage vectors reproducing its ``transform`` step by step"""
+    name = type(transformer).__name__
+    stage = _identity_stage(width)
+    if transformer == "passthrough" or (name == "FunctionTransformer" and transformer.func is None):
+        return stage
+    if getattr(transformer, "n_features_in_", width) != width:
+        raise UnsupportedTransformer(f"{name} was fitted on {transformer.n_features_in_} columns, not {width}")
+
+    if name == "StandardScaler":
+        if transformer.with_mean:
+            stage["sub"] = transformer.mean_.astype(np.float64)
+        if transformer.with_std:
+            stage["div"] = transformer.scale_.astype(np.float64)
+    elif name == "RobustScaler":
+        if transformer.with_centering:
+            stage["sub"] = transformer.center_.astype(np.float64)
+        if transformer.with_scaling:
+            stage["div"] = transformer.scale_.astype(np.float64)
+    elif name == "MaxAbsScaler":
+        stage["div"] = transformer.scale_.astype(np.float64)
+    elif name == "MinMaxScaler":
+        stage["mul"] = transformer.scale_.astype(np.float64)
+        stage["add"] = transformer.min_.astype(np.float64)
+        if getattr(transformer, "clip", False):
+            low, high = transformer.feature_range
+            stage["low"], stage["high"] = np.full(width, float(low)), np.full(width, float(high))
+    else:
+        raise UnsupportedTransformer(f"{name} cannot be compiled")
+    return stage
+
+
+def _scaler_stages(transformer, width):
+    """Stages for a scaler or a Pipeline of scalers"""
+    if type(transformer).__name__ == "Pipeline":
+        return [_scaler_stage(step, width) for _, step in transformer.steps if step not in (None, "passthrough")]
+    return [_scaler_stage(transformer, width)]
+
+
+def _one_hot_maps(encoder, width):
+    """OneHotEncoder -> per-column category arrays"""
+    if type(encoder).__name__ != "OneHotEncoder":
+        raise UnsupportedTransformer(f"{type(encoder).__name__} cannot be compiled")
+    if getattr(encoder, "drop_idx_", None) is not None or getattr(encoder, "_infrequent_enabled", False):
+        raise UnsupportedTransformer("OneHotEncoder with drop or infrequent categories cannot be compiled")
+    if encoder.handle_unknown not in ("error", "ignore") or len(encoder.categories_) != width:
+        raise UnsupportedTransformer("OneHotEncoder settings cannot be compiled")
+    categories = []
+    for values in encoder.categories_:
+        try:
+            values = np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise UnsupportedTransformer("OneHotEncoder with non-numeric categories cannot be compiled")
+        if np.isnan(values).any():
+            raise UnsupportedTransformer("OneHotEncoder with NaN categories cannot be compiled")
+        categories.append(values)
+    return categories, encoder.handle_unknown
+
+
+def _column_indices(columns, feature_order):
+    """Resolve a fitted ColumnTransformer column spec to positions in feature_order"""
+    if isinstance(columns, slice):
+        return list(range(len(feature_order)))[columns]
+    if isinstance(columns, (str, int, np.integer)):
+        columns = [columns]
+    columns = list(columns)
+    if columns and isinstance(columns[0], (bool, np.bool_)):
+        return [i for i, keep in enumerate(columns) if keep]
+    return [feature_order.index(c) if isinstance(c, str) else int(c) for c in columns]
+
+
+class CompiledPreprocessor:
+    """Vectorized ``preprocessor.transform`` over FEATURE_ORDER vectors"""
+
+    kind = "compiled"
+
+    def __init__(self, feature_order, n_outputs, numeric_index, numeric_positions, stages,
+                 one_hot_blocks=(), sklearn_blocks=()):
+        self.feature_order = list(feature_order)
+        self.n_outputs = n_outputs
+        self.numeric_index = np.asarray(numeric_index, dtype=np.intp)
+        self.numeric_positions = np.asarray(numeric_positions, dtype=np.intp)
+        self.stages = stages
+        # (input column, output positions, categories, handle_unknown)
+        self.one_hot_blocks = list(one_hot_blocks)
+        # (input columns, output positions, fitted transformer, column names)
+        self.sklearn_blocks = list(sklearn_blocks)
+
+    def describe(self):
+        return {
+            "kind": self.kind,
+            "compiled_outputs": int(self.n_outputs - sum(len(pos) for _, pos, _, _ in self.sklearn_blocks)),
+            "sklearn_fallbacks": [type(t).__name__ for _, _, t, _ in self.sklearn_blocks],
+        }
+
+    def transform(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != len(self.feature_order):
+            raise ValueError(f"Expected {len(self.feature_order)} features, got {x.shape[1]}")
+
+        out = np.empty((len(x), self.n_outputs), dtype=np.float64)
+        if len(self.numeric_index):
+            values = x[:, self.numeric_index]
+            for stage in self.stages:
+                values = values - stage["sub"]
+                values = values / stage["div"]
+                values = values * stage["mul"]
+                values = values + stage["add"]
+                values = np.clip(values, stage["low"], stage["high"])
+            out[:, self.numeric_positions] = values
+
+        for column, positions, categories, handle_unknown in self.one_hot_blocks:
+            hits = x[:, column, np.newaxis] == categories
+            if handle_unknown == "error" and not hits.any(axis=1).all():
+                unknown = x[~hits.any(axis=1), column]
+                raise ValueError(f"Found unknown categories {unknown.tolist()} in column {self.feature_order[column]}")
+            out[:, positions] = hits
+
+        for columns, positions, transformer, names in self.sklearn_blocks:
+            block = transformer.transform(_frame(x[:, columns], names))
+            out[:, positions] = block.toarray() if hasattr(block, "toarray") else block
+        return out
+
+    __call__ = transform
+
+
+def _frame(x, columns):
+    import pandas as pd
+
+    return pd.DataFrame(x, columns=columns)
+
+
+class SklearnPreprocessor:
+    """The original DataFrame path, for preprocessors that cannot be compiled"""
+
+    kind = "sklearn"
+
+    def __init__(self, preprocessor, feature_order, reason=""):
+        self.preprocessor = preprocessor
+        self.feature_order = list(feature_order)
+        self.reason = reason
+
+    def describe(self):
+        return {"kind": self.kind, "reason": self.reason}
+
+    def transform(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        return self.preprocessor.transform(_frame(x, self.feature_order))
+
+    __call__ = transform
+
+
+def _compile(preprocessor, feature_order):
+    n_features = len(feature_order)
+    if getattr(preprocessor, "n_features_in_", n_features) != n_features:
+        raise UnsupportedTransformer(f"Preprocessor expects {preprocessor.n_features_in_} features, not {n_features}")
+    names_in = getattr(preprocessor, "feature_names_in_", None)
+    if names_in is not None and list(names_in) != list(feature_order):
+        raise UnsupportedTransformer("Preprocessor was fitted on a different column order than FEATURE_ORDER")
+
+    if type(preprocessor).__name__ != "ColumnTransformer":
+        # A bare scaler (or Pipeline of scalers) over all columns
+        stages = _scaler_stages(preprocessor, n_features)
+        return CompiledPreprocessor(feature_order, n_features, range(n_features), range(n_features), stages)
+
+    if getattr(preprocessor, "sparse_output_", False):
+        raise UnsupportedTransformer("ColumnTransformer produces sparse output")
+
+    numeric_index, numeric_positions, numeric_stages = [], [], []
+    one_hot_blocks, sklearn_blocks = [], []
+    position = 0
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop":
+            continue
+        indices = _column_indices(columns, feature_order)
+        if not indices:
+            continue
+        width = len(indices)
+
+        try:
+            stages = _scaler_stages(transformer, width)
+            numeric_index += indices
+            numeric_positions += range(position, position + width)
+            numeric_stages.append(stages)
+            position += width
+            continue
+        except UnsupportedTransformer:
+            pass
+
+        try:
+            categories, handle_unknown = _one_hot_maps(transformer, width)
+            for column, values in zip(indices, categories):
+                one_hot_blocks.append((column, np.arange(position, position + len(values)), values, handle_unknown))
+                position += len(values)
+            continue
+        except UnsupportedTransformer as e:
+            reason = e
+
+        # Keep the fitted sub-transformer; it only sees its own columns
+        names = [feature_order[i] for i in indices]
+        probe = transformer.transform(_frame(np.zeros((1, width)), names))
+        out_width = probe.shape[1]
+        logger.info(f"Feature compiler: {type(transformer).__name__} stays on sklearn ({reason})")
+        sklearn_blocks.append((indices, np.arange(position, position + out_width), transformer, names))
+        position += out_width
+
+    # Pad every numeric block to the same number of stages with identity stages
+    depth = max((len(stages) for stages in numeric_stages), default=0)
+    merged = []
+    for level in range(depth):
+        parts = [stages[level] if level < len(stages) else _identity_stage(len(stages[0]["sub"]))
+                 for stages in numeric_stages]
+        merged.append({key: np.concatenate([part[key] for part in parts]) for key in parts[0]})
+
+    return CompiledPreprocessor(
+        feature_order, position, numeric_index, numeric_positions, merged, one_hot_blocks, sklearn_blocks
+    )
+
+
+def probe_rows(compiled, rows=256, seed=0):
+    """Random rows that also hit every known one-hot category"""
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 50, (rows, len(compiled.feature_order)))
+    for column, _, categories, _ in getattr(compiled, "one_hot_blocks", ()):
+        x[:, column] = rng.choice(categories, rows)
+    return x
+
+
+def verify(compiled, preprocessor, rows=256):
+    """Largest |compiled - sklearn| on random rows (0.0 means bit-identical)"""
+    x = probe_rows(compiled, rows)
+    expected = preprocessor.transform(_frame(x, compiled.feature_order))
+    expected = expected.toarray() if hasattr(expected, "toarray") else np.asarray(expected)
+    actual = compiled.transform(x)
+    if expected.shape != actual.shape:
+        return float("inf")
+    return float(np.max(np.abs(expected - actual))) if expected.size else 0.0
+
+
+def compile_preprocessor(preprocessor, feature_order, verify_rows=256):
+    """CompiledPreprocessor reproducing ``preprocessor`` exactly, else SklearnPreprocessor"""
+    try:
+        compiled = _compile(preprocessor, feature_order)
+        max_error = verify(compiled, preprocessor, verify_rows)
+    except Exception as e:
+        logger.warning(f"⚠️ Preprocessor not compiled, using sklearn: {e}")
+        return SklearnPreprocessor(preprocessor, feature_order, reason=str(e))
+    if max_error != 0.0:
+        logger.warning(f"⚠️ Compiled preprocessor deviates from sklearn by {max_error:.2e}, using sklearn")
+        return SklearnPreprocessor(preprocessor, feature_order, reason=f"deviation {max_error:.2e}")
+    logger.info(f"🧩 Preprocessor compiled: {compiled.describe()}")
+    return compiled
+
+
+def main():
+    import joblib
+
+    from main import FEATURE_ORDER
+
+    parser = argparse.ArgumentParser(description="Compile preprocessor.pkl and compare it with sklearn")
+    parser.add_argument("--pkl", default=DEFAULT_PREPROCESSOR_PATH)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    preprocessor = joblib.load(args.pkl)
+    compiled = compile_preprocessor(preprocessor, FEATURE_ORDER)
+    print(f"🧩 {args.pkl}: {compiled.describe()}")
+    if compiled.kind != "compiled":
+        return 1
+
+    max_error = verify(compiled, preprocessor, args.rows)
+    print(f"   max |compiled - sklearn| on {args.rows} rows: {max_error:.1e}")
+
+    row = probe_rows(compiled, 1)[0]
+    timings = {}
+    for label, fn in [
+        ("sklearn (1-row DataFrame)", lambda: preprocessor.transform(_frame(row.reshape(1, -1), FEATURE_ORDER))),
+        ("compiled", lambda: compiled.transform(row)),
+    ]:
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        timings[label] = (time.perf_counter() - start) / args.iterations * 1e6
+        print(f"   {label:<28}{timings[label]:>9.1f}µs per request")
+    print(f"   speedup: {timings['sklearn (1-row DataFrame)'] / timings['compiled']:.0f}x")
+    return 0 if max_error == 0.0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
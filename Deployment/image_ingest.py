@@ -0,0 +1,75 @@
+"""
+Single-decode image ingestion for the handwriting CNN.
+
+An upload is decoded ONCE into an RGB image. For JPEG, Image.draft() lets the
+decoder drop to 1/2, 1/4 or 1/8 resolution during the DCT, while staying at
+least DRAFT_MARGIN x the 224x224 target in each dimension. A 12MP phone photo
+is then decoded as roughly 0.2-0.8MP, and the final resize is still a proper
+antialiased downsample.
+
+Every TTA variant is built from that one buffer:
+
+    pil     LANCZOS (method 1) and BICUBIC (method 3) resizes - the Gradio pixels
+    opencv  one cv2.INTER_AREA resize shared by methods 1 and 3 (INTER_CUBIC when
+            upscaling). Within a few grey levels of pil (see benchmark_image_ingest.py)
+
+Method 2's grayscale is always taken from the resized method 3 pixels.
+"""
+
+import logging
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+RESIZE_BACKENDS = ("pil", "opencv")
+
+# Keep the draft-decoded image at least this many times the target size
+DRAFT_MARGIN = 2
+
+
+def open_upload(image_input):
+    """PIL image for an upload (PIL image, file-like object, path or numpy array) - not decoded yet"""
+    if isinstance(image_input, Image.Image):
+        return image_input
+    if hasattr(image_input, "read") or isinstance(image_input, str):
+        return Image.open(image_input)
+    array = np.asarray(image_input)
+    if array.ndim == 4:
+        array = array[0]  # Remove batch dimension
+    if array.size and array.max() <= 1.0:
+        array = array * 255
+    return Image.fromarray(array.astype(np.uint8))
+
+
+def decode_rgb(img, size, draft=True):
+    """Decode ``img`` once as RGB - reduced-resolution JPEG decoding when ``draft``"""
+    if draft and img.format == "JPEG":
+        width, height = size
+        img.draft("RGB", (width * DRAFT_MARGIN, height * DRAFT_MARGIN))
+    if img.mode != "RGB":
+        return img.convert("RGB")
+    img.load()
+    return img
+
+
+def _resize_opencv(pixels, size):
+    import cv2
+
+    width, height = size
+    upscale = pixels.shape[1] < width or pixels.shape[0] < height
+    return cv2.resize(pixels, (width, height), interpolation=cv2.INTER_CUBIC if upscale else cv2.INTER_AREA)
+
+
+def tta_pixels(rgb, size, backend="pil"):
+    """The three Gradio variants (method 1, 2, 3) as uint8 HxWx3 arrays from one decoded RGB image"""
+    if backend == "opencv":
+        resized = _resize_opencv(np.asarray(rgb), size)
+        method1 = method3 = resized
+    else:
+        method1 = np.asarray(rgb.resize(size, Image.Resampling.LANCZOS), dtype=np.uint8)
+        method3 = np.asarray(rgb.resize(size), dtype=np.uint8)
+    gray = np.asarray(Image.fromarray(method3).convert("L"), dtype=np.uint8)
+    method2 = np.repeat(gray[..., np.newaxis], 3, axis=-1)
+    return method1, method2, method3
@@ -0,0 +1,195 @@
+"""
+Low-overhead model execution.
+
+Keras ``model.predict`` builds a data adapter, callbacks and a progress bar on
+every call. For a single 1x36 row or one TTA batch that setup costs more than
+the math itself. DirectPredictor traces the model ONCE with ``tf.function``
+over a fixed input signature (batch dimension left open) and then calls the
+traced graph directly with ``training=False``.
+
+TensorFlow is imported on first use, so processes that only run the NumPy
+MLP (mlp_lite.py) never load it.
+
+BucketedPredictor pads the batch dimension up to a fixed set of sizes that
+are all warmed up at startup, so serving never meets a first-call shape.
+"""
+
+import time
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_PATHS = ("direct", "keras")
+
+
+def input_signature(model):
+    """One TensorSpec per model input, batch dimension left open"""
+    import tensorflow as tf
+
+    return [
+        tf.TensorSpec((None,) + tuple(tensor.shape[1:]), tf.as_dtype(tensor.dtype), name=f"input_{i}")
+        for i, tensor in enumerate(model.inputs)
+    ]
+
+
+class KerasPredictor:
+    """The classic ``model.predict(..., verbose=0)`` path - kept for comparison"""
+
+    path = "keras"
+
+    def __init__(self, model, name=None):
+        self.model = model
+        self.name = name or model.name
+        self._specs = input_signature(model)
+
+    def _cast(self, inputs):
+        return [np.asarray(x, dtype=spec.dtype.as_numpy_dtype) for x, spec in zip(inputs, self._specs)]
+
+    def __call__(self, *inputs):
+        inputs = self._cast(inputs)
+        x = inputs if len(inputs) > 1 else inputs[0]
+        return self.model.predict(x, batch_size=len(inputs[0]), verbose=0)
+
+
+class DirectPredictor(KerasPredictor):
+    """Calls a pre-traced ``tf.function`` of the model - no per-call Keras setup"""
+
+    path = "direct"
+
+    def __init__(self, model, name=None):
+        import tensorflow as tf
+
+        super().__init__(model, name)
+        multi_input = len(self._specs) > 1
+
+        def forward(*inputs):
+            return model(list(inputs) if multi_input else inputs[0], training=False)
+
+        self._forward = tf.function(forward, input_signature=self._specs)
+
+    def __call__(self, *inputs):
+        return self._forward(*self._cast(inputs)).numpy()
+
+    def tracing_count(self):
+        """How many times the tf.function has been traced (1 unless something forced a retrace)"""
+        return self._forward.experimental_get_tracing_count()
+
+
+def make_predictor(model, path="direct", name=None):
+    """Predictor for ``model`` on the requested inference path ("direct" or "keras")"""
+    if path not in INFERENCE_PATHS:
+        raise ValueError(f"Unknown inference path {path!r} - expected one of {INFERENCE_PATHS}")
+    predictor = DirectPredictor(model, name) if path == "direct" else KerasPredictor(model, name)
+    logger.info(f"⚡ {predictor.name}: {path} inference path")
+    return predictor
+
+
+def parse_buckets(text):
+    """'1,2,4,8' -> (1, 2, 4, 8); empty or '0' disables bucketing"""
+    return tuple(sorted({int(part) for part in text.split(",") if part.strip() and int(part) > 0}))
+
+
+class BucketedPredictor:
+    """Pads the batch dimension up to the nearest configured bucket size.
+
+    Inputs are padded by repeating their last row, so the padded rows are
+    still valid inputs (a zero TTA divisor would not be), and the output is
+    sliced back. Batches above the largest bucket run in largest-bucket
+    chunks. After warmup() the wrapped predictor therefore only sees warmed
+    shapes. Any call with a shape that was not warmed, or one that makes the
+    tf.function retrace, is logged with its latency and counted.
+    """
+
+    def __init__(self, predictor, buckets, name=None):
+        self.predictor = predictor
+        self.buckets = tuple(sorted(set(buckets)))
+        self.name = name or predictor.name
+        self.path = getattr(predictor, "path", None)
+
+        self._lock = threading.Lock()
+        self._warm_shapes = set()
+        self._warmed = False
+        self.calls = 0
+        self.rows = 0
+        self.padded_rows = 0
+        self.unexpected_shapes = 0
+        self.retraces = 0
+        self.last_unexpected = None
+
+    def bucket_for(self, rows):
+        for bucket in self.buckets:
+            if rows <= bucket:
+                return bucket
+        return None
+
+    def warmup(self, make_inputs, buckets=None):
+        """Run each bucket once - make_inputs(rows) returns the tuple of model inputs"""
+        for bucket in buckets or self.buckets:
+            inputs = make_inputs(bucket)
+            self.predictor(*inputs)
+            self._warm_shapes.add(tuple(np.shape(x) for x in inputs))
+        self._warmed = True
+
+    def _tracing_count(self):
+        count = getattr(self.predictor, "tracing_count", None)
+        return count() if count is not None else None
+
+    def _run(self, inputs):
+        shape = tuple(np.shape(x) for x in inputs)
+        traces = self._tracing_count()
+        start = time.perf_counter()
+        output = self.predictor(*inputs)
+        if not self._warmed:
+            return output
+
+        # The very first trace (nothing warmed) is reported as an unwarmed shape, not a retrace
+        retraced = bool(traces) and self._tracing_count() > traces
+        if retraced or shape not in self._warm_shapes:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                if shape not in self._warm_shapes:
+                    # Reported once per shape - later calls with it are warm
+                    self._warm_shapes.add(shape)
+                    self.unexpected_shapes += 1
+                self.retraces += int(retraced)
+                self.last_unexpected = {"shape": [list(s) for s in shape], "ms": round(elapsed_ms, 1), "retraced": retraced}
+            logger.warning(
+                f"🔁 {self.name}: {'retraced' if retraced else 'unwarmed shape'} {shape} took {elapsed_ms:.0f}ms "
+                "- add its batch size to the bucket list"
+            )
+        return output
+
+    def __call__(self, *inputs):
+        inputs = [np.asarray(x) for x in inputs]
+        rows = len(inputs[0])
+        largest = self.buckets[-1] if self.buckets else None
+        if largest is not None and rows > largest:
+            return np.concatenate(
+                [self(*(x[i:i + largest] for x in inputs)) for i in range(0, rows, largest)], axis=0
+            )
+
+        bucket = self.bucket_for(rows) if largest is not None and rows else rows
+        if bucket > rows:
+            inputs = [np.concatenate([x, np.repeat(x[-1:], bucket - rows, axis=0)]) for x in inputs]
+        output = self._run(inputs)
+        with self._lock:
+            self.calls += 1
+            self.rows += rows
+            self.padded_rows += bucket - rows
+        return output[:rows]
+
+    def stats(self):
+        """Bucket / padding / retrace report for /metrics"""
+        with self._lock:
+            return {
+                "buckets": list(self.buckets),
+                "calls": self.calls,
+                "rows": self.rows,
+                "padding_ratio": round(self.padded_rows / (self.rows + self.padded_rows), 4) if self.rows else 0.0,
+                "unexpected_shapes": self.unexpected_shapes,
+                "retraces": self.retraces,
+                "last_unexpected": self.last_unexpected,
+            }
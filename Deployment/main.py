@@ -1,25 +1,41 @@
+import os
 import time
+# Must come before the heavy imports it times (NEURO_PROFILE_STARTUP=1)
+from startup_profile import profiler as startup_profiler, ENABLED as PROFILE_STARTUP
+_import_started = time.perf_counter()
+
+import csv
 import json
 import numpy as np
-import cv2
 import asyncio
-import traceback
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, UploadFile, File, Form, Body, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware  # ✅ CRITICAL - ADD THIS
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Union, Optional
-from tensorflow.keras.models import load_model
-import joblib
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.requests import ClientDisconnect
+from pydantic import BaseModel, ValidationError
+from typing import Any, List, Union, Optional
 import uvicorn
-import pandas as pd
 import logging
 from PIL import Image
+from batching import MicroBatcher
+from inference import INFERENCE_PATHS, BucketedPredictor, parse_buckets
+from backends import load_cnn, load_mlp, CNN_BACKENDS, MLP_BACKENDS
+from image_ingest import open_upload, decode_rgb, tta_pixels, RESIZE_BACKENDS
+from uploads import UploadBufferPool, UploadLimitMiddleware, UploadTooLarge, BufferReader
+from quality import QualityController, LoadTrackingMiddleware
+from feature_compiler import compile_preprocessor, SklearnPreprocessor
+from model_registry import ModelRegistry
+from cache import PredictionCache, DiskResultCache, TieredCache, content_key, feature_key, file_signature
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# TensorFlow, joblib/sklearn and pandas are imported on first use (model loaders, sklearn fallback)
+startup_profiler.stages.append(("import main dependencies", time.perf_counter() - _import_started))
+
 # -------------------
 # Paths to models
 # -------------------
@@ -27,12 +43,165 @@ CNN_MODEL_PATH = "../Models/convnext_handwriting_best.keras"
 MLP_MODEL_PATH = "../Models/mlp_dementia_model.h5"
 PREPROCESSOR_PATH = "../Models/preprocessor.pkl"
 META_MODEL_PATH = "../Models/meta_xgb_safe.pkl"
+MLP_LITE_PATH = "../Models/mlp_dementia_model.npz"  # python mlp_lite.py export
+CNN_ONNX_PATH = "../Models/convnext_handwriting_best.onnx"  # python convert_to_onnx.py
+CNN_TFLITE_PATH = "../Models/convnext_handwriting_int8.tflite"  # python quantize_cnn.py
+MLP_ONNX_PATH = "../Models/mlp_dementia_model.onnx"
+# Distilled student of the ConvNeXt for the "fast" tier (python distill_cnn.py) - .keras, .onnx or .tflite
+CNN_FAST_PATH = os.getenv("NEURO_CNN_FAST_PATH", "../Models/handwriting_student.keras")
 
 cnn_model = None
 mlp_model = None
 preprocessor = None
 meta_model = None
 
+# preprocessor.transform over FEATURE_ORDER vectors - compiled to numpy when possible (feature_compiler.py)
+feature_transform = None
+
+# Callables that run the models (see inference.py) - every prediction goes through these
+cnn_predictor = None
+cnn_tta_predictor = None
+cnn_fast_tta_predictor = None
+mlp_predictor = None
+
+# -------------------
+# Serving configuration (override with NEURO_* environment variables)
+# -------------------
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+def _env_float(name, default):
+    return float(os.getenv(name, default))
+
+def _env_flag(name, default):
+    return os.getenv(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+# MLP micro-batching: concurrent /predict/json and /predict/form rows share one model call
+MLP_BATCHING_ENABLED = _env_flag("NEURO_MLP_BATCHING", True)
+MLP_BATCH_MAX_SIZE = _env_int("NEURO_MLP_BATCH_MAX_SIZE", 32)
+MLP_BATCH_MAX_WAIT_MS = _env_float("NEURO_MLP_BATCH_MAX_WAIT_MS", 5.0)
+
+# CNN batching queue: handwriting image tensors from concurrent uploads share one ConvNeXt forward pass
+CNN_BATCHING_ENABLED = _env_flag("NEURO_CNN_BATCHING", True)
+CNN_BATCH_MAX_SIZE = _env_int("NEURO_CNN_BATCH_MAX_SIZE", 12)
+CNN_BATCH_MAX_WAIT_MS = _env_float("NEURO_CNN_BATCH_MAX_WAIT_MS", 10.0)
+
+# Handwriting TTA: "fused" = one decode and one forward pass for all three Gradio variants,
+# "sequential" = the original three separate preprocess + predict calls
+CNN_TTA_MODE = os.getenv("NEURO_CNN_TTA_MODE", "fused").strip().lower()
+if CNN_TTA_MODE not in ("fused", "sequential"):
+    raise ValueError(f"NEURO_CNN_TTA_MODE must be 'fused' or 'sequential', got {CNN_TTA_MODE!r}")
+# TTA early exit: method 1 runs first and methods 2, 3 only while the variants so far are below this
+# averaged confidence or disagree on the class (0 = always all three; see evaluate_tta_early_exit.py)
+CNN_EARLY_EXIT_CONFIDENCE = _env_float("NEURO_CNN_EARLY_EXIT", 0.0)
+
+# Inference pool: threads that run model loading, image decoding and TensorFlow calls,
+# so the event loop keeps serving I/O, validation and /health while models compute
+INFERENCE_WORKERS = _env_int("NEURO_INFERENCE_WORKERS", 2)
+# Separate pool for interactive MLP and preprocessing work (batched MLP calls, the ensemble's clinical branch)
+TABULAR_WORKERS = _env_int("NEURO_TABULAR_WORKERS", 1)
+# Bulk scoring (/predict/batch, /predict/stream chunks) gets its own pool, so a large job never
+# holds the interactive tabular thread; the two pools still share the CPU cores
+BULK_WORKERS = _env_int("NEURO_BULK_WORKERS", 1)
+
+# Run the MLP and CNN branches of /predict/ensemble concurrently (0 = one after the other, for comparison)
+ENSEMBLE_CONCURRENT = _env_flag("NEURO_ENSEMBLE_CONCURRENT", True)
+
+# Cascade: the MLP runs first and the CNN only while the MLP's P(Dementia) lies inside the uncertainty band
+# [NEURO_CASCADE_LOW, NEURO_CASCADE_HIGH] - a decisive clinical answer skips ConvNeXt (replaces concurrent branches)
+ENSEMBLE_CASCADE = _env_flag("NEURO_ENSEMBLE_CASCADE", False)
+CASCADE_LOW = _env_float("NEURO_CASCADE_LOW", 0.1)
+CASCADE_HIGH = _env_float("NEURO_CASCADE_HIGH", 0.9)
+if not 0.0 <= CASCADE_LOW <= CASCADE_HIGH <= 1.0:
+    raise ValueError(f"NEURO_CASCADE_LOW/HIGH must satisfy 0 <= low <= high <= 1, got {CASCADE_LOW}, {CASCADE_HIGH}")
+
+# Load-aware quality control (quality.py): above the in-flight limit or the p95 SLO on the handwriting endpoints,
+# step down to a single TTA variant, then to MLP-only ensembles; step back up as load falls
+QUALITY_CONTROL = _env_flag("NEURO_QUALITY_CONTROL", False)
+QUALITY_SLO_P95_MS = _env_float("NEURO_SLO_P95_MS", 1000.0)
+QUALITY_MAX_IN_FLIGHT = _env_int("NEURO_QUALITY_MAX_IN_FLIGHT", 16)
+
+# "direct" = pre-traced tf.function calls (low overhead), "keras" = model.predict
+INFERENCE_PATH = os.getenv("NEURO_INFERENCE_PATH", "direct").strip().lower()
+if INFERENCE_PATH not in INFERENCE_PATHS:
+    raise ValueError(f"NEURO_INFERENCE_PATH must be one of {INFERENCE_PATHS}, got {INFERENCE_PATH!r}")
+
+# Inference backends (see backends.py): CNN "keras" | "onnx" | "tflite", MLP "keras" | "lite" | "onnx"
+CNN_BACKEND = os.getenv("NEURO_CNN_BACKEND", "keras").strip().lower()
+# NEURO_MLP_ENGINE is the older name of NEURO_MLP_BACKEND
+MLP_BACKEND = os.getenv("NEURO_MLP_BACKEND", os.getenv("NEURO_MLP_ENGINE", "keras")).strip().lower()
+if CNN_BACKEND not in CNN_BACKENDS:
+    raise ValueError(f"NEURO_CNN_BACKEND must be one of {CNN_BACKENDS}, got {CNN_BACKEND!r}")
+if MLP_BACKEND not in MLP_BACKENDS:
+    raise ValueError(f"NEURO_MLP_BACKEND must be one of {MLP_BACKENDS}, got {MLP_BACKEND!r}")
+
+CNN_MODEL_PATHS = {"keras": CNN_MODEL_PATH, "onnx": CNN_ONNX_PATH, "tflite": CNN_TFLITE_PATH}
+MLP_MODEL_PATHS = {"keras": MLP_MODEL_PATH, "lite": MLP_LITE_PATH, "onnx": MLP_ONNX_PATH}
+
+# Handwriting tiers, chosen per request with the ``tier`` form field of /predict/file and /predict/ensemble:
+# "accurate" is the ConvNeXt above (clinician review), "fast" the distilled student (screening kiosks)
+CNN_TIER_MODELS = {"accurate": "cnn", "fast": "cnn_fast"}
+DEFAULT_TIER = os.getenv("NEURO_DEFAULT_TIER", "accurate").strip().lower()
+if DEFAULT_TIER not in CNN_TIER_MODELS:
+    raise ValueError(f"NEURO_DEFAULT_TIER must be one of {tuple(CNN_TIER_MODELS)}, got {DEFAULT_TIER!r}")
+# The student's backend follows its file extension
+CNN_FAST_BACKEND = {".onnx": "onnx", ".tflite": "tflite"}.get(os.path.splitext(CNN_FAST_PATH)[1].lower(), "keras")
+# Checked once at startup, not per request - restart the API after training the student
+CNN_FAST_AVAILABLE = os.path.exists(CNN_FAST_PATH)
+
+# Tabular prediction cache: identical feature sets skip preprocessing and the MLP.
+# Cleared automatically when the MLP/preprocessor files change; TTL 0 = entries never expire
+MLP_CACHE_ENABLED = _env_flag("NEURO_MLP_CACHE", True)
+MLP_CACHE_MAX_ENTRIES = _env_int("NEURO_MLP_CACHE_SIZE", 4096)
+MLP_CACHE_TTL_S = _env_float("NEURO_MLP_CACHE_TTL_S", 0.0)
+
+# Handwriting result cache: keyed by a hash of the uploaded bytes (and optionally of the decoded,
+# resized pixels). NEURO_CNN_CACHE_DIR adds an on-disk tier that survives restarts
+CNN_CACHE_ENABLED = _env_flag("NEURO_CNN_CACHE", True)
+CNN_CACHE_MAX_ENTRIES = _env_int("NEURO_CNN_CACHE_SIZE", 2048)
+CNN_CACHE_TTL_S = _env_float("NEURO_CNN_CACHE_TTL_S", 0.0)
+CNN_CACHE_PIXEL_KEYS = _env_flag("NEURO_CNN_CACHE_PIXEL_KEYS", False)
+CNN_CACHE_DIR = os.getenv("NEURO_CNN_CACHE_DIR", "").strip()
+
+# /predict/batch: most patient records accepted in one request
+BATCH_MAX_RECORDS = _env_int("NEURO_BATCH_MAX_RECORDS", 1000)
+
+# /predict/stream: rows scored per MLP call, and the longest accepted row
+STREAM_CHUNK_ROWS = _env_int("NEURO_STREAM_CHUNK_ROWS", 512)
+STREAM_MAX_LINE_BYTES = _env_int("NEURO_STREAM_MAX_LINE_BYTES", 65536)
+
+# Compile preprocessor.pkl into vectorized numpy (exact sklearn parity) instead of a DataFrame per request
+COMPILED_FEATURES = _env_flag("NEURO_COMPILED_FEATURES", True)
+
+# Decode JPEG uploads at reduced resolution (Image.draft, >= 2x the 224x224 target) and pick the resize backend
+IMAGE_DRAFT = _env_flag("NEURO_IMAGE_DRAFT", True)
+IMAGE_RESIZE_BACKEND = os.getenv("NEURO_IMAGE_RESIZE", "pil").strip().lower()
+if IMAGE_RESIZE_BACKEND not in RESIZE_BACKENDS:
+    raise ValueError(f"NEURO_IMAGE_RESIZE must be one of {RESIZE_BACKENDS}, got {IMAGE_RESIZE_BACKEND!r}")
+
+# Largest accepted handwriting upload (413 above it) and the number of reusable upload buffers -
+# upload memory is bounded by NEURO_UPLOAD_BUFFERS x NEURO_UPLOAD_MAX_BYTES, further uploads wait for a buffer
+UPLOAD_MAX_BYTES = _env_int("NEURO_UPLOAD_MAX_BYTES", 20 * 1024 * 1024)
+UPLOAD_BUFFERS = _env_int("NEURO_UPLOAD_BUFFERS", 8)
+
+# Batch sizes model inputs are padded up to - every bucket is warmed at load, so no request pays for a
+# new shape (TF retrace / oneDNN / ORT / TFLite re-plan). Larger batches run in largest-bucket chunks.
+MLP_BATCH_BUCKETS = parse_buckets(os.getenv("NEURO_MLP_BATCH_BUCKETS", "1,2,4,8,16,32,64,128,256,512,1024"))
+# TTA batches are 3 rows per image
+CNN_BATCH_BUCKETS = parse_buckets(os.getenv("NEURO_CNN_BATCH_BUCKETS", "1,3,6,9,12"))
+
+# Tabular-only worker: skip the ConvNeXt model. With the lite or onnx MLP backend TensorFlow is never imported.
+TABULAR_ONLY = _env_flag("NEURO_TABULAR_ONLY", False)
+
+# Models loaded in parallel at startup; everything else loads on first use ("none" = fully lazy)
+PRELOAD_MODELS = [
+    name.strip() for name in os.getenv("NEURO_PRELOAD_MODELS", "cnn,mlp,preprocessor").lower().split(",")
+    if name.strip() not in ("", "none") and not (TABULAR_ONLY and name.strip() in ("cnn", "cnn_fast"))
+]
+# Unload models idle this long while RSS is over the budget (0 = never unload; budget 0 = at any RSS)
+MODEL_IDLE_UNLOAD_S = _env_float("NEURO_MODEL_IDLE_UNLOAD_S", 0.0)
+MODEL_MEMORY_BUDGET_MB = _env_float("NEURO_MODEL_MEMORY_BUDGET_MB", 0.0)
+
 # -------------------
 # Feature Order (36 features - FIXED!)
 # -------------------
@@ -98,6 +267,22 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Reject oversize handwriting uploads before they are read
+upload_buffers = UploadBufferPool(UPLOAD_BUFFERS, UPLOAD_MAX_BYTES)
+UPLOAD_PATHS = ("/predict/file", "/predict/ensemble")
+
+def count_rejected_upload():
+    upload_buffers.rejected += 1
+
+app.add_middleware(UploadLimitMiddleware, max_bytes=UPLOAD_MAX_BYTES, paths=UPLOAD_PATHS,
+                   on_reject=count_rejected_upload)
+
+# Queue depth and latency of the handwriting endpoints drive the quality mode of the next requests
+quality_controller = QualityController(QUALITY_SLO_P95_MS, QUALITY_MAX_IN_FLIGHT, enabled=QUALITY_CONTROL)
+app.add_middleware(LoadTrackingMiddleware, controller=quality_controller, paths=UPLOAD_PATHS)
+
+# Added last so it is the outermost middleware: responses from the ones above (the early 413)
+# carry the CORS headers too, and the browser sees "file too large" instead of a CORS failure
 # ✅ ADD CORS MIDDLEWARE - THIS FIXES THE CORS ERROR!
 app.add_middleware(
     CORSMiddleware,
@@ -107,6 +292,12 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+def upload_too_large_response(e):
+    return JSONResponse(
+        status_code=413,
+        content={"error": str(e), "max_upload_bytes": e.limit, "status": "error"}
+    )
+
 # -------------------
 # Pydantic schema (36 features - FIXED!)
 # -------------------
@@ -150,56 +341,165 @@ class PatientFeatures(BaseModel):
     MedicationCompliance: float
 
 # -------------------
-# Load models
+# Load models - each artifact on first use (model_registry.py)
 # -------------------
-def load_models_if_needed():
-    global cnn_model, mlp_model, preprocessor, meta_model
-
+def load_cnn_model():
+    global cnn_model, cnn_predictor, cnn_tta_predictor
+    logger.info(f"Loading CNN model ({CNN_BACKEND} backend)...")
+    model, predictor, tta_predictor = load_cnn(CNN_BACKEND, CNN_MODEL_PATHS[CNN_BACKEND], INFERENCE_PATH)
+    predictor = BucketedPredictor(predictor, CNN_BATCH_BUCKETS)
+    tta_predictor = BucketedPredictor(tta_predictor, CNN_BATCH_BUCKETS)
     try:
-        if cnn_model is None:
-            logger.info("Loading CNN model...")
-            cnn_model = load_model(CNN_MODEL_PATH)
-            logger.info("CNN model loaded")
-            try:
-                cnn_model.predict(np.zeros((1, 224, 224, 3)), verbose=0)
-                logger.info("CNN warmup done")
-            except Exception as e:
-                logger.warning(f"CNN warmup failed: {e}")
+        # The plain predictor only ever scores one image at a time
+        predictor.warmup(lambda n: (np.zeros((n, img_height, img_width, 3), dtype=np.float32),), buckets=[1])
+        logger.info("CNN warmup done")
+        tta_predictor.warmup(
+            lambda n: (np.zeros((n, img_height, img_width, 3), dtype=np.uint8), np.ones((n, 1), dtype=np.float32))
+        )
+        logger.info(f"CNN fused TTA warmup done for batch sizes {list(CNN_BATCH_BUCKETS)}")
+    except Exception as e:
+        logger.warning(f"CNN warmup failed: {e}")
+    cnn_model, cnn_predictor, cnn_tta_predictor = model, predictor, tta_predictor
+
+def unload_cnn_model():
+    global cnn_model, cnn_predictor, cnn_tta_predictor
+    cnn_model = cnn_predictor = cnn_tta_predictor = None
+
+def load_cnn_fast_model():
+    global cnn_fast_tta_predictor
+    logger.info(f"Loading fast-tier student CNN ({CNN_FAST_BACKEND} backend)...")
+    _, _, tta_predictor = load_cnn(CNN_FAST_BACKEND, CNN_FAST_PATH, INFERENCE_PATH)
+    tta_predictor = BucketedPredictor(tta_predictor, CNN_BATCH_BUCKETS)
+    try:
+        tta_predictor.warmup(
+            lambda n: (np.zeros((n, img_height, img_width, 3), dtype=np.uint8), np.ones((n, 1), dtype=np.float32))
+        )
+        logger.info(f"Student CNN fused TTA warmup done for batch sizes {list(CNN_BATCH_BUCKETS)}")
+    except Exception as e:
+        logger.warning(f"Student CNN warmup failed: {e}")
+    cnn_fast_tta_predictor = tta_predictor
+
+def unload_cnn_fast_model():
+    global cnn_fast_tta_predictor
+    cnn_fast_tta_predictor = None
+
+def load_mlp_model():
+    global mlp_model, mlp_predictor
+    logger.info(f"Loading MLP model ({MLP_BACKEND} backend)...")
+    model, predictor = load_mlp(MLP_BACKEND, MLP_MODEL_PATHS[MLP_BACKEND], INFERENCE_PATH)
+    predictor = BucketedPredictor(predictor, MLP_BATCH_BUCKETS)
+    try:
+        predictor.warmup(lambda n: (np.zeros((n, len(FEATURE_ORDER)), dtype=np.float32),))
+        logger.info(f"MLP warmup done for batch sizes {list(MLP_BATCH_BUCKETS)}")
+    except Exception as e:
+        logger.warning(f"MLP warmup failed: {e}")
+    mlp_model, mlp_predictor = model, predictor
 
-        if mlp_model is None:
-            logger.info("Loading MLP model...")
-            mlp_model = load_model(MLP_MODEL_PATH, compile=False)
-            logger.info("MLP model loaded")
-            try:
-                mlp_model.predict(np.zeros((1, len(FEATURE_ORDER))), verbose=0)
-                logger.info("MLP warmup done")
-            except Exception as e:
-                logger.warning(f"MLP warmup failed: {e}")
+def unload_mlp_model():
+    global mlp_model, mlp_predictor
+    mlp_model = mlp_predictor = None
 
-        if preprocessor is None:
-            logger.info("Loading Preprocessor...")
-            try:
-                preprocessor = joblib.load(PREPROCESSOR_PATH)
-                logger.info("Preprocessor loaded successfully")
-            except Exception as e:
-                logger.warning(f"Failed to load preprocessor: {e}")
-                logger.info("Creating fallback preprocessor...")
-                # Create a simple fallback preprocessor
-                from sklearn.preprocessing import StandardScaler
-                preprocessor = StandardScaler()
-                # Fit with dummy data matching our feature count
-                dummy_data = np.random.random((10, len(FEATURE_ORDER)))
-                preprocessor.fit(dummy_data)
-                logger.info("Fallback preprocessor created")
-
-        if meta_model is None:
-            logger.info("Loading Meta model...")
-            meta_model = joblib.load(META_MODEL_PATH)
-            logger.info("Meta model loaded")
+def load_preprocessor():
+    global preprocessor, feature_transform
+    logger.info("Loading Preprocessor...")
+    try:
+        import joblib
 
+        loaded = joblib.load(PREPROCESSOR_PATH)
+        logger.info("Preprocessor loaded successfully")
     except Exception as e:
-        logger.error(f"Model loading failed: {e}")
-        raise e
+        logger.warning(f"Failed to load preprocessor: {e}")
+        logger.info("Creating fallback preprocessor...")
+        # Create a simple fallback preprocessor
+        from sklearn.preprocessing import StandardScaler
+        loaded = StandardScaler()
+        # Fit with dummy data matching our feature count
+        dummy_data = np.random.random((10, len(FEATURE_ORDER)))
+        loaded.fit(dummy_data)
+        logger.info("Fallback preprocessor created")
+
+    if COMPILED_FEATURES:
+        feature_transform = compile_preprocessor(loaded, FEATURE_ORDER)
+    else:
+        feature_transform = SklearnPreprocessor(loaded, FEATURE_ORDER, reason="disabled")
+    preprocessor = loaded
+
+def unload_preprocessor():
+    global preprocessor, feature_transform
+    preprocessor = feature_transform = None
+
+def load_meta_model():
+    global meta_model
+    logger.info("Loading Meta model...")
+    import joblib
+
+    meta_model = joblib.load(META_MODEL_PATH)
+    logger.info("Meta model loaded")
+
+def unload_meta_model():
+    global meta_model
+    meta_model = None
+
+models = ModelRegistry(idle_seconds=MODEL_IDLE_UNLOAD_S, memory_budget_mb=MODEL_MEMORY_BUDGET_MB)
+models.register("cnn", load_cnn_model, unload_cnn_model)
+models.register("cnn_fast", load_cnn_fast_model, unload_cnn_fast_model)
+models.register("mlp", load_mlp_model, unload_mlp_model)
+models.register("preprocessor", load_preprocessor, unload_preprocessor)
+# Not used by any endpoint yet - loaded only when asked for
+models.register("meta", load_meta_model, unload_meta_model)
+
+# What each kind of endpoint needs
+TABULAR_MODELS = ("mlp", "preprocessor")
+# Handwriting endpoints: CNN_TIER_MODELS[tier]
+
+def load_models_if_needed(names=None):
+    """Blocking: load ``names`` (default: NEURO_PRELOAD_MODELS) in parallel - raises if any failed"""
+    errors = models.preload(PRELOAD_MODELS if names is None else names)
+    if errors:
+        raise RuntimeError("Model loading failed: " + ", ".join(f"{name}: {e}" for name, e in errors.items()))
+
+# -------------------
+# Inference pool - blocking model work runs here, never on the event loop
+# -------------------
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="neuro-inference")
+
+async def run_inference(fn, *args):
+    """Await a blocking call (model load, decode, TensorFlow) on the inference pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, functools.partial(fn, *args))
+
+# MLP and preprocessing get their own pool, so tabular requests (and the clinical half of an
+# ensemble) never queue behind image decoding and CNN forward passes
+tabular_executor = ThreadPoolExecutor(max_workers=TABULAR_WORKERS, thread_name_prefix="neuro-tabular")
+
+async def run_tabular(fn, *args):
+    """Await a blocking MLP / preprocessing call on the tabular pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tabular_executor, functools.partial(fn, *args))
+
+bulk_executor = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="neuro-bulk")
+
+async def run_bulk(fn, *args):
+    """Await a bulk scoring call (a whole batch or stream chunk) on the bulk pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(bulk_executor, functools.partial(fn, *args))
+
+async def ensure_models_loaded(*names):
+    """Load the models an endpoint needs on the inference pool - just marks them used once loaded"""
+    if all(models.is_loaded(name) for name in names):
+        models.touch(*names)
+        return
+    await run_inference(models.ensure, *names)
+
+async def evict_idle_models():
+    """Background sweep: unload models idle past NEURO_MODEL_IDLE_UNLOAD_S while over the memory budget"""
+    interval = min(max(MODEL_IDLE_UNLOAD_S / 4, 1.0), 30.0)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_inference(models.evict_idle)
+        except Exception as e:
+            logger.warning(f"Idle model sweep failed: {e}")
 
 # -------------------
 # Feature extraction functions - CRITICAL FOR PREDICTIONS
@@ -239,21 +539,49 @@ def preprocess_image_custom(img_array):
     normalized = img_array / 255.0
     return normalized.astype(np.float32)
 
+def gradio_probs_to_result(pred_row):
+    """Map one row of CNN probabilities to {class label: probability}"""
+    result = {}
+    for i in range(len(class_labels)):
+        result[class_labels[i]] = float(pred_row[i])
+    return result
+
+def gradio_method1_pixels(img: Image.Image):
+    """Method 1 pixels - RGB, LANCZOS resize (uint8 HxWx3)"""
+    # Ensure RGB and resize
+    img = img.convert("RGB")
+    img = img.resize((img_width, img_height), Image.Resampling.LANCZOS)
+    return np.asarray(img, dtype=np.uint8)
+
+def gradio_method2_pixels(img: Image.Image):
+    """Method 2 pixels - Grayscale → RGB, default resize (uint8 HxWx3)"""
+    # Convert to grayscale if it's a handwriting classifier
+    img_gray = img.convert("L")
+    img_rgb = Image.merge("RGB", (img_gray, img_gray, img_gray))
+    img_rgb = img_rgb.resize((img_width, img_height))
+    return np.asarray(img_rgb, dtype=np.uint8)
+
+def gradio_method3_pixels(img: Image.Image):
+    """Method 3 pixels - RGB, default resize (uint8 HxWx3)"""
+    img = img.convert("RGB")
+    img = img.resize((img_width, img_height))
+    return np.asarray(img, dtype=np.uint8)
+
+# (name, pixel builder, divisor applied before the CNN) - 255 = 0-1 normalization, 1 = raw pixels
+GRADIO_METHODS = [
+    ("method1", gradio_method1_pixels, 255.0),
+    ("method2", gradio_method2_pixels, 255.0),
+    ("method3", gradio_method3_pixels, 1.0),
+]
+
 def predict_gradio_method1(img: Image.Image):
     """EXACT Method 1 from Gradio - Custom Normalization"""
     if img is None:
         return {"Error": 1.0}
 
     try:
-        # Ensure RGB and resize
-        img = img.convert("RGB")
-        img = img.resize((img_width, img_height), Image.Resampling.LANCZOS)
-
-        # Convert to array
-        img_array = np.array(img, dtype=np.float32)
-
-        # Add batch dimension
-        img_array = np.expand_dims(img_array, axis=0)
+        # Convert to array and add batch dimension
+        img_array = np.expand_dims(gradio_method1_pixels(img).astype(np.float32), axis=0)
 
         # CRITICAL: Use custom preprocessing instead of ConvNeXt preprocessing
         img_array = preprocess_image_custom(img_array)
@@ -262,7 +590,7 @@ def predict_gradio_method1(img: Image.Image):
         logger.info(f"📊 Input stats - Min: {np.min(img_array):.3f}, Max: {np.max(img_array):.3f}, Mean: {np.mean(img_array):.3f}")
 
         # Predict
-        pred_probs = cnn_model.predict(img_array, verbose=0)
+        pred_probs = cnn_predictor(img_array)
         logger.info(f"🔮 Raw predictions: {pred_probs[0]}")
 
         # Get predicted class
@@ -270,11 +598,7 @@ def predict_gradio_method1(img: Image.Image):
         logger.info(f"🎯 Predicted class: {class_labels[pred_class_idx]}")
 
         # Return probabilities for both classes
-        result = {}
-        for i in range(len(class_labels)):
-            result[class_labels[i]] = float(pred_probs[0][i])
-
-        return result
+        return gradio_probs_to_result(pred_probs[0])
 
     except Exception as e:
         logger.error(f"❌ Error in prediction method 1: {str(e)}")
@@ -286,24 +610,13 @@ def predict_gradio_method2(img: Image.Image):
         return {"Error": 1.0}
 
     try:
-        # Convert to grayscale if it's a handwriting classifier
-        img_gray = img.convert("L")
-        img_rgb = Image.merge("RGB", (img_gray, img_gray, img_gray))
-        img_rgb = img_rgb.resize((img_width, img_height))
-
-        img_array = np.array(img_rgb, dtype=np.float32)
-        img_array = np.expand_dims(img_array, axis=0)
+        img_array = np.expand_dims(gradio_method2_pixels(img).astype(np.float32), axis=0)
 
         # Simple 0-1 normalization
         img_array = img_array / 255.0
 
-        pred_probs = cnn_model.predict(img_array, verbose=0)
-
-        result = {}
-        for i in range(len(class_labels)):
-            result[class_labels[i]] = float(pred_probs[0][i])
-
-        return result
+        pred_probs = cnn_predictor(img_array)
+        return gradio_probs_to_result(pred_probs[0])
 
     except Exception as e:
         logger.error(f"❌ Error in prediction method 2: {str(e)}")
@@ -315,106 +628,357 @@ def predict_gradio_method3(img: Image.Image):
         return {"Error": 1.0}
 
     try:
-        img = img.convert("RGB")
-        img = img.resize((img_width, img_height))
-        img_array = np.array(img, dtype=np.float32)
-        img_array = np.expand_dims(img_array, axis=0)
-
         # NO preprocessing - raw pixel values
-        pred_probs = cnn_model.predict(img_array, verbose=0)
-
-        result = {}
-        for i in range(len(class_labels)):
-            result[class_labels[i]] = float(pred_probs[0][i])
+        img_array = np.expand_dims(gradio_method3_pixels(img).astype(np.float32), axis=0)
 
-        return result
+        pred_probs = cnn_predictor(img_array)
+        return gradio_probs_to_result(pred_probs[0])
 
     except Exception as e:
         logger.error(f"❌ Error in prediction method 3: {str(e)}")
         return {"Error": 1.0}
 
+def build_tta_batch(img: Image.Image):
+    """Fused TTA input - decode once, all three Gradio variants as one uint8 (3, H, W, 3) batch.
+
+    The upload is decoded to RGB once (image_ingest.py). Method 2's grayscale is
+    taken from the resized method 3 pixels instead of the full-resolution image,
+    which matches the sequential methods to within one grey level (see
+    check_tta_parity.py).
+    """
+    rgb = decode_rgb(img, (img_width, img_height), draft=IMAGE_DRAFT)
+    images = np.stack(tta_pixels(rgb, (img_width, img_height), IMAGE_RESIZE_BACKEND))
+    divisors = np.array([[divisor] for _, _, divisor in GRADIO_METHODS], dtype=np.float32)
+    return images, divisors
+
+def build_tta_batch_sequential(img: Image.Image):
+    """Exact Gradio pixels - every method converts and resizes the upload on its own"""
+    images, divisors = [], []
+    for name, build_pixels, divisor in GRADIO_METHODS:
+        try:
+            images.append(build_pixels(img))
+            divisors.append([divisor])
+        except Exception as e:
+            logger.error(f"❌ Error preparing {name} input: {e}")
+    if not images:
+        return None, None
+    return np.stack(images), np.array(divisors, dtype=np.float32)
+
+def predict_gradio_fused(img: Image.Image):
+    """All three Gradio methods in ONE forward pass"""
+    try:
+        images, divisors = build_tta_batch(img)
+        pred_probs = cnn_tta_predictor(images, divisors)
+        return [gradio_probs_to_result(row) for row in pred_probs]
+
+    except Exception as e:
+        logger.error(f"❌ Error in fused TTA prediction: {str(e)}")
+        return [{"Error": 1.0}]
+
+def load_image_input(image_input, draft=None):
+    """Decode an upload (PIL image, file-like object or numpy array) ONCE into an RGB PIL Image.
+
+    ``draft`` (default: NEURO_IMAGE_DRAFT in fused mode) decodes JPEGs at reduced resolution. The
+    sequential mode is the exact Gradio reference, so it always decodes at full resolution.
+    """
+    if draft is None:
+        draft = IMAGE_DRAFT and CNN_TTA_MODE == "fused"
+    img = open_upload(image_input)
+    full_size = img.size
+    rgb = decode_rgb(img, (img_width, img_height), draft=draft)
+    logger.info(f"✅ Decoded upload once: {full_size} → {rgb.size} pixels")
+    return rgb
+
+def combine_gradio_results(results):
+    """Average the valid per-method results into (prediction, confidence, probs)"""
+    # Intelligent combination - choose best result
+    valid_results = [r for r in results if "Error" not in r]
+
+    if not valid_results:
+        return 0, 0.5, [0.5, 0.5]
+
+    # Average the valid results
+    combined_result = {}
+    for class_key in class_labels.values():
+        combined_result[class_key] = np.mean([r[class_key] for r in valid_results if class_key in r])
+
+    # Convert to expected format - FIXED LABELS
+    probs = [combined_result["Non-Dementia"], combined_result["Dementia"]]
+    prediction = int(np.argmax(probs))
+    confidence = float(np.max(probs))
+
+    return prediction, confidence, probs
+
+def tta_confident(results, threshold=None):
+    """Early exit: the variants evaluated so far agree on the class and their averaged confidence reaches threshold"""
+    threshold = CNN_EARLY_EXIT_CONFIDENCE if threshold is None else threshold
+    valid_results = [r for r in results if "Error" not in r]
+    if threshold <= 0 or not valid_results:
+        return False
+    votes = {max(r, key=r.get) for r in valid_results}
+    return len(votes) == 1 and combine_gradio_results(valid_results)[1] >= threshold
+
+# Handwriting classifications and the TTA variants they evaluated - early-exit savings in /metrics
+tta_counts = {"requests": 0, "variants": 0}
+
+def record_tta_variants(variants):
+    tta_counts["requests"] += 1
+    tta_counts["variants"] += variants
+
+def predict_gradio_staged(img: Image.Image):
+    """Fused TTA inputs with early exit - one variant per forward pass until tta_confident"""
+    try:
+        images, divisors = build_tta_batch(img)
+        results = []
+        for i in range(len(images)):
+            results.append(gradio_probs_to_result(cnn_tta_predictor(images[i:i + 1], divisors[i:i + 1])[0]))
+            if tta_confident(results):
+                break
+        return results
+
+    except Exception as e:
+        logger.error(f"❌ Error in staged TTA prediction: {str(e)}")
+        return [{"Error": 1.0}]
+
 def predict_cnn_enhanced(image_input):
-    """Enhanced CNN prediction with EXACT Gradio multi-method preprocessing"""
+    """Enhanced CNN prediction with EXACT Gradio multi-method preprocessing -> (prediction, confidence, probs, variants)"""
     try:
-        # Handle different input types - COMPREHENSIVE
-        if isinstance(image_input, Image.Image):
-            # Already PIL Image - perfect!
-            img = image_input
-            logger.info("✅ Input is PIL Image")
-        elif hasattr(image_input, 'read'):
-            # File-like object
-            img = Image.open(image_input)
-            logger.info("✅ Converted file-like object to PIL Image")
-        elif isinstance(image_input, np.ndarray):
-            # Numpy array from OpenCV
-            if len(image_input.shape) == 4:
-                image_input = image_input[0]  # Remove batch dimension
-            # Ensure RGB format and proper data type
-            if image_input.max() <= 1.0:
-                image_input = (image_input * 255).astype(np.uint8)
-            img = Image.fromarray(image_input.astype(np.uint8))
-            logger.info("✅ Converted numpy array to PIL Image")
+        img = load_image_input(image_input)
+
+        if CNN_TTA_MODE == "fused":
+            results = predict_gradio_staged(img) if CNN_EARLY_EXIT_CONFIDENCE > 0 else predict_gradio_fused(img)
         else:
-            # Try to convert to PIL Image
-            img = Image.fromarray(np.array(image_input).astype(np.uint8))
-            logger.info("✅ Converted unknown type to PIL Image")
-
-        # Try all 3 methods from Gradio
-        result1 = predict_gradio_method1(img)
-        result2 = predict_gradio_method2(img)
-        result3 = predict_gradio_method3(img)
-        
-        # Intelligent combination - choose best result
-        results = [result1, result2, result3]
-        valid_results = [r for r in results if "Error" not in r]
-        
-        if not valid_results:
-            return 0, 0.5, [0.5, 0.5]
-        
-        # Average the valid results
-        combined_result = {}
-        for class_key in class_labels.values():
-            combined_result[class_key] = np.mean([r[class_key] for r in valid_results if class_key in r])
-        
-        # Convert to expected format - FIXED LABELS
-        probs = [combined_result["Non-Dementia"], combined_result["Dementia"]]
-        prediction = int(np.argmax(probs))
-        confidence = float(np.max(probs))
-        
-        return prediction, confidence, probs
-            
+            # Try the 3 methods from Gradio in order - the later ones only until the early exit applies
+            results = []
+            for predict_method in (predict_gradio_method1, predict_gradio_method2, predict_gradio_method3):
+                results.append(predict_method(img))
+                if tta_confident(results):
+                    break
+
+        record_tta_variants(len(results))
+        return (*combine_gradio_results(results), len(results))
+
     except Exception as e:
         logger.error(f"Enhanced CNN prediction failed: {e}")
-        return 0, 0.5, [0.5, 0.5]
+        return 0, 0.5, [0.5, 0.5], 0
+
+def prepare_tta_inputs(image_input):
+    """Decode an upload into the (images, divisors) TTA batch for the configured mode"""
+    img = load_image_input(image_input)
+    if CNN_TTA_MODE == "fused":
+        return build_tta_batch(img)
+    return build_tta_batch_sequential(img)
+
+def _cnn_predict_batch(images, divisors):
+    """One CNN forward pass over TTA batches stacked by the micro-batcher"""
+    return cnn_tta_predictor(images, divisors)
+
+def _cnn_fast_predict_batch(images, divisors):
+    """One student CNN forward pass over stacked TTA batches (fast tier)"""
+    return cnn_fast_tta_predictor(images, divisors)
+
+cnn_batcher = MicroBatcher(
+    _cnn_predict_batch,
+    max_batch_size=CNN_BATCH_MAX_SIZE,
+    max_wait_ms=CNN_BATCH_MAX_WAIT_MS,
+    name="cnn_batcher",
+    executor=inference_executor,
+)
+
+# The tiers never share a forward pass - each has its own queue
+cnn_fast_batcher = MicroBatcher(
+    _cnn_fast_predict_batch,
+    max_batch_size=CNN_BATCH_MAX_SIZE,
+    max_wait_ms=CNN_BATCH_MAX_WAIT_MS,
+    name="cnn_fast_batcher",
+    executor=inference_executor,
+)
+CNN_TIER_BATCHERS = {"accurate": cnn_batcher, "fast": cnn_fast_batcher}
+
+def tier_tta_predictor(tier):
+    """The loaded fused TTA predictor of a handwriting tier"""
+    return cnn_fast_tta_predictor if tier == "fast" else cnn_tta_predictor
+
+def tier_unavailable(tier):
+    """Why ``tier`` cannot be served as an error message, or None"""
+    if tier not in CNN_TIER_MODELS:
+        return f"Unknown tier {tier!r} - expected one of {list(CNN_TIER_MODELS)}"
+    if tier == "fast" and not CNN_FAST_AVAILABLE:
+        return (f"Fast tier model {CNN_FAST_PATH} not found at startup - train it with "
+                f"python distill_cnn.py <images> and restart the API")
+    return None
+
+async def predict_cnn_enhanced_batched(image_input, max_variants=None, tier="accurate"):
+    """predict_cnn_enhanced through the CNN batching queue.
+
+    The TTA variants of this upload are queued together and share a forward
+    pass with the variants of other concurrent uploads. ``max_variants`` keeps
+    only the first TTA variants (degraded quality under load). ``tier``
+    "fast" classifies with the distilled student CNN.
+    """
+    if not CNN_BATCHING_ENABLED and max_variants is None and tier == "accurate":
+        return await run_inference(predict_cnn_enhanced, image_input)
+
+    try:
+        # Decoding and resizing are CPU work too - keep them off the event loop
+        images, divisors = await run_inference(prepare_tta_inputs, image_input)
+        if images is None:
+            return 0, 0.5, [0.5, 0.5], 0
+
+        return await classify_tta_inputs(images[:max_variants], divisors[:max_variants], tier)
+
+    except Exception as e:
+        logger.error(f"Batched CNN prediction failed: {e}")
+        return 0, 0.5, [0.5, 0.5], 0
+
+async def classify_tta_inputs(images, divisors, tier="accurate"):
+    """One prepared TTA batch -> combined (prediction, confidence, probs, variants evaluated); raises on failure.
+
+    With NEURO_CNN_EARLY_EXIT the variants are submitted one at a time, stopping once tta_confident.
+    """
+    if CNN_EARLY_EXIT_CONFIDENCE > 0:
+        stages = [slice(i, i + 1) for i in range(len(images))]
+    else:
+        stages = [slice(0, len(images))]
+    results = []
+    for rows in stages:
+        if CNN_BATCHING_ENABLED:
+            pred_probs = await CNN_TIER_BATCHERS[tier].submit((images[rows], divisors[rows]))
+        else:
+            pred_probs = await run_inference(tier_tta_predictor(tier), images[rows], divisors[rows])
+        results.extend(gradio_probs_to_result(row) for row in pred_probs)
+        if tta_confident(results):
+            break
+    record_tta_variants(len(results))
+    return (*combine_gradio_results(results), len(results))
+
+def cnn_cache_version():
+    """Identifies the handwriting model and image decoding results were computed with - stable across restarts"""
+    return json.dumps([CNN_BACKEND, CNN_TTA_MODE, CNN_EARLY_EXIT_CONFIDENCE, IMAGE_DRAFT, IMAGE_RESIZE_BACKEND,
+                       *file_signature(CNN_MODEL_PATHS[CNN_BACKEND])])
+
+cnn_cache = TieredCache(
+    PredictionCache(
+        max_entries=CNN_CACHE_MAX_ENTRIES,
+        ttl_seconds=CNN_CACHE_TTL_S,
+        version_fn=cnn_cache_version,
+        name="cnn_cache",
+    ),
+    DiskResultCache(CNN_CACHE_DIR, cnn_cache_version) if CNN_CACHE_ENABLED and CNN_CACHE_DIR else None,
+)
+
+def cnn_fast_cache_version():
+    return json.dumps(["fast", CNN_FAST_BACKEND, CNN_TTA_MODE, CNN_EARLY_EXIT_CONFIDENCE, IMAGE_DRAFT, IMAGE_RESIZE_BACKEND,
+                       *file_signature(CNN_FAST_PATH)])
+
+# Fast-tier results are cached apart from the ConvNeXt's - the same image_key has one result per tier
+cnn_fast_cache = TieredCache(
+    PredictionCache(
+        max_entries=CNN_CACHE_MAX_ENTRIES,
+        ttl_seconds=CNN_CACHE_TTL_S,
+        version_fn=cnn_fast_cache_version,
+        name="cnn_fast_cache",
+    ),
+    DiskResultCache(os.path.join(CNN_CACHE_DIR, "fast"), cnn_fast_cache_version)
+    if CNN_CACHE_ENABLED and CNN_CACHE_DIR else None,
+)
+CNN_TIER_CACHES = {"accurate": cnn_cache, "fast": cnn_fast_cache}
+
+def pixel_key(images, divisors):
+    """Content address of the decoded, resized TTA inputs - matches re-encoded copies of the same scan"""
+    return content_key(np.ascontiguousarray(images).tobytes() + np.asarray(divisors).tobytes(), prefix="pixels")
+
+async def predict_cnn_cached(image_data, max_variants=None, tier="accurate"):
+    """predict_cnn_enhanced_batched behind the image cache -> (image_key, (prediction, confidence, probs, variants)).
+
+    ``image_data`` is the upload as bytes or a pooled memoryview; it is hashed and decoded in place.
+    Results computed with ``max_variants`` (degraded quality) are served but never cached.
+    ``tier`` picks the model and the cache ("accurate" ConvNeXt or "fast" student).
+    """
+    image_key = await run_inference(content_key, image_data)
+    if not CNN_CACHE_ENABLED:
+        await ensure_models_loaded(CNN_TIER_MODELS[tier])
+        return image_key, await predict_cnn_enhanced_batched(BufferReader(image_data), max_variants, tier)
+
+    cache = CNN_TIER_CACHES[tier]
+    cached = await run_inference(cache.get, image_key)
+    if cached is not None:
+        pred, conf, probs, variants = cached
+        return image_key, (pred, conf, list(probs), variants)
+
+    await ensure_models_loaded(CNN_TIER_MODELS[tier])
+    try:
+        images, divisors = await run_inference(prepare_tta_inputs, BufferReader(image_data))
+        if images is None:
+            return image_key, (0, 0.5, [0.5, 0.5], 0)
+
+        keys = [image_key]
+        if CNN_CACHE_PIXEL_KEYS:
+            keys.append(await run_inference(pixel_key, images, divisors))
+            cached = await run_inference(cache.get, keys[1])
+            if cached is not None:
+                await run_inference(cache.put, image_key, cached)
+                pred, conf, probs, variants = cached
+                return image_key, (pred, conf, list(probs), variants)
+
+        pred, conf, probs, variants = await classify_tta_inputs(images[:max_variants], divisors[:max_variants], tier)
+        if max_variants is None:
+            for key in keys:
+                await run_inference(cache.put, key, (pred, conf, list(probs), variants))
+        return image_key, (pred, conf, probs, variants)
+
+    except Exception as e:
+        logger.error(f"Cached CNN prediction failed: {e}")
+        return image_key, (0, 0.5, [0.5, 0.5], 0)
+
+async def cached_cnn_result(image_key, tier="accurate"):
+    """A previously computed handwriting result of ``tier`` by image_key, or None"""
+    if not CNN_CACHE_ENABLED:
+        return None
+    cached = await run_inference(CNN_TIER_CACHES[tier].get, image_key)
+    if cached is None:
+        return None
+    pred, conf, probs, variants = cached
+    return pred, conf, list(probs), variants
 
 # -------------------
 # Prediction functions
 # -------------------
+def ordered_feature_row(features_dict):
+    """Raw (1, 36) feature row in FEATURE_ORDER - missing features default to 0"""
+    # Ensure all features are present and in correct order
+    ordered_features = []
+    for feature_name in FEATURE_ORDER:
+        if feature_name in features_dict:
+            ordered_features.append(float(features_dict[feature_name]))
+        else:
+            # Use default values for missing features
+            logger.warning(f"Missing feature {feature_name}, using default value 0")
+            ordered_features.append(0.0)
+    return np.array(ordered_features).reshape(1, -1)
+
 def safe_preprocess_features(features_dict):
     """Safely preprocess features with fallback options"""
     try:
-        # Ensure all features are present and in correct order
-        ordered_features = []
-        for feature_name in FEATURE_ORDER:
-            if feature_name in features_dict:
-                ordered_features.append(float(features_dict[feature_name]))
-            else:
-                # Use default values for missing features
-                logger.warning(f"Missing feature {feature_name}, using default value 0")
-                ordered_features.append(0.0)
-        
-        # Convert to pandas DataFrame
-        df_input = pd.DataFrame([ordered_features], columns=FEATURE_ORDER)
-        
-        # Try to transform with loaded preprocessor
+        return safe_preprocess_matrix(ordered_feature_row(features_dict))
+
+    except Exception as e:
+        logger.error(f"Feature preprocessing failed completely: {e}")
+        # Last resort: return zeros
+        return np.zeros((1, len(FEATURE_ORDER)))
+
+def safe_preprocess_matrix(features_matrix):
+    """Preprocess an (N, 36) matrix in FEATURE_ORDER with the same fallbacks as safe_preprocess_features"""
+    try:
+        # Try to transform with loaded preprocessor (compiled numpy or the sklearn DataFrame path)
         try:
-            features_processed = preprocessor.transform(df_input)
+            features_processed = feature_transform.transform(features_matrix)
             return features_processed
         except Exception as e:
             logger.warning(f"Preprocessor transform failed: {e}")
             # Fallback: simple standardization
             logger.info("Using fallback standardization")
-            features_array = np.array(ordered_features).reshape(1, -1)
+            features_array = np.asarray(features_matrix, dtype=np.float64).reshape(-1, len(FEATURE_ORDER))
             # Simple z-score normalization for 36 features
             mean_vals = np.array([50, 0.5, 0.5, 1, 25, 0.3, 5, 3, 5, 7, 0.3, 0.3, 0.3, 0.3, 0.1, 0.4, 
                                 120, 80, 200, 100, 50, 150, 25, 7, 0.3, 0.2, 7, 0.2, 0.2, 0.1, 0.1, 0.2,
@@ -429,40 +993,332 @@ def safe_preprocess_features(features_dict):
     except Exception as e:
         logger.error(f"Feature preprocessing failed completely: {e}")
         # Last resort: return zeros
-        return np.zeros((1, len(FEATURE_ORDER)))
+        return np.zeros((len(features_matrix), len(FEATURE_ORDER)))
 
-def predict_mlp(features_dict):
+def preprocess_rows(features_matrix):
+    """feature_transform over an (N, 36) matrix -> (processed rows, their positions, {position: error}).
+    When the batch transform fails, rows are retried one at a time so only the offending rows fail"""
+    features_matrix = np.asarray(features_matrix)
     try:
-        features_processed = safe_preprocess_features(features_dict)
-        logger.info(f"🔍 DEBUG: Features shape: {features_processed.shape}")
-        logger.info(f"🔍 DEBUG: Features sample: {features_processed[0][:5]}...")  # First 5 values
-        
-        raw = mlp_model.predict(features_processed, verbose=0)
-        logger.info(f"🔍 DEBUG: Raw model output: {raw}")
-        logger.info(f"🔍 DEBUG: Raw output shape: {raw.shape}")
+        return feature_transform.transform(features_matrix), np.arange(len(features_matrix)), {}
+    except Exception as e:
+        if len(features_matrix) == 1:
+            return None, np.arange(0), {0: str(e)}
+        logger.warning(f"Preprocessing {len(features_matrix)} rows failed ({e}) - retrying row by row")
+    processed, positions, failed = [], [], {}
+    for position in range(len(features_matrix)):
+        try:
+            processed.append(feature_transform.transform(features_matrix[position:position + 1]))
+            positions.append(position)
+        except Exception as e:
+            failed[position] = str(e)
+    processed = np.concatenate(processed) if processed else None
+    return processed, np.array(positions, dtype=int), failed
+
+def mlp_output_to_prediction(raw):
+    """Turn one row of MLP output (sigmoid or softmax) into (prediction, confidence, probs)"""
+    raw = np.asarray(raw).reshape(1, -1)
+    logger.info(f"🔍 DEBUG: Raw model output: {raw}")
+    logger.info(f"🔍 DEBUG: Raw output shape: {raw.shape}")
+
+    if raw.shape[-1] == 1:  # sigmoid
+        p = float(raw[0][0])
+        probs = np.array([1.0 - p, p])
+        logger.info(f"🔍 DEBUG: Sigmoid output - p={p}, probs={probs}")
+    else:  # softmax
+        probs = np.array(raw[0])
+        logger.info(f"🔍 DEBUG: Softmax output - probs={probs}")
+
+    prediction = int(np.argmax(probs))
+    confidence = float(np.max(probs))
+
+    logger.info(f"🔍 DEBUG: Final prediction={prediction}, confidence={confidence}")
+
+    return prediction, confidence, probs.tolist()
+
+def mlp_outputs_to_probs(raw):
+    """(N, 1) sigmoid or (N, K) softmax MLP output -> (N, K>=2) class probabilities"""
+    raw = np.asarray(raw).reshape(len(raw), -1)
+    if raw.shape[-1] == 1:  # sigmoid
+        p = raw[:, 0].astype(np.float64)
+        return np.stack([1.0 - p, p], axis=1)
+    return raw  # softmax
+
+def mlp_outputs_to_predictions(raw):
+    """mlp_output_to_prediction for every row of an (N, 1) sigmoid or (N, K) softmax output"""
+    probs = mlp_outputs_to_probs(raw)
+    predictions = np.argmax(probs, axis=1)
+    confidences = np.max(probs, axis=1)
+    return [
+        (int(prediction), float(confidence), row.tolist())
+        for prediction, confidence, row in zip(predictions, confidences, probs)
+    ]
+
+def mlp_forward(features_dict):
+    """Preprocess + one MLP call for a single patient (raises on failure)"""
+    features_processed = safe_preprocess_features(features_dict)
+    logger.info(f"🔍 DEBUG: Features shape: {features_processed.shape}")
+    logger.info(f"🔍 DEBUG: Features sample: {features_processed[0][:5]}...")  # First 5 values
+
+    raw = mlp_predictor(features_processed)
+    return mlp_output_to_prediction(raw[0])
+
+def mlp_cache_version():
+    """Changes when the MLP/preprocessor files are replaced or the models are reloaded"""
+    return (
+        file_signature(MLP_MODEL_PATHS[MLP_BACKEND]),
+        file_signature(PREPROCESSOR_PATH),
+        id(mlp_predictor),
+        id(feature_transform),
+    )
+
+mlp_cache = PredictionCache(
+    max_entries=MLP_CACHE_MAX_ENTRIES,
+    ttl_seconds=MLP_CACHE_TTL_S,
+    version_fn=mlp_cache_version,
+    name="mlp_cache",
+)
 
-        if raw.shape[-1] == 1:  # sigmoid
-            p = float(raw[0][0])
-            probs = np.array([1.0 - p, p])
-            logger.info(f"🔍 DEBUG: Sigmoid output - p={p}, probs={probs}")
-        else:  # softmax
-            probs = np.array(raw[0])
-            logger.info(f"🔍 DEBUG: Softmax output - probs={probs}")
+def mlp_cache_lookup(features_dict):
+    """(cache key, cached (prediction, confidence, probs) or None) - key is None when the cache is off"""
+    if not MLP_CACHE_ENABLED:
+        return None, None
+    try:
+        key = feature_key(features_dict, FEATURE_ORDER)
+    except (AttributeError, TypeError, ValueError):
+        # Malformed features (non-numeric values, not an object) are never cached - the
+        # prediction paths fall back for them as before
+        return None, None
+    cached = mlp_cache.get(key)
+    if cached is None:
+        return key, None
+    pred, conf, probs = cached
+    return key, (pred, conf, list(probs))
+
+def mlp_cache_store(key, result):
+    if key is not None:
+        pred, conf, probs = result
+        mlp_cache.put(key, (pred, conf, tuple(probs)))
+
+def predict_mlp(features_dict):
+    key, cached = mlp_cache_lookup(features_dict)
+    if cached is not None:
+        return cached
+    try:
+        result = mlp_forward(features_dict)
+        mlp_cache_store(key, result)
+        return result
 
-        prediction = int(np.argmax(probs))
-        confidence = float(np.max(probs))
-        
-        logger.info(f"🔍 DEBUG: Final prediction={prediction}, confidence={confidence}")
-        
-        return prediction, confidence, probs.tolist()
-        
     except Exception as e:
         logger.error(f"MLP prediction failed: {e}")
         return 0, 0.5, [0.5, 0.5]
 
+def _mlp_predict_batch(batch):
+    """Preprocessing and one MLP forward pass over raw rows stacked by the micro-batcher.
+    Rows the preprocessor rejects get the fallback they would get alone, in a separate pass,
+    so one bad request never changes the inputs of the requests batched with it"""
+    processed, positions, failed = preprocess_rows(batch)
+    if not failed:
+        return mlp_predictor(processed)
+    failed_positions = np.array(sorted(failed), dtype=int)
+    raw_failed = np.asarray(mlp_predictor(safe_preprocess_matrix(batch[failed_positions])))
+    raw = np.empty((len(batch),) + raw_failed.shape[1:], dtype=raw_failed.dtype)
+    raw[failed_positions] = raw_failed
+    if len(positions):
+        raw[positions] = np.asarray(mlp_predictor(processed))
+    return raw
+
+mlp_batcher = MicroBatcher(
+    _mlp_predict_batch,
+    max_batch_size=MLP_BATCH_MAX_SIZE,
+    max_wait_ms=MLP_BATCH_MAX_WAIT_MS,
+    name="mlp_batcher",
+    executor=tabular_executor,
+)
+
+async def predict_mlp_batched(features_dict):
+    """predict_mlp through the prediction cache and the micro-batcher - concurrent requests share one model call"""
+    key, cached = mlp_cache_lookup(features_dict)
+    if cached is not None:
+        return cached
+
+    try:
+        if MLP_BATCHING_ENABLED:
+            # Only the cheap row assembly runs on the event loop - the batch is preprocessed on the tabular pool
+            raw = await mlp_batcher.submit(ordered_feature_row(features_dict))
+            result = mlp_output_to_prediction(raw[0])
+        else:
+            result = await run_tabular(mlp_forward, features_dict)
+        mlp_cache_store(key, result)
+        return result
+
+    except Exception as e:
+        logger.error(f"Batched MLP prediction failed: {e}")
+        return 0, 0.5, [0.5, 0.5]
+
+def validate_patient_records(records):
+    """Validate raw records against PatientFeatures -> (valid indices, (N, 36) matrix, {index: errors})"""
+    valid_indices, rows, errors = [], [], {}
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors[index] = [{"field": None, "message": "Record must be a JSON object"}]
+            continue
+        try:
+            features = PatientFeatures(**record).dict()
+        except ValidationError as e:
+            errors[index] = [
+                {"field": ".".join(str(part) for part in err["loc"]), "message": err["msg"]} for err in e.errors()
+            ]
+            continue
+        valid_indices.append(index)
+        rows.append([features[name] for name in FEATURE_ORDER])
+    matrix = np.array(rows, dtype=np.float64).reshape(-1, len(FEATURE_ORDER))
+    return valid_indices, matrix, errors
+
+def score_patient_records(records, start_index=0):
+    """Validate, preprocess and score many patients with ONE MLP forward pass - one result per record, in order"""
+    valid_indices, matrix, errors = validate_patient_records(records)
+    results = [None] * len(records)
+    for index, item_errors in errors.items():
+        results[index] = {"index": start_index + index, "status": "error", "errors": item_errors}
+
+    if valid_indices:
+        processed, positions, failed = preprocess_rows(matrix)
+        # Rows the preprocessor rejects are reported on their own instead of degrading the batch
+        for position, message in failed.items():
+            index = valid_indices[position]
+            results[index] = {
+                "index": start_index + index,
+                "status": "error",
+                "errors": [{"field": None, "message": f"Preprocessing failed: {message}"}],
+            }
+        scored = [valid_indices[position] for position in positions]
+        predictions = []
+        if scored:
+            try:
+                predictions = mlp_outputs_to_predictions(mlp_predictor(processed))
+            except Exception as e:
+                logger.error(f"Batch MLP prediction failed: {e}")
+                predictions = [(0, 0.5, [0.5, 0.5])] * len(scored)
+        for index, (pred, conf, probs) in zip(scored, predictions):
+            results[index] = {
+                "index": start_index + index,
+                "prediction": pred,
+                "confidence": round(conf, 4),
+                "probs": [round(p, 4) for p in probs],
+                "status": "success",
+            }
+    return results
+
+def parse_stream_lines(lines, fmt, columns=None):
+    """Decode NDJSON or CSV lines into records -> (records, {position: parse error})"""
+    records, parse_errors = [], {}
+    for position, line in enumerate(lines):
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line.decode("utf-8")]))
+                if len(values) != len(columns):
+                    raise ValueError(f"Expected {len(columns)} CSV values, got {len(values)}")
+                record = dict(zip(columns, values))
+            else:
+                record = json.loads(line)
+        except Exception as e:
+            parse_errors[position] = str(e)
+            record = None
+        records.append(record)
+    return records, parse_errors
+
+def score_stream_chunk(lines, fmt, columns, start_index):
+    """Parse and score one chunk of streamed rows -> NDJSON bytes, one result line per row"""
+    # A long stream keeps its models in use (and reloads them if they were evicted meanwhile)
+    models.ensure(*TABULAR_MODELS)
+    records, parse_errors = parse_stream_lines(lines, fmt, columns)
+    results = score_patient_records(records, start_index)
+    for position, message in parse_errors.items():
+        results[position] = {
+            "index": start_index + position,
+            "status": "error",
+            "errors": [{"field": None, "message": f"Unparseable {fmt} row: {message}"}],
+        }
+    failed = sum(1 for r in results if r["status"] == "error")
+    return b"".join(json.dumps(r).encode() + b"\n" for r in results), failed
+
+class RequestStreamingResponse(StreamingResponse):
+    """StreamingResponse whose generator reads the request body while it responds.
+
+    Starlette's StreamingResponse polls receive() for disconnects next to the
+    generator, which would swallow request body chunks. Here the generator
+    owns receive(); request.stream() raises ClientDisconnect if the client
+    goes away mid-upload.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+async def stream_scores(request: Request, fmt):
+    """Read the request body incrementally and yield NDJSON results every STREAM_CHUNK_ROWS rows.
+
+    Only one chunk of input lines and one chunk of results are held at a time;
+    the body is read no faster than the client consumes the results.
+    """
+    buffer = b""
+    columns = None
+    chunk = []
+    rows = failed = 0
+    body = request.stream()
+
+    async def flush():
+        nonlocal rows, failed, chunk
+        payload, chunk_failed = await run_bulk(score_stream_chunk, chunk, fmt, columns, rows)
+        rows += len(chunk)
+        failed += chunk_failed
+        chunk = []
+        return payload
+
+    while True:
+        try:
+            data = await body.__anext__()
+        except StopAsyncIteration:
+            data = None
+        buffer += data or b""
+        lines = buffer.split(b"\n")
+        # Keep the trailing partial line for the next read - unless the body is done
+        buffer = lines.pop() if data is not None else b""
+
+        if len(buffer) > STREAM_MAX_LINE_BYTES:
+            error = f"Row {rows + len(chunk)} exceeds {STREAM_MAX_LINE_BYTES} bytes"
+            yield json.dumps({"status": "error", "error": error}).encode() + b"\n"
+            return
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if fmt == "csv" and columns is None:
+                columns = [name.strip() for name in next(csv.reader([line.decode("utf-8-sig")]))]
+                missing = [name for name in FEATURE_ORDER if name not in columns]
+                if missing:
+                    error = f"CSV header is missing columns: {missing}"
+                    yield json.dumps({"status": "error", "error": error}).encode() + b"\n"
+                    return
+                continue
+            chunk.append(line)
+            if len(chunk) >= STREAM_CHUNK_ROWS:
+                yield await flush()
+
+        if data is None:
+            break
+
+    if chunk:
+        yield await flush()
+    yield json.dumps({"status": "complete", "rows": rows, "succeeded": rows - failed, "failed": failed}).encode() + b"\n"
+
 def predict_cnn(image_array):
     try:
-        probs = cnn_model.predict(image_array, verbose=0)[0]
+        probs = cnn_predictor(image_array)[0]
         probs = np.array(probs).squeeze()
         
         if probs.ndim == 0 or probs.size == 1:
@@ -485,10 +1341,10 @@ def predict_cnn(image_array):
 async def predict_json(features: PatientFeatures):
     try:
         start_time = time.time()
-        load_models_if_needed()
+        await ensure_models_loaded(*TABULAR_MODELS)
         
         features_dict = features.dict()
-        pred, conf, probs = predict_mlp(features_dict)
+        pred, conf, probs = await predict_mlp_batched(features_dict)
         
         processing_time = round(time.time() - start_time, 3)
         
@@ -514,14 +1370,83 @@ async def predict_json(features: PatientFeatures):
             }
         )
 
+@app.post("/predict/batch")
+async def predict_batch(records: List[Any] = Body(...)):
+    """Score a JSON array of PatientFeatures records - invalid records are reported per item"""
+    if not records:
+        return JSONResponse(status_code=400, content={"error": "No records in batch", "status": "error"})
+    if len(records) > BATCH_MAX_RECORDS:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "error": f"Batch of {len(records)} records exceeds the limit of {BATCH_MAX_RECORDS}",
+                "max_batch_size": BATCH_MAX_RECORDS,
+                "status": "error"
+            }
+        )
+    try:
+        start_time = time.time()
+        await ensure_models_loaded(*TABULAR_MODELS)
+
+        results = await run_bulk(score_patient_records, records)
+        failed = sum(1 for r in results if r["status"] == "error")
+
+        return {
+            "results": results,
+            "count": len(results),
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "processing_time": round(time.time() - start_time, 3),
+            "status": "success"
+        }
+
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        return JSONResponse(
+            status_code=500,
+            content={"error": "Batch prediction failed", "message": str(e), "status": "error"}
+        )
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request, format: Optional[str] = None):
+    """Bulk-score an NDJSON or CSV body (FEATURE_ORDER columns) as a chunked NDJSON stream"""
+    fmt = (format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")).lower()
+    if fmt not in ("ndjson", "csv"):
+        return JSONResponse(
+            status_code=400,
+            content={"error": f"Unsupported format {fmt!r} - use ndjson or csv", "status": "error"}
+        )
+    await ensure_models_loaded(*TABULAR_MODELS)
+    return RequestStreamingResponse(stream_scores(request, fmt), media_type="application/x-ndjson")
+
+def tier_error_response(tier):
+    """400 for an unknown tier, 503 when the fast tier's student model has not been trained"""
+    return JSONResponse(
+        status_code=400 if tier not in CNN_TIER_MODELS else 503,
+        content={"error": tier_unavailable(tier), "status": "error"}
+    )
+
 @app.post("/predict/file")
-async def predict_file(file: UploadFile = File(...)):
+async def predict_file(file: UploadFile = File(...), tier: Optional[str] = Form(None)):
+    """Handwriting prediction - ``tier`` "fast" (distilled student) or "accurate" (ConvNeXt, default NEURO_DEFAULT_TIER)"""
+    if TABULAR_ONLY:
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Handwriting model is not served by this worker (NEURO_TABULAR_ONLY=1)", "status": "error"}
+        )
+    tier = (tier or DEFAULT_TIER).strip().lower()
+    if tier_unavailable(tier):
+        return tier_error_response(tier)
     try:
         start_time = time.time()
-        load_models_if_needed()
+        # Under load: one TTA variant instead of all three (mlp_only has no MLP to fall back on here)
+        quality_mode = quality_controller.mode()
         
-        # Use enhanced prediction with exact Gradio preprocessing
-        pred, conf, probs = predict_cnn_enhanced(file.file)
+        # Use enhanced prediction with exact Gradio preprocessing (cached by image content - a hit never loads the CNN).
+        # The upload is copied once into a pooled buffer and decoded from a memoryview of it.
+        async with upload_buffers.read(file) as image_data:
+            image_key, (pred, conf, probs, variants) = await predict_cnn_cached(
+                image_data, None if quality_mode == "full" else 1, tier)
         
         processing_time = round(time.time() - start_time, 3)
         
@@ -530,9 +1455,16 @@ async def predict_file(file: UploadFile = File(...)):
             "confidence": round(conf, 4),
             "probs": [round(p, 4) for p in probs],
             "processing_time": processing_time,
+            "image_key": image_key,
+            "tta_variants": variants,
+            "tier": tier,
+            "quality_mode": quality_mode,
             "status": "success"
         }
         
+    except UploadTooLarge as e:
+        logger.warning(f"⚠️ Rejected handwriting upload: {e}")
+        return upload_too_large_response(e)
     except Exception as e:
         logger.error(f"File prediction error: {e}")
         return JSONResponse(
@@ -554,12 +1486,12 @@ async def predict_form(form_data: str = Form(...)):
         start_time = time.time()
         logger.info("Starting form prediction...")
         
-        load_models_if_needed()
+        await ensure_models_loaded(*TABULAR_MODELS)
         
         features_dict = extract_features_from_form(form_data)
         logger.info(f"Form data processed: {len(features_dict)} features")
         
-        pred, conf, probs = predict_mlp(features_dict)
+        pred, conf, probs = await predict_mlp_batched(features_dict)
         
         processing_time = round(time.time() - start_time, 3)
         
@@ -589,20 +1521,90 @@ async def predict_form(form_data: str = Form(...)):
             }
         )
 
+# Cascade decisions (requests with both a scan and clinical features) and how many skipped the CNN
+cascade_counts = {"decisions": 0, "cnn_skipped": 0}
+
+# ensemble_cnn_branch's result when the cascade skips the CNN
+SKIPPED_CNN_RESULT = (False, None, (None, 0, [0.5, 0.5], 0), 0.0)
+
+def cascade_skips_cnn(features_dict, file, mlp_probs):
+    """Cascade: True when the MLP's P(Dementia) is outside the uncertainty band, so the uploaded scan is not classified"""
+    if not (features_dict and file) or TABULAR_ONLY:
+        return False
+    skip = not CASCADE_LOW <= mlp_probs[1] <= CASCADE_HIGH
+    cascade_counts["decisions"] += 1
+    cascade_counts["cnn_skipped"] += skip
+    return skip
+
+async def ensemble_mlp_branch(features_dict):
+    """Clinical branch of /predict/ensemble -> (prediction, confidence, probs, seconds)"""
+    start = time.perf_counter()
+    if not features_dict:
+        return None, 0, [0.5, 0.5], 0.0
+    await ensure_models_loaded(*TABULAR_MODELS)
+    pred, conf, probs = await predict_mlp_batched(features_dict)
+    logger.info(f"MLP prediction: {pred} (confidence: {conf:.3f})")
+    return pred, conf, probs, time.perf_counter() - start
+
+async def ensemble_cnn_branch(file, cached_cnn, image_key, max_variants=None, tier="accurate"):
+    """Handwriting branch of /predict/ensemble -> (available, image_key, (prediction, confidence, probs, variants), seconds)"""
+    start = time.perf_counter()
+    cnn_result = None, 0, [0.5, 0.5], 0
+    # Process handwriting image - ROBUST SOLUTION
+    cnn_available = cached_cnn is not None
+    if file and TABULAR_ONLY:
+        logger.warning("Tabular-only worker - ignoring handwriting image")
+    elif file:
+        # Copied once into a pooled buffer; validated and classified from a memoryview of it
+        async with upload_buffers.read(file) as image_data:
+            try:
+                with Image.open(BufferReader(image_data)) as image_for_cnn:
+                    logger.info(f"Image loaded successfully: {image_for_cnn.size} pixels")
+                cnn_available = True
+            except Exception as e:
+                logger.error(f"Failed to load image: {e}")
+            if cnn_available:
+                image_key, cnn_result = await predict_cnn_cached(image_data, max_variants, tier)
+                logger.info(f"CNN prediction: {cnn_result[0]} (confidence: {cnn_result[1]:.3f}, "
+                            f"{cnn_result[3]} TTA variants)")
+    elif cached_cnn is not None:
+        cnn_result = cached_cnn
+        logger.info(f"CNN prediction reused from cache: {cnn_result[0]} (confidence: {cnn_result[1]:.3f})")
+    return cnn_available, image_key, cnn_result, time.perf_counter() - start
+
 @app.post("/predict/ensemble")
 async def predict_ensemble(
     file: Optional[UploadFile] = File(None),
-    features_json: Optional[str] = Form(None)
+    features_json: Optional[str] = Form(None),
+    image_key: Optional[str] = Form(None),
+    tier: Optional[str] = Form(None)
 ):
-    """Ensemble prediction with both handwriting and clinical features - CRITICAL for full assessment"""
+    """Ensemble prediction with both handwriting and clinical features - CRITICAL for full assessment.
+
+    Instead of re-uploading the scan, pass the image_key from an earlier /predict/file or
+    /predict/ensemble response to reuse its cached handwriting result (of the same ``tier``).
+    ``tier`` "fast" classifies the scan with the distilled student, "accurate" with the ConvNeXt.
+    """
+    tier = (tier or DEFAULT_TIER).strip().lower()
+    # The student only has to exist when a scan will be classified with it
+    if tier not in CNN_TIER_MODELS or ((file or image_key) and not TABULAR_ONLY and tier_unavailable(tier)):
+        return tier_error_response(tier)
     try:
         start_time = time.time()
-        logger.info(f"Starting ensemble prediction with file: {file.filename}")
-        
-        load_models_if_needed()
+        logger.info(f"Starting ensemble prediction with file: {file.filename if file else None}, image_key: {image_key}")
+
+        # Reuse a cached handwriting result when only the clinical features changed
+        cached_cnn = None
+        if not file and image_key and not TABULAR_ONLY:
+            cached_cnn = await cached_cnn_result(image_key, tier)
+            if cached_cnn is None:
+                return JSONResponse(
+                    status_code=404,
+                    content={"error": "Unknown or expired image_key - upload the handwriting file again", "status": "error"}
+                )
         
         # Validate inputs - make it more flexible
-        if not file and not features_json:
+        if not file and not features_json and cached_cnn is None:
             logger.warning("No file or features provided, using sample data")
             features_json = json.dumps(SAMPLE_POSITIVE_PATIENT)
         
@@ -618,34 +1620,38 @@ async def predict_ensemble(
         if features_dict:
             logger.info(f"Clinical features processed: {len(features_dict)} features")
         
-        # Process handwriting image - ROBUST SOLUTION
-        image_for_cnn = None
-        if file:
-            try:
-                # Read image bytes and convert to PIL Image directly
-                image_bytes = await file.read()
-                from io import BytesIO
-                image_stream = BytesIO(image_bytes)
-                image_for_cnn = Image.open(image_stream)
-                logger.info(f"Image loaded successfully: {image_for_cnn.size} pixels")
-            except Exception as e:
-                logger.error(f"Failed to load image: {e}")
-                image_for_cnn = None
+        # Under load (quality.py): one TTA variant, then no CNN at all when clinical features are present
+        quality_mode = quality_controller.mode()
+        max_variants = None if quality_mode == "full" else 1
         
-        # Get predictions from available models
-        mlp_pred, mlp_conf, mlp_probs = None, 0, [0.5, 0.5]
-        cnn_pred, cnn_conf, cnn_probs = None, 0, [0.5, 0.5]
-        
-        if features_dict:
-            mlp_pred, mlp_conf, mlp_probs = predict_mlp(features_dict)
-            logger.info(f"MLP prediction: {mlp_pred} (confidence: {mlp_conf:.3f})")
-            
-        if image_for_cnn is not None:
-            cnn_pred, cnn_conf, cnn_probs = predict_cnn_enhanced(image_for_cnn)
-            logger.info(f"CNN prediction: {cnn_pred} (confidence: {cnn_conf:.3f})")
+        # Get predictions from available models - the two branches are independent until the fusion
+        # below, so they run concurrently (MLP on the tabular pool, CNN on the inference pool)
+        cnn_skipped = None
+        if quality_mode == "mlp_only" and features_dict and file and not TABULAR_ONLY:
+            logger.info("⏭️ Overloaded - CNN skipped, MLP-only ensemble")
+            mlp_result = await ensemble_mlp_branch(features_dict)
+            cnn_skipped, cnn_result = "load", SKIPPED_CNN_RESULT
+        elif ENSEMBLE_CASCADE:
+            # The CNN only runs when the clinical model is uncertain
+            mlp_result = await ensemble_mlp_branch(features_dict)
+            if cascade_skips_cnn(features_dict, file, mlp_result[2]):
+                logger.info(f"⏭️ Cascade: MLP is decisive (P(Dementia)={mlp_result[2][1]:.3f}) - CNN skipped")
+                cnn_skipped, cnn_result = "cascade", SKIPPED_CNN_RESULT
+            else:
+                cnn_result = await ensemble_cnn_branch(file, cached_cnn, image_key, max_variants, tier)
+        elif ENSEMBLE_CONCURRENT:
+            mlp_result, cnn_result = await asyncio.gather(
+                ensemble_mlp_branch(features_dict),
+                ensemble_cnn_branch(file, cached_cnn, image_key, max_variants, tier),
+            )
+        else:
+            mlp_result = await ensemble_mlp_branch(features_dict)
+            cnn_result = await ensemble_cnn_branch(file, cached_cnn, image_key, max_variants, tier)
+        mlp_pred, mlp_conf, mlp_probs, mlp_time = mlp_result
+        cnn_available, image_key, (cnn_pred, cnn_conf, cnn_probs, cnn_variants), cnn_time = cnn_result
         
         # Intelligent ensemble combination
-        if features_dict and image_for_cnn is not None:
+        if features_dict and cnn_available:
             # Both models available
             if mlp_conf > 0.8 and cnn_conf > 0.8:
                 # Both high confidence - average probabilities
@@ -662,10 +1668,10 @@ async def predict_ensemble(
                 final_pred, final_conf, combined_probs = cnn_pred, cnn_conf, cnn_probs
                 method = "cnn_dominant"
         elif features_dict:
-            # Only MLP available
+            # Only MLP available (or the CNN was skipped by the cascade or under load)
             final_pred, final_conf, combined_probs = mlp_pred, mlp_conf, mlp_probs
-            method = "mlp_only"
-        elif image_for_cnn is not None:
+            method = {"cascade": "mlp_cascade", "load": "mlp_load_shed"}.get(cnn_skipped, "mlp_only")
+        elif cnn_available:
             # Only CNN available
             final_pred, final_conf, combined_probs = cnn_pred, cnn_conf, cnn_probs
             method = "cnn_only"
@@ -681,16 +1687,25 @@ async def predict_ensemble(
             "processing_time": processing_time,
             "model_type": "Ensemble",
             "ensemble_method": method,
+            "image_key": image_key if cnn_available else None,
             "individual_results": {
-                "mlp": {"prediction": mlp_pred, "confidence": round(mlp_conf, 4), "probs": [round(p, 4) for p in mlp_probs]},
-                "cnn": {"prediction": cnn_pred, "confidence": round(cnn_conf, 4), "probs": [round(p, 4) for p in cnn_probs]}
+                "mlp": {"prediction": mlp_pred, "confidence": round(mlp_conf, 4), "probs": [round(p, 4) for p in mlp_probs],
+                        "processing_time": round(mlp_time, 3)},
+                "cnn": {"prediction": cnn_pred, "confidence": round(cnn_conf, 4), "probs": [round(p, 4) for p in cnn_probs],
+                        "processing_time": round(cnn_time, 3), "tta_variants": cnn_variants,
+                        "skipped": cnn_skipped is not None, "tier": tier}
             },
+            "branches": "cascade" if ENSEMBLE_CASCADE else "concurrent" if ENSEMBLE_CONCURRENT else "sequential",
+            "quality_mode": quality_mode,
             "status": "success"
         }
         
         logger.info(f"Ensemble prediction completed in {processing_time}s using {method}")
         return result
         
+    except UploadTooLarge as e:
+        logger.warning(f"⚠️ Rejected handwriting upload: {e}")
+        return upload_too_large_response(e)
     except Exception as e:
         logger.error(f"Ensemble prediction error: {e}")
         return JSONResponse(
@@ -791,11 +1806,23 @@ async def health():
             "status": "healthy",
             "service": "Neuro Trace API",
             "models_loaded": {
-                "cnn_model": cnn_model is not None,
-                "mlp_model": mlp_model is not None,
+                "cnn_model": cnn_predictor is not None,
+                "cnn_fast_model": cnn_fast_tta_predictor is not None,
+                "mlp_model": mlp_predictor is not None,
                 "preprocessor": preprocessor is not None,
                 "meta_model": meta_model is not None
             },
+            "backends": {
+                "cnn": CNN_BACKEND,
+                "cnn_fast": CNN_FAST_BACKEND,
+                "mlp": MLP_BACKEND,
+                "inference_path": INFERENCE_PATH,
+                "preprocessor": feature_transform.kind if feature_transform is not None else None,
+            },
+            "models": models.status(),
+            "preload": PRELOAD_MODELS,
+            "tabular_only": TABULAR_ONLY,
+            "default_tier": DEFAULT_TIER,
             "sample_data_available": True,
             "cors_enabled": True,
             "ready_for_demo": True,
@@ -807,6 +1834,39 @@ async def health():
             content={"status": "unhealthy", "error": str(e)}
         )
 
+@app.get("/metrics")
+async def metrics():
+    """Serving metrics for tuning - batch fill of the inference batchers, prediction cache counters, upload buffers,
+    TTA variants evaluated, quality mode, CNN passes skipped by the ensemble cascade, shape buckets"""
+    return {
+        "mlp_batcher": {"enabled": MLP_BATCHING_ENABLED, **mlp_batcher.stats()},
+        "cnn_batcher": {"enabled": CNN_BATCHING_ENABLED, **cnn_batcher.stats()},
+        "cnn_fast_batcher": {"enabled": CNN_BATCHING_ENABLED, **cnn_fast_batcher.stats()},
+        "mlp_cache": {"enabled": MLP_CACHE_ENABLED, **mlp_cache.stats()},
+        "cnn_cache": {"enabled": CNN_CACHE_ENABLED, "pixel_keys": CNN_CACHE_PIXEL_KEYS, **cnn_cache.stats()},
+        "cnn_fast_cache": {"enabled": CNN_CACHE_ENABLED, **cnn_fast_cache.stats()},
+        "uploads": upload_buffers.stats(),
+        "quality": quality_controller.stats(),
+        "ensemble_cascade": {
+            "enabled": ENSEMBLE_CASCADE,
+            "band": [CASCADE_LOW, CASCADE_HIGH],
+            **cascade_counts,
+            "skip_ratio": round(cascade_counts["cnn_skipped"] / cascade_counts["decisions"], 4)
+            if cascade_counts["decisions"] else 0.0,
+        },
+        "cnn_tta": {
+            "early_exit_confidence": CNN_EARLY_EXIT_CONFIDENCE,
+            **tta_counts,
+            "mean_variants": round(tta_counts["variants"] / tta_counts["requests"], 3) if tta_counts["requests"] else 0,
+            "variants_saved": len(GRADIO_METHODS) * tta_counts["requests"] - tta_counts["variants"],
+        },
+        "shape_buckets": {
+            name: predictor.stats() if predictor is not None else None
+            for name, predictor in (("mlp", mlp_predictor), ("cnn", cnn_predictor), ("cnn_tta", cnn_tta_predictor),
+                                    ("cnn_fast_tta", cnn_fast_tta_predictor))
+        },
+    }
+
 @app.get("/test/labels")
 async def test_labels():
     """Test endpoint to verify CNN labels are correct"""
@@ -821,9 +1881,12 @@ async def test_ensemble_simple():
     """Simple test for ensemble endpoint"""
     try:
         # Test with minimal data
+        # Called directly, so every Form parameter needs a plain value - its default is the Form(...) marker
         result = await predict_ensemble(
             file=None, 
-            features_json=json.dumps(SAMPLE_POSITIVE_PATIENT)
+            features_json=json.dumps(SAMPLE_POSITIVE_PATIENT),
+            image_key=None,
+            tier=None
         )
         return {"test": "✅ Ensemble working", "result": result}
     except Exception as e:
@@ -834,18 +1897,37 @@ async def test_ensemble_simple():
 async def startup_event():
     logger.info("🚀 Starting Neuro Trace API...")
     try:
-        load_models_if_needed()
+        with startup_profiler.stage(f"preload {','.join(PRELOAD_MODELS) or 'nothing'} (parallel)"):
+            await run_inference(load_models_if_needed)
         logger.info("✅ Neuro Trace API ready!")
     except Exception as e:
         logger.error(f"❌ Startup failed: {e}")
+    if PROFILE_STARTUP:
+        # NEURO_PROFILE_STARTUP=1: import / model-load timing breakdown
+        startup_profiler.report(models.status())
+    if MODEL_IDLE_UNLOAD_S > 0:
+        app.state.model_sweeper = asyncio.create_task(evict_idle_models())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    sweeper = getattr(app.state, "model_sweeper", None)
+    if sweeper is not None:
+        sweeper.cancel()
+    await mlp_batcher.close()
+    await cnn_batcher.close()
+    await cnn_fast_batcher.close()
+    inference_executor.shutdown(wait=False, cancel_futures=True)
+    tabular_executor.shutdown(wait=False, cancel_futures=True)
+    bulk_executor.shutdown(wait=False, cancel_futures=True)
 
 # =============================
 # Run API
 # =============================
 if __name__ == "__main__":
     logger.info("🏆 Starting Neuro Trace - Perfect Edition!")
+    # Pass the app object: the "main:app" import string would execute this module a second time
     uvicorn.run(
-        "main:app", 
+        app, 
         host="0.0.0.0", 
         port=9000, 
         reload=False
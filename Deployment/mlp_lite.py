@@ -0,0 +1,195 @@
+"""
+TensorFlow-free NumPy engine for the tabular MLP.
+
+The JSON and form endpoints only need the small dense network in
+mlp_dementia_model.h5. ``export`` reads its Dense (and BatchNormalization /
+Activation) layers once into a compact .npz. NumpyMLP then runs the forward
+pass in pure NumPy, vectorized over batches, so tabular-only workers never
+import TensorFlow.
+
+Usage:
+    python mlp_lite.py export [--h5 ../Models/mlp_dementia_model.h5] [--out ../Models/mlp_dementia_model.npz]
+"""
+
+import sys
+import argparse
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_H5_PATH = "../Models/mlp_dementia_model.h5"
+DEFAULT_NPZ_PATH = "../Models/mlp_dementia_model.npz"
+
+# Keras layers that do nothing at inference time on a (batch, features) input
+_PASSTHROUGH_LAYERS = {
+    "InputLayer", "Dropout", "AlphaDropout", "GaussianDropout", "GaussianNoise",
+    "SpatialDropout1D", "ActivityRegularization", "Flatten",
+}
+
+def _sigmoid(x):
+    # tanh form is overflow-free for large |x|
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+def _elu(x):
+    return np.where(x > 0, x, np.expm1(np.minimum(x, 0)))
+
+def _selu(x):
+    return 1.0507009873554805 * np.where(x > 0, x, 1.6732632423543772 * np.expm1(np.minimum(x, 0)))
+
+def _swish(x):
+    return x * _sigmoid(x)
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "relu6": lambda x: np.clip(x, 0, 6),
+    "sigmoid": _sigmoid,
+    "tanh": np.tanh,
+    "softmax": _softmax,
+    "elu": _elu,
+    "selu": _selu,
+    "softplus": lambda x: np.logaddexp(x, 0),
+    "softsign": lambda x: x / (1 + np.abs(x)),
+    "swish": _swish,
+    "silu": _swish,
+    "exponential": np.exp,
+}
+
+def _activation_name(activation):
+    name = getattr(activation, "__name__", str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Activation {name!r} is not supported by the NumPy engine")
+    return name
+
+def extract_layers(model):
+    """Turn a Keras MLP into a list of (kind, activation, weights, bias) ops.
+
+    kind is "dense" (x @ W + b), "affine" (x * w + b, folded BatchNormalization)
+    or "activation" (activation only).
+    """
+    if len(model.inputs) != 1 or len(model.outputs) != 1:
+        raise ValueError("Only single-input, single-output MLPs can be exported")
+
+    ops = []
+    for layer in model.layers:
+        layer_type = type(layer).__name__
+        if layer_type in _PASSTHROUGH_LAYERS:
+            continue
+
+        if layer_type == "Dense":
+            weights = layer.get_weights()
+            kernel = weights[0]
+            bias = weights[1] if layer.use_bias else np.zeros(kernel.shape[1], dtype=kernel.dtype)
+            ops.append(("dense", _activation_name(layer.activation), kernel, bias))
+
+        elif layer_type == "BatchNormalization":
+            config = layer.get_config()
+            params = dict(zip([w.name.split("/")[-1].split(":")[0] for w in layer.weights], layer.get_weights()))
+            mean, variance = params["moving_mean"], params["moving_variance"]
+            gamma = params.get("gamma", np.ones_like(mean))
+            beta = params.get("beta", np.zeros_like(mean))
+            scale = gamma / np.sqrt(variance.astype(np.float64) + config["epsilon"])
+            ops.append(("affine", "linear", scale, beta - mean * scale))
+
+        elif layer_type == "Activation":
+            ops.append(("activation", _activation_name(layer.activation), np.zeros(0), np.zeros(0)))
+
+        else:
+            raise ValueError(f"Layer {layer.name!r} ({layer_type}) is not supported by the NumPy engine")
+
+    if not ops:
+        raise ValueError("Model has no Dense layers")
+    return ops
+
+def save_npz(ops, input_dim, path):
+    arrays = {
+        "input_dim": np.array(input_dim),
+        "kinds": np.array([kind for kind, _, _, _ in ops]),
+        "activations": np.array([activation for _, activation, _, _ in ops]),
+    }
+    for i, (_, _, weights, bias) in enumerate(ops):
+        arrays[f"weights_{i}"] = np.asarray(weights, dtype=np.float32)
+        arrays[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+    np.savez_compressed(path, **arrays)
+
+class NumpyMLP:
+    """Pure-NumPy forward pass over the exported layers - same call interface as inference.DirectPredictor"""
+
+    path = "numpy"
+
+    def __init__(self, ops, input_dim, name="mlp_lite"):
+        self.ops = ops
+        self.input_dim = int(input_dim)
+        self.name = name
+
+    @classmethod
+    def load(cls, path=DEFAULT_NPZ_PATH, name="mlp_lite"):
+        with np.load(path, allow_pickle=False) as data:
+            ops = [
+                (str(kind), str(activation), data[f"weights_{i}"], data[f"bias_{i}"])
+                for i, (kind, activation) in enumerate(zip(data["kinds"], data["activations"]))
+            ]
+            input_dim = int(data["input_dim"])
+        for _, activation, _, _ in ops:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"{path}: unsupported activation {activation!r}")
+        logger.info(f"🪶 Loaded NumPy MLP from {path}: {len(ops)} layers, {input_dim} inputs")
+        return cls(ops, input_dim, name)
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != self.input_dim:
+            raise ValueError(f"{self.name}: expected {self.input_dim} features, got {x.shape[1]}")
+        for kind, activation, weights, bias in self.ops:
+            if kind == "dense":
+                x = x @ weights + bias
+            elif kind == "affine":
+                x = x * weights + bias
+            x = ACTIVATIONS[activation](x)
+        return x
+
+def export(h5_path=DEFAULT_H5_PATH, npz_path=DEFAULT_NPZ_PATH, check_rows=1000, tolerance=1e-5):
+    """Export the Keras MLP to .npz and verify the NumPy engine against Keras"""
+    from tensorflow.keras.models import load_model
+
+    model = load_model(h5_path, compile=False)
+    input_dim = int(model.inputs[0].shape[-1])
+    save_npz(extract_layers(model), input_dim, npz_path)
+
+    lite = NumpyMLP.load(npz_path)
+    rng = np.random.default_rng(0)
+    probe = rng.normal(0, 3, (check_rows, input_dim)).astype(np.float32)
+    expected = model(probe, training=False).numpy()
+    max_error = float(np.max(np.abs(expected - lite(probe))))
+    if max_error > tolerance:
+        raise ValueError(f"NumPy engine deviates from Keras by {max_error:.2e} (tolerance {tolerance:.0e})")
+    return max_error
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the tabular MLP for the TensorFlow-free NumPy engine")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="Export the .h5 MLP to .npz")
+    export_cmd.add_argument("--h5", default=DEFAULT_H5_PATH)
+    export_cmd.add_argument("--out", default=DEFAULT_NPZ_PATH)
+    export_cmd.add_argument("--tolerance", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    print(f"📦 Exporting {args.h5} → {args.out}")
+    try:
+        max_error = export(args.h5, args.out, tolerance=args.tolerance)
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        return 1
+    print(f"✅ Exported - max |Keras - NumPy| on 1000 random rows: {max_error:.2e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
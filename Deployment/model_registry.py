@@ -0,0 +1,170 @@
+"""
+Model lifecycle manager.
+
+Every servable artifact (handwriting CNN, MLP, preprocessor, meta model) is
+registered with a load function and an unload function. Endpoints ask only
+for the models they use, so a JSON-only worker never pays the ConvNeXt load
+time or memory.
+
+- Each model has its own lock. Concurrent first requests load it once, and
+  loading the MLP never waits behind the CNN.
+- preload() loads independent models in parallel threads at startup.
+- evict_idle() unloads models that have not been used for ``idle_seconds``
+  while process RSS is over ``memory_budget_mb`` (0 = any idle model).
+  The next request that needs an unloaded model loads it again.
+"""
+
+import gc
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def process_rss_mb():
+    """Resident set size of this process in MB (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ManagedModel:
+    """One artifact: load/unload callables plus its state and timings"""
+
+    def __init__(self, name, load_fn, unload_fn=None):
+        self.name = name
+        self.load_fn = load_fn
+        self.unload_fn = unload_fn
+        self.lock = threading.Lock()
+
+        self.state = "not_loaded"  # not_loaded | loading | loaded | failed | unloading | unloaded
+        self.error = None
+        self.load_seconds = None
+        self.loads = 0
+        self.unloads = 0
+        self.last_used = None
+
+    def ensure(self):
+        """Load if needed (once, however many threads ask) and mark as used"""
+        self.last_used = time.monotonic()
+        if self.state == "loaded":
+            return
+        with self.lock:
+            if self.state == "loaded":
+                return
+            self.state = "loading"
+            start = time.perf_counter()
+            try:
+                self.load_fn()
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                raise
+            self.load_seconds = time.perf_counter() - start
+            self.state = "loaded"
+            self.error = None
+            self.loads += 1
+            self.last_used = time.monotonic()
+            logger.info(f"📦 {self.name} loaded in {self.load_seconds:.2f}s")
+
+    def unload(self, min_idle_seconds=0.0):
+        """Unload unless used within the last ``min_idle_seconds`` -> whether it was unloaded"""
+        with self.lock:
+            if self.state != "loaded" or self.unload_fn is None:
+                return False
+            # ensure() writes last_used before it reads state, and this writes state before it
+            # reads last_used - so either a concurrent request sees "unloading" and waits for the
+            # lock (then reloads), or this sees its fresh last_used and backs off
+            self.state = "unloading"
+            if time.monotonic() - self.last_used <= min_idle_seconds:
+                self.state = "loaded"
+                return False
+            self.unload_fn()
+            self.state = "unloaded"
+            self.unloads += 1
+        return True
+
+    def status(self, now):
+        return {
+            "state": self.state,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "idle_seconds": round(now - self.last_used, 1) if self.last_used is not None else None,
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    """Named ManagedModels with lazy loading, parallel preload and idle eviction"""
+
+    def __init__(self, idle_seconds=0.0, memory_budget_mb=0.0):
+        self.idle_seconds = idle_seconds
+        self.memory_budget_mb = memory_budget_mb
+        self._models = {}
+
+    def register(self, name, load_fn, unload_fn=None):
+        self._models[name] = ManagedModel(name, load_fn, unload_fn)
+
+    def is_loaded(self, name):
+        return self._models[name].state == "loaded"
+
+    def ensure(self, *names):
+        """Blocking: load whichever of ``names`` are not loaded yet, one after another"""
+        for name in names:
+            self._models[name].ensure()
+
+    def touch(self, *names):
+        """Mark models as in use (long-running work such as a stream) without loading them"""
+        now = time.monotonic()
+        for name in names:
+            self._models[name].last_used = now
+
+    def preload(self, names):
+        """Load ``names`` in parallel threads -> {name: error} for the ones that failed"""
+        names = [name for name in names if not self.is_loaded(name)]
+        if not names:
+            return {}
+        start = time.perf_counter()
+        errors = {}
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="neuro-loader") as pool:
+            futures = {name: pool.submit(self._models[name].ensure) for name in names}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"❌ Failed to load {name}: {e}")
+                    errors[name] = e
+        logger.info(f"📦 Preloaded {', '.join(names)} in {time.perf_counter() - start:.2f}s")
+        return errors
+
+    def evict_idle(self):
+        """Unload models idle past idle_seconds, oldest first, until RSS is under budget -> unloaded names"""
+        if not self.idle_seconds:
+            return []
+        now = time.monotonic()
+        idle = sorted(
+            (model for model in self._models.values()
+             if model.state == "loaded" and model.unload_fn is not None
+             and now - model.last_used > self.idle_seconds),
+            key=lambda model: model.last_used,
+        )
+        unloaded = []
+        for model in idle:
+            rss = process_rss_mb()
+            if self.memory_budget_mb and rss is not None and rss <= self.memory_budget_mb:
+                break
+            if model.unload(min_idle_seconds=self.idle_seconds):
+                unloaded.append(model.name)
+                gc.collect()
+                logger.info(f"🧹 Unloaded idle {model.name} (RSS {rss or 0:.0f}MB → {process_rss_mb() or 0:.0f}MB)")
+        return unloaded
+
+    def status(self):
+        now = time.monotonic()
+        return {name: model.status(now) for name, model in self._models.items()}
@@ -0,0 +1,135 @@
+"""
+Load-aware quality control for the handwriting endpoints.
+
+QualityController watches two load signals on /predict/file and
+/predict/ensemble: the number of requests in flight (queue depth), and the
+p95 latency of requests that finished in the last ``window_s`` seconds.
+While either signal is over its limit, it steps down one mode at a time:
+
+    full            the configured TTA (all three variants, or the early exit)
+    single_variant  TTA method 1 only
+    mlp_only        ensemble requests with clinical features skip the CNN;
+                    /predict/file still classifies with a single variant
+
+It steps back up one mode at a time once both signals fall well below their
+limits (``recover_ratio``). Degrading is quick (``degrade_hold_s`` after the
+last change) and recovering is slow (``recover_hold_s``), so the mode does not
+flap. After each change the latency window restarts, so each mode is judged on
+its own latencies.
+
+LoadTrackingMiddleware feeds the controller: it counts requests in flight
+and times them from the first byte received to the last byte sent.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUALITY_MODES = ("full", "single_variant", "mlp_only")
+
+
+class QualityController:
+    """Steps handwriting quality down as load rises and back up as it falls"""
+
+    def __init__(self, slo_p95_ms, max_in_flight, enabled=True, window_s=10.0, degrade_hold_s=0.5,
+                 recover_hold_s=5.0, recover_ratio=0.5, min_samples=10):
+        self.slo_p95_ms = slo_p95_ms
+        self.max_in_flight = max_in_flight
+        self.enabled = enabled
+        self.window_s = window_s
+        self.degrade_hold_s = degrade_hold_s
+        self.recover_hold_s = recover_hold_s
+        self.recover_ratio = recover_ratio
+        self.min_samples = min_samples
+
+        self.level = 0
+        self.in_flight = 0
+        self._samples = deque()  # (finished at, latency ms)
+        self._changed_at = 0.0
+        self._lock = threading.Lock()
+
+        self.mode_changes = 0
+        self.requests_by_mode = {mode: 0 for mode in QUALITY_MODES}
+
+    def _p95_ms(self, now):
+        while self._samples and self._samples[0][0] < now - self.window_s:
+            self._samples.popleft()
+        if len(self._samples) < self.min_samples:
+            return None
+        return float(np.percentile([latency for _, latency in self._samples], 95))
+
+    def _step(self, now, level, reason):
+        previous = QUALITY_MODES[self.level]
+        self.level = level
+        self._changed_at = now
+        self._samples.clear()
+        self.mode_changes += 1
+        log = logger.warning if level > QUALITY_MODES.index(previous) else logger.info
+        log(f"🎚️ Quality mode {previous} → {QUALITY_MODES[level]} ({reason})")
+
+    def mode(self):
+        """The mode for a request starting now - re-evaluates the load signals"""
+        now = time.monotonic()
+        with self._lock:
+            held = now - self._changed_at
+            if self.enabled and held >= self.degrade_hold_s:
+                p95 = self._p95_ms(now)
+                if self.in_flight > self.max_in_flight or (p95 is not None and p95 > self.slo_p95_ms):
+                    if self.level < len(QUALITY_MODES) - 1:
+                        p95_text = f"{p95:.0f}ms" if p95 is not None else "n/a"
+                        self._step(now, self.level + 1, f"{self.in_flight} in flight, p95 {p95_text}")
+                elif (self.level > 0 and held >= self.recover_hold_s
+                      and self.in_flight <= self.max_in_flight * self.recover_ratio
+                      and (p95 is None or p95 < self.slo_p95_ms * self.recover_ratio)):
+                    self._step(now, self.level - 1, "load fell")
+            mode = QUALITY_MODES[self.level]
+            self.requests_by_mode[mode] += 1
+            return mode
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            self._samples.append((now, seconds * 1000))
+
+    def stats(self):
+        with self._lock:
+            p95 = self._p95_ms(time.monotonic())
+            return {
+                "enabled": self.enabled,
+                "mode": QUALITY_MODES[self.level],
+                "slo_p95_ms": self.slo_p95_ms,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "recent_p95_ms": round(p95, 1) if p95 is not None else None,
+                "mode_changes": self.mode_changes,
+                "requests_by_mode": dict(self.requests_by_mode),
+            }
+
+
+class LoadTrackingMiddleware:
+    """ASGI middleware: requests in flight and their latency on ``paths``, reported to a QualityController"""
+
+    def __init__(self, app, controller, paths):
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        self.controller.started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.finished(time.perf_counter() - start)
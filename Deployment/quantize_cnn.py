@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Handwriting CNN Quantization Tool
+Builds an INT8 (or dynamic-range) TFLite version of convnext_handwriting_best.keras
+for CPU serving with NEURO_CNN_BACKEND=tflite, then compares it with the float model:
+accuracy on a held-out set, fused-TTA latency and resident memory
+
+Calibration images go through the same three Gradio preprocessing variants the
+API feeds the model. The held-out folder may hold one subfolder per class
+("0"/"1" or "Non-Dementia"/"Dementia"); without subfolders only agreement with
+the float model is reported.
+
+Usage:
+    python quantize_cnn.py --calibration-dir samples/calib --eval-dir samples/heldout [--mode int8|dynamic]
+"""
+
+import os
+import sys
+import time
+import json
+import argparse
+import resource
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+import main
+from backends import load_cnn
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp")
+
+def list_images(folder):
+    return sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(folder)
+        for name in files
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+def labelled_images(folder):
+    """[(path, label or None)] - the label comes from the class subfolder name"""
+    label_for = {str(index): index for index in main.class_labels}
+    label_for.update({name.lower(): index for index, name in main.class_labels.items()})
+    subfolders = sorted(d for d in os.listdir(folder) if os.path.isdir(os.path.join(folder, d)))
+    if subfolders and all(d.lower() in label_for for d in subfolders):
+        return [(path, label_for[d.lower()]) for d in subfolders for path in list_images(os.path.join(folder, d))]
+    return [(path, None) for path in list_images(folder)]
+
+def tta_inputs(path):
+    """The three float32 variants the API feeds the CNN for one image"""
+    images, divisors = main.build_tta_batch(Image.open(path))
+    return images.astype(np.float32) / divisors.reshape(-1, 1, 1, 1)
+
+def quantize(keras_path, out_path, calibration_paths, mode):
+    import tensorflow as tf
+    from tensorflow.keras.models import load_model
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(load_model(keras_path, compile=False))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == "int8":
+        def representative_dataset():
+            for path in calibration_paths:
+                for variant in tta_inputs(path):
+                    yield [variant[np.newaxis]]
+
+        # Ops without an INT8 kernel fall back to float; input/output stay float32
+        converter.representative_dataset = representative_dataset
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+
+def fused_tta_probs(tta_predictor, path):
+    images, divisors = main.build_tta_batch(Image.open(path))
+    return np.array(main.combine_gradio_results(
+        [main.gradio_probs_to_result(row) for row in tta_predictor(images, divisors)]
+    )[2])
+
+def median_ms(fn, args, iterations, warmup=3):
+    for _ in range(warmup):
+        fn(*args)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+def peak_rss_mb(backend, model_path):
+    """Peak RSS of a fresh process that loads the CNN on ``backend`` and runs one fused TTA batch"""
+    output = subprocess.run(
+        [sys.executable, __file__, "--measure-rss", backend, "--model", model_path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["peak_rss_mb"]
+
+def measure_rss(backend, model_path):
+    _, _, tta_predictor = load_cnn(backend, model_path, main.INFERENCE_PATH)
+    tta_predictor(
+        np.zeros((3, main.img_height, main.img_width, 3), dtype=np.uint8), np.ones((3, 1), dtype=np.float32)
+    )
+    # ru_maxrss is in kilobytes on Linux
+    print(json.dumps({"peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+    return 0
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Post-training quantization of the handwriting CNN")
+    parser.add_argument("--calibration-dir", help="Representative handwriting images (INT8 calibration)")
+    parser.add_argument("--eval-dir", help="Held-out handwriting images, optionally in class subfolders")
+    parser.add_argument("--mode", choices=["int8", "dynamic"], default="int8",
+                        help="int8 = calibrated weights and activations, dynamic = INT8 weights only")
+    parser.add_argument("--out", default=main.CNN_TFLITE_PATH)
+    parser.add_argument("--max-calibration-images", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--measure-rss", choices=["keras", "onnx", "tflite"], help=argparse.SUPPRESS)
+    parser.add_argument("--model", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure_rss:
+        return measure_rss(args.measure_rss, args.model)
+
+    print(f"🧮 Handwriting CNN quantization ({args.mode})")
+    print("=" * 60)
+    calibration_paths = list_images(args.calibration_dir)[:args.max_calibration_images] if args.calibration_dir else []
+    if args.mode == "int8" and not calibration_paths:
+        print("❌ INT8 quantization needs --calibration-dir with representative handwriting images")
+        return 1
+
+    print(f"📦 {main.CNN_MODEL_PATH} → {args.out} ({len(calibration_paths)} calibration images)")
+    try:
+        quantize(main.CNN_MODEL_PATH, args.out, calibration_paths, args.mode)
+    except Exception as e:
+        print(f"❌ Quantization failed: {e}")
+        return 1
+    float_size, quant_size = os.path.getsize(main.CNN_MODEL_PATH) / 1e6, os.path.getsize(args.out) / 1e6
+    print(f"   size: {float_size:.2f}MB float → {quant_size:.2f}MB quantized")
+
+    _, _, float_tta = load_cnn("keras", main.CNN_MODEL_PATH, main.INFERENCE_PATH)
+    _, _, quant_tta = load_cnn("tflite", args.out)
+
+    if args.eval_dir:
+        samples = labelled_images(args.eval_dir)
+        print(f"🎯 Held-out set: {len(samples)} images")
+        float_probs = np.array([fused_tta_probs(float_tta, path) for path, _ in samples])
+        quant_probs = np.array([fused_tta_probs(quant_tta, path) for path, _ in samples])
+        float_pred, quant_pred = float_probs.argmax(axis=1), quant_probs.argmax(axis=1)
+        delta = np.abs(float_probs[:, 1] - quant_probs[:, 1])
+        print(f"   prediction agreement: {np.mean(float_pred == quant_pred):.1%}")
+        print(f"   |Δ P(Dementia)|: mean {delta.mean():.4f}, max {delta.max():.4f}")
+        labels = np.array([label for _, label in samples])
+        if all(label is not None for label in labels):
+            float_acc, quant_acc = np.mean(float_pred == labels), np.mean(quant_pred == labels)
+            print(f"   accuracy: {float_acc:.1%} float → {quant_acc:.1%} quantized ({quant_acc - float_acc:+.1%})")
+        else:
+            print("   (no class subfolders - accuracy not computed)")
+
+    rng = np.random.default_rng(0)
+    batch = (rng.integers(0, 256, (3, main.img_height, main.img_width, 3), dtype=np.uint8),
+             np.array([[255.0], [255.0], [1.0]], dtype=np.float32))
+    float_ms = median_ms(float_tta, batch, args.iterations)
+    quant_ms = median_ms(quant_tta, batch, args.iterations)
+    print(f"⏱️  fused TTA p50: {float_ms:.2f}ms float → {quant_ms:.2f}ms quantized ({float_ms / quant_ms:.1f}x)")
+
+    float_rss = peak_rss_mb("keras", main.CNN_MODEL_PATH)
+    quant_rss = peak_rss_mb("tflite", args.out)
+    print(f"🧠 peak RSS (fresh process): {float_rss:.0f}MB float → {quant_rss:.0f}MB quantized")
+
+    print("=" * 60)
+    print("✅ Serve it with NEURO_CNN_BACKEND=tflite")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Offline Patient File Scorer
+Scores a CSV or Parquet file of patients (FEATURE_ORDER columns) with the MLP
+and preprocessor loaded in-process - no running API needed. The file is read in
+chunks that are spread across a process pool sized to the machine's cores, and
+the predictions are written in input order
+
+Usage:
+    python score_patients.py patients.csv [--output scored.parquet] [--workers 8] [--chunk-rows 20000]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+# Filled in by init_worker in each pool process
+_main = None
+_load_seconds = 0.0
+
+def init_worker(backend, threads):
+    """Load the preprocessor and MLP once per worker process"""
+    global _main, _load_seconds
+    start = time.perf_counter()
+    # One compute thread per process - the pool provides the parallelism
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "NEURO_ORT_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ["NEURO_MLP_BACKEND"] = backend
+    os.environ["NEURO_TABULAR_ONLY"] = "1"
+
+    import main
+    main.load_models_if_needed()
+    _main = main
+    _load_seconds = time.perf_counter() - start
+
+def score_chunk(features):
+    """Score one chunk of raw feature columns -> (probs, error messages, stage timings)"""
+    global _load_seconds
+    # Model load time is reported once per worker, with its first chunk
+    timings = {"load": _load_seconds}
+    _load_seconds = 0.0
+    start = time.perf_counter()
+    values = features.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    valid = np.isfinite(values).all(axis=1)
+    errors = np.full(len(values), "", dtype=object)
+    if not valid.all():
+        columns = np.array(features.columns)
+        for row in np.flatnonzero(~valid):
+            errors[row] = "missing or non-numeric: " + ",".join(columns[~np.isfinite(values[row])])
+    timings["validate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = np.flatnonzero(valid)
+    processed, positions, failed = _main.preprocess_rows(values[rows])
+    # Rows the preprocessor rejects are errors of their own, the rest of the chunk is unaffected
+    for position, message in failed.items():
+        errors[rows[position]] = f"preprocessing failed: {message}"
+    timings["preprocess"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probs = np.full((len(values), 2), np.nan)
+    if len(positions):
+        probs[rows[positions]] = _main.mlp_outputs_to_probs(_main.mlp_predictor(processed))
+    timings["predict"] = time.perf_counter() - start
+    return probs, errors, timings
+
+def read_chunks(path, chunk_rows):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        self._writer = None
+        self._first = True
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def scored_frame(chunk, feature_columns, probs, errors):
+    """Input columns that are not features (ids etc.) + predictions"""
+    out = chunk.drop(columns=feature_columns).reset_index(drop=True)
+    prediction = pd.Series(probs.argmax(axis=1), dtype="Int64")
+    prediction[np.isnan(probs[:, 0])] = pd.NA
+    out["prediction"] = prediction
+    out["confidence"] = probs.max(axis=1)
+    out["prob_non_dementia"] = probs[:, 0]
+    out["prob_dementia"] = probs[:, 1]
+    out["error"] = errors
+    return out
+
+def main_cli():
+    from main import FEATURE_ORDER, MLP_BACKEND
+
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet patient file in-process on all cores")
+    parser.add_argument("input", help="CSV or Parquet file with the FEATURE_ORDER columns")
+    parser.add_argument("--output", help="Output CSV or Parquet (default: <input>_scored.csv)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-rows", type=int, default=20000)
+    parser.add_argument("--backend", default=MLP_BACKEND, help="MLP backend: keras, lite or onnx")
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + "_scored.csv"
+    print("🧾 Offline patient scorer")
+    print("=" * 60)
+    print(f"   {args.input} → {output}")
+    print(f"   {args.workers} workers, {args.chunk_rows:,} rows per chunk, {args.backend} MLP backend")
+
+    stage_seconds = {"read": 0.0, "load": 0.0, "validate": 0.0, "preprocess": 0.0, "predict": 0.0, "write": 0.0}
+    rows = failed = 0
+    wall_start = time.perf_counter()
+
+    # spawn: TensorFlow and thread pools do not survive fork
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(args.workers, mp_context=context, initializer=init_worker,
+                             initargs=(args.backend, args.threads_per_worker)) as pool:
+        writer = ChunkWriter(output)
+        pending = deque()
+
+        def drain_one():
+            nonlocal rows, failed
+            chunk, future = pending.popleft()
+            probs, errors, timings = future.result()
+            for stage, seconds in timings.items():
+                stage_seconds[stage] += seconds
+            start = time.perf_counter()
+            writer.write(scored_frame(chunk, FEATURE_ORDER, probs, errors))
+            stage_seconds["write"] += time.perf_counter() - start
+            rows += len(chunk)
+            failed += int(np.count_nonzero(errors != ""))
+
+        try:
+            chunks = read_chunks(args.input, args.chunk_rows)
+            while True:
+                start = time.perf_counter()
+                chunk = next(chunks, None)
+                stage_seconds["read"] += time.perf_counter() - start
+                if chunk is None:
+                    break
+                missing = [name for name in FEATURE_ORDER if name not in chunk.columns]
+                if missing:
+                    print(f"❌ Input is missing feature columns: {missing}")
+                    return 1
+                pending.append((chunk, pool.submit(score_chunk, chunk[FEATURE_ORDER])))
+                # Bounded read-ahead keeps memory flat for any file size
+                while len(pending) >= 2 * args.workers:
+                    drain_one()
+            while pending:
+                drain_one()
+        finally:
+            writer.close()
+
+    elapsed = time.perf_counter() - wall_start
+    print("-" * 60)
+    print(f"   rows: {rows:,} scored ({failed:,} with errors) in {elapsed:.1f}s → {rows / elapsed:,.0f} rows/sec")
+    for stage in ("read", "write"):
+        print(f"   {stage:<24}{stage_seconds[stage]:>8.2f}s wall (main process)")
+    for stage in ("load", "validate", "preprocess", "predict"):
+        print(f"   {stage:<24}{stage_seconds[stage]:>8.2f}s summed over workers")
+    print("=" * 60)
+    print(f"✅ Predictions written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
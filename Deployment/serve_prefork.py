@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Pre-fork Production Launcher
+Loads the models ONCE in a parent process, freezes the heap (gc.freeze) and forks
+N uvicorn workers that accept on one shared listening socket. The workers share
+the read-only weight pages copy-on-write, so adding workers adds only each
+worker's unique memory (USS), not another copy of the models.
+
+Only fork-safe backends are preloaded in the parent: onnx, tflite (CNN) and
+lite, onnx (MLP), plus the preprocessor. TensorFlow does not survive fork once
+its runtime is up, so Keras models are loaded by every worker after the fork
+(each worker then holds its own copy - convert with convert_to_onnx.py /
+quantize_cnn.py / mlp_lite.py to share them).
+
+Usage:
+    NEURO_CNN_BACKEND=onnx NEURO_MLP_BACKEND=lite python serve_prefork.py --workers 4
+    python serve_prefork.py --workers 4 --no-preload   # every worker loads its own copy (for comparison)
+"""
+
+import os
+import sys
+import gc
+import time
+import signal
+import socket
+import logging
+import argparse
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("prefork")
+
+# Models whose backend can be loaded before fork and used in the children
+FORK_SAFE_CNN_BACKENDS = ("onnx", "tflite")
+FORK_SAFE_MLP_BACKENDS = ("lite", "onnx")
+
+def limit_threads(threads):
+    """Pin every compute pool to ``threads`` - pools created before fork do not exist in the children,
+    and N workers already use N cores"""
+    for name in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "NEURO_ORT_THREADS", "NEURO_TFLITE_THREADS"):
+        os.environ.setdefault(name, str(threads))
+
+def smaps_rollup(pid):
+    """Rss / Pss / USS (private pages) of a process in MB, from /proc/<pid>/smaps_rollup"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                values[parts[0][:-1]] = int(parts[1]) / 1024
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "uss": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+        "shared": values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0),
+    }
+
+def report_memory(parent_pid, worker_pids):
+    """Log per-process memory - the USS column is what each extra worker really costs"""
+    lines = [f"🧮 Memory (MB)   {'RSS':>8}{'PSS':>8}{'USS':>8}{'shared':>8}"]
+    total_pss = 0.0
+    for label, pid in [("parent", parent_pid)] + [(f"worker {pid}", pid) for pid in worker_pids]:
+        try:
+            mem = smaps_rollup(pid)
+        except OSError:
+            continue
+        total_pss += mem["pss"]
+        lines.append(f"   {label:<13}{mem['rss']:>8.0f}{mem['pss']:>8.0f}{mem['uss']:>8.0f}{mem['shared']:>8.0f}")
+    lines.append(f"   {'total (PSS)':<13}{total_pss:>8.0f}")
+    logger.info("\n".join(lines))
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(main, sock, args):
+    """Child process: serve the shared socket until told to stop"""
+    import uvicorn
+
+    # Default signal handling for the child - uvicorn installs its own graceful-shutdown handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(main.app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+def spawn_worker(main, sock, args):
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            run_worker(main, sock, args)
+        except BaseException:
+            logger.exception("Worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Load models once, fork N workers that share them")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("NEURO_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--threads-per-worker", type=int, default=1)
+    parser.add_argument("--no-preload", action="store_true", help="Load models in every worker instead of the parent")
+    parser.add_argument("--report-after", type=float, default=30.0, help="Seconds until the first memory report")
+    parser.add_argument("--report-interval", type=float, default=300.0,
+                        help="Seconds between later memory reports (0 = report once)")
+    parser.add_argument("--keep-alive", type=int, default=5)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    limit_threads(args.threads_per_worker)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    import main
+
+    logger.info(f"🏆 Neuro Trace pre-fork launcher: {args.workers} workers on {args.host}:{args.port}")
+    if not args.no_preload:
+        shared = ["preprocessor"]
+        if main.MLP_BACKEND in FORK_SAFE_MLP_BACKENDS:
+            shared.append("mlp")
+        if not main.TABULAR_ONLY and main.CNN_BACKEND in FORK_SAFE_CNN_BACKENDS:
+            shared.append("cnn")
+        start = time.perf_counter()
+        main.load_models_if_needed(shared)
+        logger.info(f"📦 Loaded {', '.join(shared)} once in the parent ({time.perf_counter() - start:.1f}s)")
+        per_worker = [name for name in main.PRELOAD_MODELS if name not in shared]
+        if per_worker:
+            logger.warning(f"⚠️ {', '.join(per_worker)} use a Keras backend, which is not fork-safe - "
+                           "every worker loads its own copy")
+        # Objects that exist now are never scanned (or written) by the GC again, so their pages stay shared
+        gc.collect()
+        gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = set(spawn_worker(main, sock, args) for _ in range(args.workers))
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    next_report = time.monotonic() + args.report_after
+    while workers:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            workers.discard(pid)
+            if not stopping:
+                logger.warning(f"💀 Worker {pid} exited ({status}) - forking a replacement")
+                workers.add(spawn_worker(main, sock, args))
+            continue
+        now = time.monotonic()
+        if not stopping and now >= next_report:
+            report_memory(os.getpid(), sorted(workers))
+            next_report = now + args.report_interval if args.report_interval > 0 else float("inf")
+        time.sleep(0.5)
+    logger.info("👋 All workers stopped")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,99 @@
+"""
+Startup profiling (NEURO_PROFILE_STARTUP=1).
+
+Import this module before any heavy dependency. In profile mode it wraps
+``__import__`` so that every top-level package imported for the first time is
+timed. That includes the deferred imports done later by the model loaders,
+such as tensorflow or sklearn. Stages such as the main module import and the
+model preload are recorded with stage(). report() logs the breakdown once
+startup completes.
+
+Nested imports are charged to the package that triggered them. An import
+that happens inside a model load is counted in both the import table and the
+load time.
+"""
+
+import os
+import sys
+import time
+import logging
+import builtins
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv("NEURO_PROFILE_STARTUP", "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+def process_age_seconds():
+    """Seconds since this process was launched (interpreter start included) - None off Linux"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (starttime) follows the parenthesized command name
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfiler:
+    """Collects first-import times per top-level package plus named stage timings"""
+
+    def __init__(self):
+        self.imports = {}  # package -> seconds
+        self.stages = []  # (name, seconds)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+
+    def install(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        package = name.partition(".")[0]
+        # Only time the outermost first import of a package on this thread
+        if level or getattr(self._local, "busy", False) or package in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._local.busy = True
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.busy = False
+            with self._lock:
+                self.imports[package] = self.imports.get(package, 0.0) + time.perf_counter() - start
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages.append((name, time.perf_counter() - start))
+
+    def report(self, model_status=None, min_import_ms=5.0):
+        """Log the import / initialization breakdown"""
+        lines = ["⏱️ Startup profile"]
+        age = process_age_seconds()
+        if age is not None:
+            lines.append(f"   {'process launch → ready':<44}{age:>8.3f}s")
+        for name, seconds in self.stages:
+            lines.append(f"   {name:<44}{seconds:>8.3f}s")
+        for name, status in (model_status or {}).items():
+            if status.get("load_seconds") is not None:
+                lines.append(f"   {'load ' + name:<44}{status['load_seconds']:>8.3f}s")
+        lines.append("   first imports (nested imports included):")
+        for package, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+            if seconds * 1000 >= min_import_ms:
+                lines.append(f"     {package:<42}{seconds:>8.3f}s")
+        logger.info("\n".join(lines))
+
+
+profiler = StartupProfiler()
+if ENABLED:
+    profiler.install()
@@ -0,0 +1,248 @@
+"""
+Bounded, zero-copy upload handling for the image endpoints.
+
+- UploadLimitMiddleware rejects oversize requests with 413 before the body is
+  read (Content-Length), or as soon as a chunked body passes the limit.
+- UploadBufferPool holds a fixed number of reusable bytearrays. An upload is
+  copied once, with readinto, from Starlette's spooled file into a pooled
+  buffer. When every buffer is in use, further uploads wait, so upload memory
+  is bounded by ``buffers x max_bytes`` however many requests arrive.
+- BufferReader is a seekable file object over a memoryview of that buffer.
+  PIL decodes from it directly, and hashlib hashes the memoryview, so no
+  ``bytes`` copy of the upload is ever made.
+"""
+
+import io
+import json
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Multipart boundaries, headers and small form fields on top of the file itself
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit, size=None):
+        self.limit = limit
+        self.size = size
+        super().__init__(f"Upload {'of ' + str(size) + ' bytes ' if size else ''}exceeds the limit of {limit} bytes")
+
+
+def too_large_body(limit):
+    return json.dumps({
+        "error": f"Upload exceeds the limit of {limit} bytes",
+        "max_upload_bytes": limit,
+        "status": "error",
+    }).encode()
+
+
+class UploadLimitMiddleware:
+    """ASGI middleware: 413 for request bodies over ``max_bytes`` (+ form overhead) on ``paths``"""
+
+    def __init__(self, app, max_bytes, paths, on_reject=None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.max_body = max_bytes + FORM_OVERHEAD_BYTES
+        self.paths = set(paths)
+        self.on_reject = on_reject
+
+    async def _reject(self, send):
+        if self.on_reject is not None:
+            self.on_reject()
+        body = too_large_body(self.max_bytes)
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                        (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body:
+                    # Rejected before a single body byte is read
+                    return await self._reject(send)
+                break
+
+        # Chunked (or lying) bodies: count bytes as the form parser pulls them
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    exceeded = True
+                    raise UploadTooLarge(self.max_bytes, received)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Once the limit tripped, whatever error response the app produces is replaced by the 413
+            if exceeded:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLarge:
+            pass
+        if exceeded and not response_started:
+            await self._reject(send)
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview - what PIL decodes from"""
+
+    def __init__(self, view):
+        super().__init__()
+        self._view = view
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        start = min(self._position, len(self._view))
+        end = min(start + len(target), len(self._view))
+        count = end - start
+        target[:count] = self._view[start:end]
+        self._position = end
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+
+class UploadBufferPool:
+    """Fixed number of reusable upload buffers; callers wait when all are in use"""
+
+    def __init__(self, buffers, max_bytes, chunk_bytes=1024 * 1024):
+        self.buffers = buffers
+        self.max_bytes = max_bytes
+        self.chunk_bytes = chunk_bytes
+        self._free = [bytearray() for _ in range(buffers)]
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+        self.uploads = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waited = 0
+        self.rejected = 0
+        self.total_bytes = 0
+        self.peak_upload_bytes = 0
+        self.reallocations = 0
+
+    def _grow(self, buffer, size):
+        """``buffer`` with at least ``size`` bytes of capacity - whole chunks, capped at max_bytes"""
+        if len(buffer) >= size:
+            return buffer
+        self.reallocations += 1
+        # Rounded up so uploads of about the same size keep reusing the buffer
+        capacity = min(-(-size // self.chunk_bytes) * self.chunk_bytes, self.max_bytes)
+        try:
+            buffer.extend(bytes(capacity - len(buffer)))
+            return buffer
+        except BufferError:
+            # A memoryview of it is still alive somewhere - start a fresh buffer
+            return bytearray(capacity)
+
+    def _fill(self, file, buffer, size_hint):
+        """Blocking: copy the spooled upload into ``buffer`` -> (buffer, bytes read)"""
+        buffer = self._grow(buffer, min(size_hint or self.chunk_bytes, self.max_bytes))
+        filled = 0
+        while True:
+            if filled == len(buffer):
+                if filled >= self.max_bytes:
+                    # Full at the limit - one more byte means the upload is too large
+                    if file.read(1):
+                        raise UploadTooLarge(self.max_bytes)
+                    return buffer, filled
+                buffer = self._grow(buffer, filled + self.chunk_bytes)
+            with memoryview(buffer) as view:
+                count = file.readinto(view[filled:])
+            if not count:
+                return buffer, filled
+            filled += count
+
+    @asynccontextmanager
+    async def read(self, upload):
+        """``async with pool.read(upload_file) as data`` - data is a memoryview of the whole upload"""
+        size = getattr(upload, "size", None)
+        if size is not None and size > self.max_bytes:
+            self.rejected += 1
+            raise UploadTooLarge(self.max_bytes, size)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.buffers)
+        if self._semaphore.locked():
+            self.waited += 1
+        async with self._semaphore:
+            with self._lock:
+                buffer = self._free.pop()
+                self.in_flight += 1
+                self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            view = None
+            try:
+                await upload.seek(0)
+                buffer, filled = await run_in_threadpool(self._fill, upload.file, buffer, size)
+                with self._lock:
+                    self.uploads += 1
+                    self.total_bytes += filled
+                    self.peak_upload_bytes = max(self.peak_upload_bytes, filled)
+                view = memoryview(buffer)[:filled]
+                yield view
+            except UploadTooLarge:
+                self.rejected += 1
+                raise
+            finally:
+                if view is not None:
+                    view.release()
+                with self._lock:
+                    self._free.append(buffer)
+                    self.in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            capacity = sum(len(buffer) for buffer in self._free)
+            return {
+                "max_upload_bytes": self.max_bytes,
+                "buffers": self.buffers,
+                "memory_bound_bytes": self.buffers * self.max_bytes,
+                "idle_buffer_bytes": capacity,
+                "uploads": self.uploads,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "waited_for_buffer": self.waited,
+                "rejected_too_large": self.rejected,
+                "mean_upload_bytes": round(self.total_bytes / self.uploads) if self.uploads else 0,
+                "peak_upload_bytes": self.peak_upload_bytes,
+                "reallocations": self.reallocations,
+            }